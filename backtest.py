@@ -0,0 +1,227 @@
+import time
+import numpy as np
+import pandas as pd
+from features import FEATURE_SPECS
+from incremental import SufficientStats, parse_estimator
+from projections import MODELS
+from simulate import batched_ranks
+from train import TARGETS, load_training_data, sample_years, feature_sets
+
+DEFAULT_ESTIMATORS = ['linear', 'ridge:0.1', 'ridge:1', 'ridge:10', 'ridge:100']
+# Training windows in seasons; None trains on every earlier season
+DEFAULT_WINDOWS = [1, 2, None]
+DEFAULT_TOP = [12, 24]
+METRICS = ['rmse', 'mae', 'r2', 'rank']
+# Players with identical features tie, but the batched matrix product can
+# split them by rounding error; ranks are taken on predictions rounded to this
+RANK_DECIMALS = 9
+
+
+# --- Folds ---
+
+def target_season(name: str, year: int) -> int:
+    # The season a sample year's targets come from
+    return year if TARGETS[name] == 'rookie_season' else year + 1
+
+
+def walk_forward(name: str, years) -> list:
+    """
+    (earlier sample years, test sample year) for every sample year that has
+    at least one season before it to train on. Over 2020-2024 the veteran
+    models test on 2022, 2023 and 2024 and the rookie models on 2021-2024.
+    """
+    available = sample_years(name, sorted(years))
+    return [(available[:i], available[i]) for i in range(1, len(available))]
+
+
+# --- Batched fits ---
+
+def solve_batch(stats: SufficientStats, masks: np.ndarray, alphas: np.ndarray) -> tuple:
+    """
+    Fit StandardScaler + linear/ridge for many feature subsets at once.
+
+    masks is (configs, features) and picks each config's features out of
+    the model's FEATURE_SPECS, alphas is its ridge penalty (0 for OLS).
+    Each config's normal equations are the standardized scatter matrix
+    restricted to its features, padded to full size with an identity block
+    so every system has the same shape, and all of them are solved in one
+    batched pinv (the minimum norm solution, like lstsq). Returns raw
+    feature weights (configs, features) and intercepts (configs,), with
+    the scaling folded in.
+    """
+    k = masks.shape[1]
+    var = np.diag(stats.scatter)[:k] / stats.n
+    scale = np.where(var > 0, np.sqrt(var), 1.0)
+    xx = stats.scatter[:k, :k] / np.outer(scale, scale)
+    xy = stats.scatter[:k, -1] / scale
+
+    pairs = masks[:, :, None] & masks[:, None, :]
+    systems = np.where(pairs, xx, 0.0)
+    diagonal = np.where(masks, alphas[:, None], 1.0)
+    systems[:, np.arange(k), np.arange(k)] += diagonal
+    coef = np.einsum('cij,cj->ci', np.linalg.pinv(systems, hermitian=True), np.where(masks, xy, 0.0))
+
+    weights = coef / scale
+    intercepts = stats.mean[-1] - weights @ stats.mean[:k]
+    return weights, intercepts
+
+
+# --- Batched scoring ---
+
+def batched_min_ranks(values: np.ndarray) -> np.ndarray:
+    """
+    1-based rank of every column within each row, highest first, with ties
+    sharing their best rank (pandas' rank(ascending=False, method='min')).
+    """
+    order = np.argsort(-values, axis=1, kind='stable')
+    ordered = np.take_along_axis(values, order, axis=1)
+    positions = np.broadcast_to(np.arange(values.shape[1]), values.shape)
+    starts = np.ones(values.shape, dtype=bool)
+    starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    first = np.maximum.accumulate(np.where(starts, positions, 0), axis=1) + 1
+    ranks = np.empty(values.shape, dtype=np.int64)
+    np.put_along_axis(ranks, order, first, axis=1)
+    return ranks
+
+
+def score_batch(actual: np.ndarray, predicted: np.ndarray, top=DEFAULT_TOP) -> dict:
+    """
+    Every metric for every config at once. predicted is (configs, players).
+    rank is helpers.compute_rank_squared_error's sum of squared rank errors,
+    and hit_N the share of the actual top N that a config ranks top N.
+    """
+    error = predicted - actual
+    actual_ranks = batched_min_ranks(actual[None, :])[0]
+    rounded = np.round(predicted, RANK_DECIMALS)
+    predicted_ranks = batched_min_ranks(rounded)
+    scores = {
+        'rmse': np.sqrt(np.mean(error ** 2, axis=1)),
+        'mae': np.mean(np.abs(error), axis=1),
+        'r2': 1 - np.sum(error ** 2, axis=1) / np.sum((actual - actual.mean()) ** 2),
+        'rank': np.sum((predicted_ranks - actual_ranks) ** 2, axis=1).astype(np.float64),
+    }
+    # Ties in the projections are broken by order, so exactly N are picked
+    ordinal = batched_ranks(rounded)
+    for n in top:
+        picked = min(n, len(actual))
+        hits = (ordinal <= picked) & (actual_ranks <= picked)
+        scores[f'hit_{n}'] = hits.sum(axis=1) / picked
+    return scores
+
+
+# --- Backtest ---
+
+def model_configs(name: str, estimators, windows, all_subsets=False, models_dir='models') -> pd.DataFrame:
+    spec = [output for output, _, _ in FEATURE_SPECS[name]]
+    rows = []
+    for features in feature_sets(name, all_subsets, models_dir):
+        for estimator in estimators:
+            for window in windows:
+                rows.append({
+                    'Model': name,
+                    'Features': features,
+                    'Estimator': estimator,
+                    'Window': window,
+                    'mask': np.isin(spec, features),
+                    'alpha': parse_estimator(estimator),
+                })
+    configs = pd.DataFrame(rows)
+    # Keep None (every season) from turning the column into floats
+    configs['Window'] = pd.Series([row['Window'] for row in rows], dtype=object)
+    return configs
+
+
+def backtest_model(name: str, data: dict, configs: pd.DataFrame, years, top=DEFAULT_TOP) -> pd.DataFrame:
+    """
+    Walk one model forward through the seasons, scoring every config on
+    each test season: one batched fit per training window and one
+    (configs x players) prediction matrix per season.
+    """
+    stats = {year: SufficientStats.from_rows(X, y) for year, (X, y, _) in data[name].items()}
+    windows = configs['Window'].to_numpy(dtype=object)
+    masks = np.stack(configs['mask'].to_numpy())
+    alphas = configs['alpha'].to_numpy(dtype=np.float64)
+
+    frames = []
+    for train_years, test_year in walk_forward(name, years):
+        X_test, y_test, _ = data[name][test_year]
+        predicted = np.empty((len(configs), len(y_test)))
+        used = np.empty(len(configs), dtype=object)
+        for window in dict.fromkeys(windows):
+            rows = np.flatnonzero(windows == window)
+            window_years = train_years if window is None else train_years[-window:]
+            merged = SufficientStats(0, None, None)
+            for year in window_years:
+                merged = merged.merge(stats[year])
+            weights, intercepts = solve_batch(merged, masks[rows], alphas[rows])
+            predicted[rows] = weights @ X_test.T + intercepts[:, None]
+            used[rows] = [tuple(window_years)] * len(rows)
+
+        frame = configs[['Model', 'Features', 'Estimator', 'Window']].copy()
+        frame['TrainYears'] = used
+        frame['TestSeason'] = target_season(name, test_year)
+        frame['Players'] = len(y_test)
+        frames.append(pd.concat([frame, pd.DataFrame(score_batch(y_test, predicted, top))], axis=1))
+    return pd.concat(frames, ignore_index=True)
+
+
+def backtest(names=MODELS, years=range(2020, 2025), estimators=DEFAULT_ESTIMATORS, windows=DEFAULT_WINDOWS,
+             all_subsets=False, top=DEFAULT_TOP, models_dir='models') -> pd.DataFrame:
+    """
+    Every config's scores on every walk-forward test season, one row each.
+    Only closed-form estimators (linear, ridge:<alpha>) can be batched;
+    `fbml.py train` still covers lasso and gbr.
+    """
+    years = sorted(years)
+    data = load_training_data(names, years)
+    frames = []
+    for name in names:
+        if len(sample_years(name, years)) < 2:
+            print(f"Skipping {name}, it needs at least two seasons of samples")
+            continue
+        configs = model_configs(name, estimators, windows, all_subsets, models_dir)
+        frames.append(backtest_model(name, data, configs, years, top))
+    return pd.concat(frames, ignore_index=True)
+
+
+def summarize(results: pd.DataFrame, metric='rmse') -> pd.DataFrame:
+    """
+    Each config's metrics averaged over its test seasons, best first within
+    each model.
+    """
+    scores = [c for c in results.columns if c in METRICS or c.startswith('hit_')]
+    if metric not in scores:
+        raise ValueError(f"Unknown metric '{metric}', expected one of {scores}")
+    keys = ['Model', 'Features', 'Estimator', 'Window']
+    summary = results.groupby(keys, sort=False, dropna=False)[scores].mean()
+    summary.insert(0, 'Seasons', results.groupby(keys, sort=False, dropna=False).size())
+    # Higher is better for r2 and the hit rates
+    ascending = metric in ('rmse', 'mae', 'rank')
+    summary = summary.reset_index().sort_values(by=metric, ascending=ascending, kind='stable')
+    model_order = {name: i for i, name in enumerate(results['Model'].unique())}
+    return summary.sort_values(by='Model', key=lambda s: s.map(model_order), kind='stable', ignore_index=True)
+
+
+def run(names=MODELS, years=range(2020, 2025), estimators=None, windows=None, all_subsets=False,
+        top=None, metric='rmse', results_file=None, models_dir='models') -> pd.DataFrame:
+    """
+    Backtest every config, print each model's best and return the summary.
+    """
+    start = time.perf_counter()
+    results = backtest(names, years, estimators or DEFAULT_ESTIMATORS, windows or DEFAULT_WINDOWS,
+                       all_subsets, top or DEFAULT_TOP, models_dir)
+    summary = summarize(results, metric)
+    configs = len(summary)
+    print(f"Backtested {configs} configurations ({len(results)} config-season scores) "
+          f"in {time.perf_counter() - start:.1f} s")
+    if results_file:
+        results.to_csv(results_file, index=False)
+
+    hit_columns = [c for c in summary.columns if c.startswith('hit_')]
+    for name, best in summary.groupby('Model', sort=False).head(1).set_index('Model').iterrows():
+        window = 'all seasons' if pd.isna(best['Window']) else f"last {int(best['Window'])} season(s)"
+        hits = ', '.join(f"{c.replace('_', '@')} {best[c]:.2f}" for c in hit_columns)
+        print(f"{name}: {best['Estimator']} on {window}, {best['Seasons']} test seasons, RMSE {best['rmse']:.2f}, "
+              f"MAE {best['mae']:.2f}, R^2 {best['r2']:.3f}, rank error {best['rank']:.0f}, {hits}")
+        print(f"    features: {list(best['Features'])}")
+    return summary
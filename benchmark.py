@@ -0,0 +1,554 @@
+from datetime import datetime, timezone
+from io import StringIO
+from html import escape
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from bs4 import BeautifulSoup
+import numpy as np
+import pandas as pd
+from scrape_data import parse_pfr_table
+from scrape_rookie_data import parse_college_career_stats
+
+
+# --- Parsers as they were before pfr_parser, kept as the baseline to beat ---
+
+def legacy_parse_pfr_table(html: bytes) -> pd.DataFrame:
+    df = pd.read_html(StringIO(html.decode('utf-8')))[0]
+
+    if isinstance(df.columns, pd.MultiIndex):
+        new_cols = []
+        for col in df.columns.values:
+            if 'Unnamed' in col[0]:
+                new_cols.append(col[1])
+            else:
+                new_cols.append('_'.join(col).strip())
+        df.columns = new_cols
+
+    df = df[df['Rk'] != 'Rk'].reset_index(drop=True)
+
+    for i, player in enumerate(df['Player']):
+        if not player:
+            continue
+        if player.endswith('+'):
+            player = player[:-1]
+            df.at[i, 'FirstTeamAllPro'] = 1
+        if player.endswith('*'):
+            player = player[:-1]
+            df.at[i, 'SelectedToProBowl'] = 1
+        df.at[i, 'Player'] = player
+
+    return df.drop_duplicates(subset='Player', keep='first')
+
+
+def legacy_parse_college_career_stats(html: bytes) -> dict:
+    college_career_stats = {}
+    soup = BeautifulSoup(html, features="lxml")
+    for pos in ['passing', 'rushing', 'receiving']:
+        table = soup.find('table', id=pos + '_standard')
+        if not table or not table.find('tfoot'):
+            continue
+        career_row = table.find('tfoot').find('tr', id=f"{pos}_standard.Career")
+        if not career_row:
+            continue
+        for cell in career_row.find_all(['th', 'td']):
+            if cell.has_attr('data-stat') and cell['data-stat'] not in ["year_id", "pos", "awards"]:
+                try:
+                    value = float(cell.get_text(strip=True))
+                except ValueError:
+                    value = pd.NA
+                college_career_stats[f"Coll_{cell['data-stat']}"] = value
+    return college_career_stats
+
+
+# --- Synthetic fixture pages built from the bundled data/ CSVs ---
+
+PAGE_PADDING = '<div class="filler">' + 'Lorem ipsum dolor sit amet. ' * 2000 + '</div>'
+# Saved pages, written by 'benchmark.py fixtures', that parse and suite time
+FIXTURES_DIR = os.path.join('benchmarks', 'fixtures')
+
+
+def _cell(tag, value, stat=None):
+    value = '' if pd.isna(value) else value
+    attr = f' data-stat="{stat}"' if stat else ''
+    return f'<{tag}{attr}>{escape(str(value))}</{tag}>'
+
+
+def scale_rows(df: pd.DataFrame, scale: int, seed=0) -> pd.DataFrame:
+    """
+    `scale` copies of df's rows. Copies after the first get a numbered
+    player name and numeric stats jittered by up to 10%, so sorts and
+    joins do real work.
+    """
+    if scale == 1:
+        return df
+    rng = np.random.default_rng(seed)
+    copy = np.repeat(np.arange(scale), len(df))
+    scaled = pd.concat([df] * scale, ignore_index=True)
+    scaled['Player'] = scaled['Player'] + pd.Series(copy).map(lambda i: f' #{i}' if i else '')
+    numeric = scaled.select_dtypes('number').columns
+    jitter = rng.uniform(0.9, 1.1, size=(len(scaled), len(numeric)))
+    jitter[copy == 0] = 1.0
+    scaled[numeric] = scaled[numeric].to_numpy(dtype=np.float64) * jitter
+    return scaled
+
+
+def synthetic_fantasy_page(year: int, scale=1) -> bytes:
+    """
+    A page shaped like PFR's fantasy.htm: two header rows, award markers on
+    player names, header rows repeated every 30 players and a large
+    commented-out table, wrapped in some page noise.
+    """
+    df = scale_rows(pd.read_csv(os.path.join('data', f'{year}playerstats.csv')), scale)
+    markers = df['SelectedToProBowl'].eq(1).map({True: '*', False: ''}) + df['FirstTeamAllPro'].eq(1).map({True: '+', False: ''})
+    df = df.loc[:, :'Fantasy_OvRank']
+    df['Player'] = df['Player'] + markers
+
+    over = []
+    for col in df.columns:
+        prefix = col.split('_')[0] if '_' in col else ''
+        if over and over[-1][0] == prefix:
+            over[-1][1] += 1
+        else:
+            over.append([prefix, 1])
+    over_row = ''.join(f'<th colspan="{span}">{prefix}</th>' for prefix, span in over)
+    header_row = ''.join(f'<th>{col.split("_")[-1] if "_" in col else col}</th>' for col in df.columns)
+
+    rows = []
+    for i, values in enumerate(df.itertuples(index=False)):
+        if i and i % 30 == 0:
+            rows.append(f'<tr class="thead">{header_row}</tr>')
+        rows.append('<tr>' + _cell('th', values[0]) + ''.join(_cell('td', v) for v in values[1:]) + '</tr>')
+
+    table = (f'<table id="fantasy"><thead><tr class="over_header">{over_row}</tr><tr>{header_row}</tr></thead>'
+             f'<tbody>{"".join(rows)}</tbody></table>')
+    hidden = table.replace('id="fantasy"', 'id="fantasy_hidden"')
+    page = f'<html><body>{PAGE_PADDING}<div>{table}</div><!-- {hidden} -->{PAGE_PADDING}</body></html>'
+    return page.encode('utf-8')
+
+
+def synthetic_college_pages(year: int, limit=10) -> list:
+    """
+    Pages shaped like Sports-Reference college player pages, with one
+    table per stat group and the Career totals in tfoot. The receiving
+    table is hidden in a comment like on the real site.
+    """
+    df = pd.read_csv(os.path.join('data', f'{year}rookiestats.csv'))
+    groups = {
+        'passing': [c for c in df.columns if c.startswith('Coll_pass')],
+        'rushing': [c for c in df.columns if c.startswith('Coll_rush')],
+        'receiving': [c for c in df.columns if c.startswith('Coll_rec')],
+    }
+
+    pages = []
+    for _, player in (df if limit is None else df.head(limit)).iterrows():
+        tables = []
+        for group, cols in groups.items():
+            # Players only have tables for the stat groups they recorded
+            if player[cols].isna().all():
+                continue
+            # Zeros only for rendering, so the check above keeps seeing the gaps
+            values = player.fillna(0)
+            stats = [c[len('Coll_'):] for c in cols]
+            season_rows = ''.join(
+                '<tr>' + _cell('th', season, 'year_id') + ''.join(_cell('td', round(values[c] / 4, 1), s) for c, s in zip(cols, stats)) + '</tr>'
+                for season in range(year - 4, year)
+            )
+            career = ('<tr id="{0}_standard.Career">'.format(group) + _cell('th', 'Career', 'year_id')
+                      + _cell('td', values['Coll_games'], 'games') + ''.join(_cell('td', values[c], s) for c, s in zip(cols, stats)) + '</tr>')
+            table = f'<table id="{group}_standard"><tbody>{season_rows}</tbody><tfoot>{career}</tfoot></table>'
+            tables.append(f'<!-- {table} -->' if group == 'receiving' else table)
+        pages.append(f'<html><body>{PAGE_PADDING}{"".join(tables)}{PAGE_PADDING}</body></html>'.encode('utf-8'))
+    return pages
+
+
+# --- Measurement ---
+
+def measure(fn, *args, repeat=5, memory=True):
+    """
+    Best-of-`repeat` wall time in seconds, plus the peak Python heap
+    allocation of one call (memory allocated inside libxml2 is not seen by
+    tracemalloc, so this mostly reflects the objects each parser builds).
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+
+    if not memory:
+        return best, None
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def _normalize(value):
+    # Parsers disagree on types ('12' vs 12 vs 12.0, '' vs NaN), not values
+    if value is None or value is pd.NA or value == '' or (isinstance(value, float) and np.isnan(value)):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def output_differences(legacy, new) -> dict:
+    """
+    How the new parser's output for one page differs from the legacy one's:
+    the keys (columns, for a table) only one of them has, and the shared
+    keys whose values differ.
+    """
+    if isinstance(legacy, pd.DataFrame):
+        legacy_keys, new_keys = list(legacy.columns), list(new.columns)
+        values = {key: (legacy[key].tolist(), new[key].tolist()) for key in legacy_keys if key in new_keys}
+    else:
+        legacy_keys, new_keys = list(legacy), list(new)
+        values = {key: ([legacy[key]], [new[key]]) for key in legacy_keys if key in new}
+
+    changed = [key for key, (a, b) in values.items()
+               if len(a) != len(b) or any(_normalize(x) != _normalize(y) for x, y in zip(a, b))]
+    return {
+        'new keys': [key for key in new_keys if key not in legacy_keys],
+        'missing keys': [key for key in legacy_keys if key not in new_keys],
+        'changed values': changed,
+    }
+
+
+def report_differences(differences: list):
+    pages = sum(1 for page in differences if any(page.values()))
+    if not pages:
+        print("  output:   same as the legacy parser on every page")
+        return
+    print(f"  output:   differs from the legacy parser on {pages} of {len(differences)} pages")
+    for kind in ('new keys', 'missing keys', 'changed values'):
+        counts = {}
+        for page in differences:
+            for key in page[kind]:
+                counts[key] = counts.get(key, 0) + 1
+        if counts:
+            print(f"    {kind}: " + ', '.join(f"{key} ({n} pages)" for key, n in counts.items()))
+
+
+def compare(name, legacy, new, pages, repeat):
+    legacy_time = legacy_peak = new_time = new_peak = 0
+    differences = []
+    for page in pages:
+        t, p = measure(legacy, page, repeat=repeat)
+        legacy_time, legacy_peak = legacy_time + t, max(legacy_peak, p)
+        t, p = measure(new, page, repeat=repeat)
+        new_time, new_peak = new_time + t, max(new_peak, p)
+        differences.append(output_differences(legacy(page), new(page)))
+
+    print(f"{name} ({len(pages)} pages)")
+    print(f"  current:  {legacy_time * 1000:9.1f} ms   peak {legacy_peak / 1e6:7.2f} MB")
+    print(f"  streaming:{new_time * 1000:9.1f} ms   peak {new_peak / 1e6:7.2f} MB   ({legacy_time / new_time:.1f}x faster)")
+    report_differences(differences)
+
+
+def write_fixtures(year: int, directory=None, college_pages=6) -> list:
+    """
+    Save a fantasy page and a few college pages for `year` as .html
+    fixtures, so parser timings can be compared on the same pages across
+    runs even as data/ or the generators change.
+    """
+    directory = directory or FIXTURES_DIR
+    os.makedirs(directory, exist_ok=True)
+    pages = {f'{year}_fantasy.html': synthetic_fantasy_page(year)}
+    for i, html in enumerate(synthetic_college_pages(year, limit=college_pages)):
+        pages[f'{year}_college_{i}.html'] = html
+    paths = []
+    for filename, html in pages.items():
+        path = os.path.join(directory, filename)
+        with open(path, 'wb') as f:
+            f.write(html)
+        paths.append(path)
+    return paths
+
+
+def load_fixtures(fixtures_dir):
+    pfr_pages, college_pages = [], []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, '*.htm*'))):
+        with open(path, 'rb') as f:
+            html = f.read()
+        (college_pages if b'_standard.Career' in html else pfr_pages).append(html)
+    return pfr_pages, college_pages
+
+
+def bench_parse(args):
+    if args.fixtures or os.path.isdir(FIXTURES_DIR) and not args.synthetic:
+        pfr_pages, college_pages = load_fixtures(args.fixtures or FIXTURES_DIR)
+    else:
+        pfr_pages = [synthetic_fantasy_page(args.year)]
+        college_pages = synthetic_college_pages(args.year)
+
+    if pfr_pages:
+        compare("scrape_pfr_table parsing", legacy_parse_pfr_table,
+                lambda html: parse_pfr_table(None, html), pfr_pages, args.repeat)
+    if college_pages:
+        compare("college career stats parsing", legacy_parse_college_career_stats,
+                lambda html: parse_college_career_stats(None, html), college_pages, args.repeat)
+
+
+# --- Suite: every pipeline stage at several data scales ---
+
+# Largest scale each stage is run at; building multi-GB HTML pages for the
+# parsers is not worth it
+MAX_SCALE = {'scrape_pfr_table': 100, 'extract_college_position_stats': 100,
+             'scrape_pfr_table_fixtures': 100, 'college_position_stats_fixtures': 100}
+
+
+def case_pfr_table(year, scale):
+    html = synthetic_fantasy_page(year, scale)
+    rows = len(pd.read_csv(os.path.join('data', f'{year}playerstats.csv'))) * scale
+    return lambda: parse_pfr_table(None, html), rows
+
+
+def college_stats_run(pages):
+    # Find each page's Career rows and extract every position's stats, as
+    # extract_college_career_stats does once a page is fetched
+    from pfr_parser import find_rows
+    from scrape_rookie_data import COLLEGE_POSITIONS, career_table_id, extract_college_position_stats
+
+    targets = {career_table_id(pos): f"{career_table_id(pos)}.Career" for pos in COLLEGE_POSITIONS}
+
+    def run():
+        for html in pages:
+            rows = find_rows(html, targets)
+            stats = {}
+            for pos in COLLEGE_POSITIONS:
+                extract_college_position_stats(rows, None, stats, pos)
+    return run
+
+
+def case_college_stats(year, scale):
+    pages = synthetic_college_pages(year, limit=None) * scale
+    return college_stats_run(pages), len(pages)
+
+
+def case_fixture_pfr_tables(year, scale):
+    pfr_pages, _ = load_fixtures(FIXTURES_DIR)
+    pages = pfr_pages * scale
+    rows = sum(len(parse_pfr_table(None, html)) for html in pfr_pages) * scale
+
+    def run():
+        for html in pages:
+            parse_pfr_table(None, html)
+    return run, rows
+
+
+def case_fixture_college_stats(year, scale):
+    _, college_pages = load_fixtures(FIXTURES_DIR)
+    pages = college_pages * scale
+    return college_stats_run(pages), len(pages)
+
+
+def case_split(year, scale):
+    from preprocess_data import preprocess_season
+
+    df = scale_rows(pd.read_csv(os.path.join('data', f'{year}playerstats.csv')), scale)
+    return lambda: preprocess_season(df), len(df)
+
+
+def case_features(name):
+    def case(year, scale):
+        import helpers
+        from projections import data_path
+
+        df = scale_rows(pd.read_csv(data_path(name, year + 1)), scale)
+        return lambda: getattr(helpers, f'compute_{name}_features')(df), len(df)
+    return case
+
+
+def case_generate_projections(year, scale):
+    import joblib
+    from features import compute_features
+    from projections import MODELS, data_path, generate_projections
+
+    packages, dfs = {}, {}
+    for name in MODELS:
+        packages[name] = joblib.load(os.path.join('models', f'{name}_model.joblib'))
+        df = scale_rows(pd.read_csv(data_path(name, year + 1)), scale)
+        compute_features(df, name)
+        dfs[name] = df
+
+    def run():
+        for name in MODELS:
+            generate_projections(packages[name], dfs[name])
+    return run, sum(len(df) for df in dfs.values())
+
+
+def case_project_all(year, scale):
+    from projections import MODELS, data_path, load_models, project_all
+
+    dfs = {name: scale_rows(pd.read_csv(data_path(name, year + 1)), scale) for name in MODELS}
+    models = load_models()
+    return lambda: project_all(dfs, models), sum(len(df) for df in dfs.values())
+
+
+def case_compute_vbd(year, scale):
+    from projections import MODELS, Position, data_path, load_models, project_all, compute_vbd
+
+    dfs = {name: scale_rows(pd.read_csv(data_path(name, year + 1)), scale) for name in MODELS}
+    projections = project_all(dfs, load_models())
+    by_pos = {pos: pd.concat([projections[name] for name, (_, _, model_pos) in MODELS.items() if model_pos == pos],
+                             ignore_index=True) for pos in Position}
+
+    def run():
+        # compute_vbd sorts in place, so each run gets fresh copies
+        for pos, df in by_pos.items():
+            compute_vbd(pos, df.copy())
+    return run, sum(len(df) for df in by_pos.values())
+
+
+def suite_cases() -> dict:
+    from projections import MODELS
+
+    cases = {
+        'scrape_pfr_table': case_pfr_table,
+        'extract_college_position_stats': case_college_stats,
+    }
+    if os.path.isdir(FIXTURES_DIR):
+        # The saved pages, copied `scale` times, independent of data/
+        cases['scrape_pfr_table_fixtures'] = case_fixture_pfr_tables
+        cases['college_position_stats_fixtures'] = case_fixture_college_stats
+    cases['preprocess_split'] = case_split
+    cases.update({f'compute_{name}_features': case_features(name) for name in MODELS})
+    cases['generate_projections'] = case_generate_projections
+    cases['project_all'] = case_project_all
+    cases['compute_vbd'] = case_compute_vbd
+    return cases
+
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(year: int, scales, repeat=5, only=None, memory=True) -> dict:
+    """
+    Time every stage at every scale. Returns the results document that
+    is written as JSON.
+    """
+    results = []
+    for name, case in suite_cases().items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+        for scale in scales:
+            if scale > MAX_SCALE.get(name, scale):
+                continue
+            fn, rows = case(year, scale)
+            seconds, peak = measure(fn, repeat=repeat, memory=memory)
+            results.append({'benchmark': name, 'scale': scale, 'rows': rows, 'seconds': seconds, 'peak_bytes': peak})
+            memory_text = f"   peak {peak / 1e6:8.2f} MB" if peak is not None else ""
+            print(f"{name:>34} x{scale:<5} {rows:>9} rows {seconds * 1000:10.2f} ms{memory_text}")
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'year': year,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold=0.1) -> list:
+    """
+    Print each benchmark's time against the baseline run and return the
+    ones that got more than `threshold` (a fraction) slower.
+    """
+    before = {(r['benchmark'], r['scale']): r['seconds'] for r in baseline['results']}
+    regressions = []
+    print(f"Compared with {baseline.get('commit') or 'baseline'} from {baseline.get('created', '?')}:")
+    for r in current['results']:
+        key = (r['benchmark'], r['scale'])
+        if key not in before:
+            continue
+        ratio = r['seconds'] / before[key]
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions.append(dict(r, baseline_seconds=before[key], ratio=ratio))
+        print(f"{r['benchmark']:>34} x{r['scale']:<5} {before[key] * 1000:10.2f} -> {r['seconds'] * 1000:10.2f} ms "
+              f"({ratio:5.2f}x){flag}")
+    return regressions
+
+
+def load_results(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def bench_suite(args):
+    current = run_suite(args.year, args.scales, args.repeat, args.only, not args.no_memory)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"Results written to '{args.output}'")
+    if args.baseline and compare_results(load_results(args.baseline), current, args.threshold):
+        sys.exit(1)
+
+
+def bench_fixtures(args):
+    for path in write_fixtures(args.year, args.output, args.college_pages):
+        print(f"Wrote '{path}'")
+
+
+def bench_compare(args):
+    if compare_results(load_results(args.baseline), load_results(args.current), args.threshold):
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fbml pipeline stages")
+    subparsers = parser.add_subparsers(dest="stage", required=True)
+
+    parse = subparsers.add_parser("parse", help="Compare the streaming page parsers against the old pandas/BeautifulSoup path, in speed and output")
+    parse.add_argument("--fixtures", help=f"Directory of saved .html pages (default: {FIXTURES_DIR})")
+    parse.add_argument("--synthetic", action="store_true", help="Build pages from data/ instead of reading fixtures")
+    parse.add_argument("--year", type=int, default=2024, help="Season used to build synthetic pages")
+    parse.add_argument("--repeat", type=int, default=5, help="Timing repetitions per page")
+    parse.set_defaults(func=bench_parse)
+
+    fixtures = subparsers.add_parser("fixtures", help="Save synthetic pages as the .html fixtures parse and suite read")
+    fixtures.add_argument("--year", type=int, default=2024, help="Season whose data/ files the pages are built from")
+    fixtures.add_argument("--output", default=FIXTURES_DIR, help="Directory to write the pages to")
+    fixtures.add_argument("--college-pages", type=int, default=6, help="Number of college player pages")
+    fixtures.set_defaults(func=bench_fixtures)
+
+    suite = subparsers.add_parser("suite", help="Time every pipeline stage on data/ and synthetic scale-ups")
+    suite.add_argument("--year", type=int, default=2024, help="Season whose data/ files are used")
+    suite.add_argument("--scales", type=int, nargs="+", default=[1, 10],
+                       help="Player count multipliers, e.g. 1 10 100 1000 (the parsers stop at 100)")
+    suite.add_argument("--repeat", type=int, default=5, help="Timing repetitions per benchmark")
+    suite.add_argument("--only", nargs="+", help="Only run benchmarks whose name contains one of these")
+    suite.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    suite.add_argument("--output", help="Write the results to this JSON file")
+    suite.add_argument("--baseline", help="Results JSON to compare against; exits 1 on a regression")
+    suite.add_argument("--threshold", type=float, default=0.1, help="Slowdown that counts as a regression (0.1 = 10%%)")
+    suite.set_defaults(func=bench_suite)
+
+    compare = subparsers.add_parser("compare", help="Compare two suite results files")
+    compare.add_argument("baseline", help="Results JSON of the earlier run")
+    compare.add_argument("current", help="Results JSON of the later run")
+    compare.add_argument("--threshold", type=float, default=0.1, help="Slowdown that counts as a regression (0.1 = 10%%)")
+    compare.set_defaults(func=bench_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
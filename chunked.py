@@ -0,0 +1,347 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import glob
+import io
+import json
+import os
+import shutil
+import pandas as pd
+from datastore import write_partition
+from instrument import count, traced
+
+# Rows parsed at a time, and bytes of input per map task
+DEFAULT_CHUNK_ROWS = 200_000
+DEFAULT_SPLIT_BYTES = 64 * 1024 * 1024
+AGGREGATIONS = ['sum', 'count', 'min', 'max', 'mean', 'nunique']
+
+# How to roll an input file up to player seasons. 'keys' names the input
+# columns holding the player's id and name, the season and (optionally) the
+# position; 'columns' maps each output column to (input column,
+# aggregation). Output names follow the rest of the project, so
+# FEATURE_SPECS-style features work on the results.
+SPECS = {
+    # One row per player-week, e.g. nflverse's player_stats exports
+    'weekly': {
+        'keys': {'player': 'player_id', 'name': 'player_display_name', 'season': 'season', 'position': 'position'},
+        'columns': {
+            'GamesPlayed': ('week', 'nunique'),
+            'PassCmp': ('completions', 'sum'),
+            'PassAtt': ('attempts', 'sum'),
+            'PassYds': ('passing_yards', 'sum'),
+            'PassTD': ('passing_tds', 'sum'),
+            'PassInt': ('interceptions', 'sum'),
+            'RushAtt': ('carries', 'sum'),
+            'RushYds': ('rushing_yards', 'sum'),
+            'RushTD': ('rushing_tds', 'sum'),
+            'Targets': ('targets', 'sum'),
+            'Receptions': ('receptions', 'sum'),
+            'RecYds': ('receiving_yards', 'sum'),
+            'RecTD': ('receiving_tds', 'sum'),
+            'RecAirYds': ('receiving_air_yards', 'sum'),
+            'RecYAC': ('receiving_yards_after_catch', 'sum'),
+            'FantasyPtsPPR': ('fantasy_points_ppr', 'sum'),
+        },
+    },
+    # One row per play, e.g. nflverse's play_by_play exports, rolled up for
+    # the targeted receiver. Play-by-play has no position column, so the
+    # results land in a single 'ALL' partition.
+    'pbp_receiving': {
+        'keys': {'player': 'receiver_player_id', 'name': 'receiver_player_name', 'season': 'season'},
+        'columns': {
+            'GamesPlayed': ('game_id', 'nunique'),
+            'Targets': ('receiver_player_id', 'count'),
+            'Receptions': ('complete_pass', 'sum'),
+            'RecYds': ('receiving_yards', 'sum'),
+            'RecTD': ('pass_touchdown', 'sum'),
+            'RecAirYds': ('air_yards', 'sum'),
+            'RecAirYdsPerTarget': ('air_yards', 'mean'),
+            'RecYAC': ('yards_after_catch', 'sum'),
+        },
+    },
+}
+
+# Positions kept when the input has them; FBs are grouped with RBs as in
+# preprocess_data.split_by_position
+POSITION_GROUPS = {'QB': 'QB', 'RB': 'RB_FB', 'FB': 'RB_FB', 'WR': 'WR', 'TE': 'TE'}
+
+
+def load_spec(spec) -> dict:
+    """
+    A spec from SPECS by name, a JSON file holding one, or a dict.
+    """
+    if isinstance(spec, str):
+        if spec in SPECS:
+            spec = SPECS[spec]
+        else:
+            with open(spec) as f:
+                spec = json.load(f)
+    keys, columns = spec.get('keys', {}), spec.get('columns', {})
+    missing = [key for key in ('player', 'season') if key not in keys]
+    if missing:
+        raise ValueError(f"Spec keys need {missing}")
+    for output, (_, how) in columns.items():
+        if how not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation '{how}' for {output}, expected one of {AGGREGATIONS}")
+    return {'keys': dict(keys), 'columns': {output: tuple(c) for output, c in columns.items()}}
+
+
+# --- Splitting ---
+
+class _RangeReader(io.RawIOBase):
+    # Reads bytes [start, end) of a file
+
+    def __init__(self, path: str, start: int, end: int):
+        self.file = open(path, 'rb')
+        self.file.seek(start)
+        self.remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self.file.readinto(memoryview(buffer)[:min(len(buffer), self.remaining)])
+        self.remaining -= n
+        return n
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+
+def file_tasks(path: str, split_bytes=DEFAULT_SPLIT_BYTES) -> list:
+    """
+    (path, start, end) byte ranges of an uncompressed CSV, each starting on
+    a line after the header and ending after a newline, so workers can
+    parse them independently. Compressed files, and files whose quoted
+    fields contain line breaks (pass split_bytes=None), are one task.
+    """
+    size = os.path.getsize(path)
+    if not split_bytes or path.endswith(('.gz', '.bz2', '.xz', '.zip', '.zst')):
+        return [(path, None, None)]
+    tasks = []
+    with open(path, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + split_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            tasks.append((path, start, end))
+            start = end
+    return tasks
+
+
+def header(path: str) -> list:
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+# --- Map ---
+
+def chunk_partials(chunk: pd.DataFrame, spec: dict) -> tuple:
+    """
+    One chunk rolled up to (player, season): a frame of additive partial
+    aggregates, and the distinct (player, season, value) rows behind each
+    nunique column.
+    """
+    keys = spec['keys']
+    chunk = chunk.dropna(subset=[keys['player'], keys['season']])
+    group = [keys['player'], keys['season']]
+    named = {}
+    for label in ('name', 'position'):
+        if label in keys:
+            named[label] = (keys[label], 'first')
+
+    distinct = {}
+    for output, (column, how) in spec['columns'].items():
+        if how in ('sum', 'min', 'max'):
+            named[output] = (column, how)
+        elif how == 'count':
+            named[output] = (column, 'count')
+        elif how == 'mean':
+            named[f'{output}__sum'] = (column, 'sum')
+            named[f'{output}__count'] = (column, 'count')
+        else:
+            distinct[output] = chunk[[*group, column]].dropna().drop_duplicates().set_axis(
+                ['player', 'season', 'value'], axis=1)
+    partials = chunk.groupby(group, sort=False).agg(**named)
+    partials.index.names = ['player', 'season']
+    return partials, distinct
+
+
+def combine(partials: list, distincts: list, spec: dict) -> tuple:
+    """
+    Merge partial aggregates from any number of chunks or tasks.
+    """
+    how = {}
+    for label in ('name', 'position'):
+        if label in spec['keys']:
+            how[label] = 'first'
+    for output, (_, aggregation) in spec['columns'].items():
+        if aggregation in ('sum', 'count'):
+            how[output] = 'sum'
+        elif aggregation in ('min', 'max'):
+            how[output] = aggregation
+        elif aggregation == 'mean':
+            how[f'{output}__sum'] = how[f'{output}__count'] = 'sum'
+    merged = pd.concat(partials).groupby(level=['player', 'season'], sort=False).agg(how)
+    distinct = {
+        output: pd.concat([d[output] for d in distincts if output in d], ignore_index=True).drop_duplicates()
+        for output, (_, aggregation) in spec['columns'].items() if aggregation == 'nunique'
+    }
+    return merged, distinct
+
+
+def spill_dir(tmp_dir: str, season) -> str:
+    return os.path.join(tmp_dir, f'season={season}')
+
+
+@traced()
+def map_task(task: tuple, spec: dict, tmp_dir: str, task_id: int, chunk_rows=DEFAULT_CHUNK_ROWS) -> dict:
+    """
+    Runs in a worker process. Stream one byte range of an input in chunks,
+    fold each chunk into running per-(player, season) aggregates, and spill
+    them to tmp_dir, one file per season. Returns {season: rows read}.
+    """
+    path, start, end = task
+    keys = spec['keys']
+    columns = list(dict.fromkeys([*keys.values(), *(column for column, _ in spec['columns'].values())]))
+    names = header(path)
+    missing = [column for column in columns if column not in names]
+    if missing:
+        raise ValueError(f"'{path}' has no columns {missing}")
+
+    # A fixed season type, so a chunk with a blank season does not turn the
+    # others' keys into floats (2024.0) and split their partitions
+    dtypes = {keys['player']: 'string', keys['season']: 'Int64'}
+    if start is None:
+        reader = pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunk_rows)
+    else:
+        source = io.BufferedReader(_RangeReader(path, start, end), buffer_size=1 << 20)
+        reader = pd.read_csv(source, header=None, names=names, usecols=columns, dtype=dtypes, chunksize=chunk_rows)
+
+    merged, distinct = None, {}
+    seasons = {}
+    with reader:
+        for chunk in reader:
+            count('rows', len(chunk))
+            for season, rows in chunk[keys['season']].value_counts().items():
+                seasons[season] = seasons.get(season, 0) + int(rows)
+            partials, chunk_distinct = chunk_partials(chunk, spec)
+            # Keep a single running aggregate, so memory is bounded by the
+            # players seen rather than the rows read
+            previous = [] if merged is None else [merged]
+            merged, distinct = combine([*previous, partials], [distinct, chunk_distinct], spec)
+
+    if merged is None:
+        return {}
+    for season, part in merged.groupby(level='season', sort=False):
+        directory = spill_dir(tmp_dir, season)
+        os.makedirs(directory, exist_ok=True)
+        spill = {
+            'partials': part,
+            'distinct': {output: d[d['season'] == season] for output, d in distinct.items()},
+        }
+        pd.to_pickle(spill, os.path.join(directory, f'task-{task_id}.pkl'))
+    return seasons
+
+
+# --- Reduce ---
+
+def finalize(merged: pd.DataFrame, distinct: dict, spec: dict) -> pd.DataFrame:
+    """
+    Player-season rows from fully merged aggregates: means divided out and
+    distinct values counted.
+    """
+    out = pd.DataFrame(index=merged.index)
+    if 'name' in spec['keys']:
+        out['Player'] = merged['name']
+    out['PlayerId'] = merged.index.get_level_values('player')
+    if 'position' in spec['keys']:
+        out['FantPos'] = merged['position']
+    for output, (_, aggregation) in spec['columns'].items():
+        if aggregation == 'mean':
+            out[output] = merged[f'{output}__sum'] / merged[f'{output}__count'].where(merged[f'{output}__count'] > 0)
+        elif aggregation == 'nunique':
+            counts = distinct[output].groupby(['player', 'season']).size()
+            out[output] = counts.reindex(merged.index, fill_value=0).to_numpy()
+        else:
+            out[output] = merged[output]
+    return out.reset_index(drop=True)
+
+
+def split_positions(df: pd.DataFrame) -> dict:
+    if 'FantPos' not in df:
+        return {'ALL': df}
+    groups = df['FantPos'].map(POSITION_GROUPS)
+    return {pos: df[groups == pos].reset_index(drop=True) for pos in dict.fromkeys(POSITION_GROUPS.values())}
+
+
+@traced()
+def reduce_season(season, spec: dict, tmp_dir: str, kind: str, output_dir='data', store_root=None) -> list:
+    """
+    Runs in a worker process. Merge one season's spills and write its
+    per-position CSVs (and store partitions under store_root, if given).
+    Returns the files written.
+    """
+    spills = [pd.read_pickle(path) for path in sorted(glob.glob(os.path.join(spill_dir(tmp_dir, season), '*.pkl')))]
+    if not spills:
+        # Every row of the season lacked a player
+        return []
+    merged, distinct = combine([s['partials'] for s in spills], [s['distinct'] for s in spills], spec)
+    season_df = finalize(merged, distinct, spec)
+    season_df = season_df.sort_values(by=[c for c in ('FantasyPtsPPR', 'PlayerId') if c in season_df],
+                                      ascending=False, kind='stable', ignore_index=True)
+
+    filepaths = []
+    for pos, df in split_positions(season_df).items():
+        filepath = os.path.join(output_dir, f'{season}{kind}stats_{pos}.csv')
+        df.to_csv(filepath, index=False)
+        filepaths.append(filepath)
+        if store_root is not None:
+            filepaths.append(write_partition(kind, int(season), pos, df, store_root))
+    shutil.rmtree(spill_dir(tmp_dir, season))
+    return filepaths
+
+
+# --- Driver ---
+
+def ingest(paths, spec='weekly', kind='weekly', workers=None, chunk_rows=DEFAULT_CHUNK_ROWS,
+           split_bytes=DEFAULT_SPLIT_BYTES, output_dir='data', store=True) -> dict:
+    """
+    Aggregate large row-level files (weekly or play-by-play exports) to
+    player seasons, split by position, in bounded memory.
+
+    Map tasks each stream a slice of one input, chunk_rows rows at a time,
+    and spill their per-season aggregates to disk. Once every map task is
+    done, each season is reduced and written on its own worker, and its
+    files land as soon as it finishes. No process ever holds more than a
+    chunk of input rows plus one slice's or one season's aggregates.
+    Writes {output_dir}/{season}{kind}stats_{POS}.csv, plus store
+    partitions under {output_dir}/store when store is set, so with the
+    default output_dir they join data/store. Returns {season: files written}.
+    """
+    spec = load_spec(spec)
+    os.makedirs(output_dir, exist_ok=True)
+    store_root = os.path.join(output_dir, 'store') if store else None
+    tmp_dir = os.path.join(output_dir, f'.{kind}_spill')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    tasks = [task for path in paths for task in file_tasks(path, split_bytes)]
+    seasons = {}
+    written = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(map_task, task, spec, tmp_dir, i, chunk_rows): task for i, task in enumerate(tasks)}
+            for future in as_completed(futures):
+                for season, rows in future.result().items():
+                    seasons[season] = seasons.get(season, 0) + rows
+            print(f"Read {sum(seasons.values())} rows of {len(seasons)} season(s) in {len(tasks)} slices")
+
+            futures = {pool.submit(reduce_season, season, spec, tmp_dir, kind, output_dir, store_root): season
+                       for season in sorted(seasons)}
+            for future in as_completed(futures):
+                season = futures[future]
+                written[season] = future.result()
+                print(f"Season {season}: {seasons[season]} rows read, {len(written[season])} files written")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return dict(sorted(written.items()))
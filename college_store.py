@@ -0,0 +1,96 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+import pandas as pd
+
+STORE_PATH = os.path.join('cache', 'college_careers.sqlite')
+# Bump when parse_college_career_stats changes what it extracts, so records
+# parsed by the old version are fetched and parsed again
+PARSER_VERSION = 1
+
+
+def player_key(url: str) -> str:
+    """
+    A college player page's key: host and path without the scheme or
+    'www.', so http/https and www/non-www links to one player match.
+    """
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return host + parsed.path
+
+
+class CollegeStore:
+    """
+    Parsed college career stats, one record per player page.
+
+    A drafted player's college career no longer changes, so each page only
+    has to be fetched and parsed once. Any draft class (or prospect list)
+    that links the same page reads the stored record instead. Records are
+    the {'Coll_<stat>': value} dicts parse_college_career_stats returns, kept
+    as JSON in SQLite so concurrent scrapes can share the file.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self.lock, self.conn:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS careers ('
+                'key TEXT PRIMARY KEY, url TEXT, stats TEXT, parser INTEGER, fetched REAL)'
+            )
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM careers WHERE parser = ?', (PARSER_VERSION,)).fetchone()[0]
+
+    def get_many(self, urls) -> dict:
+        """
+        {url: stats} for every url with a current record.
+        """
+        keys = {player_key(url): url for url in urls}
+        found = {}
+        items = list(keys)
+        with self.lock:
+            # SQLite caps the number of bound parameters per statement
+            for start in range(0, len(items), 500):
+                batch = items[start:start + 500]
+                rows = self.conn.execute(
+                    f'SELECT key, stats FROM careers WHERE parser = ? AND key IN ({",".join("?" * len(batch))})',
+                    [PARSER_VERSION, *batch],
+                ).fetchall()
+                for key, stats in rows:
+                    found[keys[key]] = {column: pd.NA if value is None else value
+                                        for column, value in json.loads(stats).items()}
+        return found
+
+    def get(self, url: str):
+        return self.get_many([url]).get(url)
+
+    def put_many(self, records: dict):
+        """
+        Store {url: stats} records, replacing any older ones.
+        """
+        now = time.time()
+        rows = [
+            (player_key(url), url, json.dumps({column: None if pd.isna(value) else value
+                                               for column, value in stats.items()}), PARSER_VERSION, now)
+            for url, stats in records.items()
+        ]
+        with self.lock, self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO careers VALUES (?, ?, ?, ?, ?)', rows)
+
+    def put(self, url: str, stats: dict):
+        self.put_many({url: stats})
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,200 @@
+import glob
+import os
+import re
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from features import FEATURE_SPECS
+
+STORE_DIR = os.path.join('data', 'store')
+KINDS = {
+    'players': 'playerstats',
+    'rookies': 'rookiestats',
+}
+POSITIONS = ['QB', 'RB_FB', 'WR', 'TE']
+
+# Column names PFR's fantasy table gets from scrape_data.py, mapped to the
+# names the rest of the project uses. Applied once, when a season is
+# preprocessed, so everything in the store already uses the short names.
+RENAME_MAPPING = {
+    'Tm': 'Team',
+    'Games_G': 'GamesPlayed',
+    'Games_GS': 'GamesStarted',
+    'Passing_Cmp': 'PassCmp',
+    'Passing_Att': 'PassAtt',
+    'Passing_Yds': 'PassYds',
+    'Passing_TD': 'PassTD',
+    'Passing_Int': 'PassInt',
+    'Rushing_Att': 'RushAtt',
+    'Rushing_Yds': 'RushYds',
+    'Rushing_Y/A': 'RushYdsPerAtt',
+    'Rushing_TD': 'RushTD',
+    'Receiving_Tgt': 'Targets',
+    'Receiving_Rec': 'Receptions',
+    'Receiving_Yds': 'RecYds',
+    'Receiving_Y/R': 'RecYdsPerReception',
+    'Receiving_TD': 'RecTD',
+    'Fumbles_Fmb': 'Fumbles',
+    'Fumbles_FL': 'FumblesLost',
+    'Scoring_TD': 'TotalTD',
+    'Scoring_2PM': 'TwoPtConvMade',
+    'Scoring_2PP': 'TwoPtConvPassing',
+    'Fantasy_FantPt': 'FantasyPts',
+    'Fantasy_PPR': 'FantasyPtsPPR',
+    'Fantasy_DKPt': 'FantasyPtsDraftKings',
+    'Fantasy_FDPt': 'FantasyPtsFanDuel',
+    'Fantasy_VBD': 'VBD',
+    'Fantasy_PosRank': 'PosRank',
+    'Fantasy_OvRank': 'OverallRank',
+}
+
+# --- Schema ---
+# Strings that identify a player are kept as plain strings, low-cardinality
+# labels are dictionary encoded, and the handful of columns that feed model
+# features or targets stay float64 so models see exactly the CSV values.
+# Everything else (the ~100 sparse advanced and college stats) is float32.
+STRING_COLUMNS = {'Player', 'PfrId', 'PlayerId', 'Link'}
+CATEGORY_COLUMNS = {'Team', 'Tm', 'FantPos', 'Pos', 'College/Univ', 'Awards'}
+EXACT_COLUMNS = (
+    {col for spec in FEATURE_SPECS.values() for _, num, den in spec for col in (num, den) if col}
+    | {'GamesPlayed', 'FantasyPts', 'FantasyPtsPPR', 'FantasyPtsDraftKings', 'FantasyPtsFanDuel'}
+)
+INT_COLUMNS = {'Year'}
+
+
+def column_type(name: str) -> pa.DataType:
+    if name in STRING_COLUMNS:
+        return pa.string()
+    if name in CATEGORY_COLUMNS:
+        return pa.dictionary(pa.int16(), pa.string())
+    if name in INT_COLUMNS:
+        return pa.int16()
+    if name in EXACT_COLUMNS:
+        return pa.float64()
+    return pa.float32()
+
+
+def schema_for(columns) -> pa.Schema:
+    return pa.schema([pa.field(col, column_type(col)) for col in columns])
+
+
+def to_table(df: pd.DataFrame) -> pa.Table:
+    # CSVs round-trip the old index as 'Unnamed: 0'; it carries no data
+    df = df.drop(columns=[c for c in df.columns if c.startswith('Unnamed:')])
+
+    arrays = []
+    for col in df.columns:
+        kind = column_type(col)
+        values = df[col]
+        if pa.types.is_dictionary(kind):
+            array = pa.array(values.astype(object).where(values.notna(), None), type=pa.string()).dictionary_encode()
+            array = array.cast(kind)
+        elif pa.types.is_string(kind):
+            array = pa.array(values.astype(object).where(values.notna(), None), type=kind)
+        else:
+            array = pa.array(pd.to_numeric(values, errors='coerce'), type=kind, from_pandas=True)
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=schema_for(df.columns))
+
+
+# --- Writing ---
+
+def partition_dir(kind: str, year: int, pos: str, root=STORE_DIR) -> str:
+    return os.path.join(root, kind, f'year={year}', f'pos={pos}')
+
+
+def write_partition(kind: str, year: int, pos: str, df: pd.DataFrame, root=STORE_DIR) -> str:
+    """
+    Write one (kind, year, position) partition, replacing any previous one.
+    """
+    path = partition_dir(kind, year, pos, root)
+    os.makedirs(path, exist_ok=True)
+    filepath = os.path.join(path, 'part-0.parquet')
+    tmp = filepath + '.tmp'
+    table = to_table(df)
+    # These files are small, so per-column metadata is a real share of their
+    # size. Only keep min/max statistics on the columns worth filtering on,
+    # and leave the Arrow schema out since readers rebuild it with schema_for.
+    pq.write_table(
+        table, tmp,
+        compression='zstd',
+        store_schema=False,
+        use_dictionary=[c for c in table.column_names if c in CATEGORY_COLUMNS],
+        write_statistics=[c for c in table.column_names if c in EXACT_COLUMNS | INT_COLUMNS],
+    )
+    os.replace(tmp, filepath)
+    return filepath
+
+
+def migrate(root=STORE_DIR, data_dir='data'):
+    """
+    Convert every existing data/{year}{kind}_{POS}.csv into the store.
+    """
+    pattern = re.compile(r'(\d{4})(playerstats|rookiestats)_(\w+)\.csv$')
+    kind_names = {v: k for k, v in KINDS.items()}
+
+    csv_bytes = store_bytes = 0
+    for csv in sorted(glob.glob(os.path.join(data_dir, '*_*.csv'))):
+        match = pattern.search(os.path.basename(csv))
+        if not match:
+            continue
+        year, kind, pos = int(match.group(1)), kind_names[match.group(2)], match.group(3)
+        filepath = write_partition(kind, year, pos, pd.read_csv(csv), root)
+        csv_bytes += os.path.getsize(csv)
+        store_bytes += os.path.getsize(filepath)
+        print(f"Migrated '{csv}' to '{filepath}'")
+
+    if csv_bytes:
+        print(f"CSV: {csv_bytes / 1e6:.2f} MB, store: {store_bytes / 1e6:.2f} MB")
+
+
+# --- Reading ---
+
+def dataset(kind: str, root=STORE_DIR) -> ds.Dataset:
+    path = os.path.join(root, kind)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No '{kind}' data in the store at '{path}'. Run the migration or preprocessing first.")
+
+    partitioning = ds.partitioning(pa.schema([('year', pa.int16()), ('pos', pa.string())]), flavor='hive')
+    files = ds.dataset(path, format='parquet', partitioning=partitioning)
+    # Older seasons lack some advanced columns, so read with the union of
+    # every partition's columns (missing ones come back as nulls), typed by
+    # the explicit schema rather than whatever the file happens to hold.
+    columns = []
+    for fragment in files.get_fragments():
+        columns.extend(name for name in fragment.physical_schema.names if name not in columns)
+    schema = pa.unify_schemas([schema_for(columns), partitioning.schema])
+    return ds.dataset(path, format='parquet', partitioning=partitioning, schema=schema)
+
+
+def read(kind: str, years=None, positions=None, columns=None, filter=None, root=STORE_DIR) -> pd.DataFrame:
+    """
+    Load rows from the store as a DataFrame.
+
+    years and positions prune whole partitions, columns limits which
+    columns are read from disk, and filter is an optional extra
+    pyarrow.dataset expression (e.g. ds.field('GamesPlayed') > 0) pushed
+    down to the row-group statistics.
+    """
+    data = dataset(kind, root)
+
+    expression = None
+    for condition in (
+        None if years is None else ds.field('year').isin(list(years)),
+        None if positions is None else ds.field('pos').isin(list(positions)),
+        filter,
+    ):
+        if condition is not None:
+            expression = condition if expression is None else expression & condition
+
+    table = data.to_table(columns=columns, filter=expression)
+    return table.to_pandas()
+
+
+def read_position(kind: str, year: int, pos: str, columns=None, root=STORE_DIR) -> pd.DataFrame:
+    """
+    Store equivalent of pd.read_csv('data/{year}{kind}_{pos}.csv').
+    """
+    df = read(kind, [year], [pos], columns, root=root)
+    return df.drop(columns=['year', 'pos'], errors='ignore')
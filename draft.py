@@ -0,0 +1,289 @@
+import heapq
+import threading
+import numpy as np
+import pandas as pd
+from projections import Position
+
+# Starters per team at each position. With 12 teams these give the fixed
+# BASELINE_RANKS projections uses; the 2.5 WRs are two WR slots plus half
+# of the FLEX.
+DEFAULT_TEAMS = 12
+DEFAULT_STARTERS = {'QB': 1, 'RB': 2, 'WR': 2.5, 'TE': 1}
+
+
+class FenwickTree:
+    """
+    Counts at positions 0..n-1 with O(log n) updates, prefix sums and
+    lookups of the k-th counted position.
+    """
+
+    def __init__(self, n: int, fill=1):
+        self.n = n
+        self.tree = [0] * (n + 1)
+        # O(n) build: push each node's sum up to its parent
+        for i in range(1, n + 1):
+            self.tree[i] += fill
+            parent = i + (i & -i)
+            if parent <= n:
+                self.tree[parent] += self.tree[i]
+        self.total = fill * n
+
+    def add(self, i: int, delta: int):
+        self.total += delta
+        i += 1
+        while i <= self.n:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i: int) -> int:
+        # Count at positions [0, i)
+        count = 0
+        while i > 0:
+            count += self.tree[i]
+            i -= i & -i
+        return count
+
+    def find(self, k: int) -> int:
+        """
+        Position of the k-th (1-based) count, or -1 if there are fewer.
+        """
+        if k < 1 or k > self.total:
+            return -1
+        pos = 0
+        step = 1 << self.n.bit_length()
+        while step:
+            if pos + step <= self.n and self.tree[pos + step] < k:
+                pos += step
+                k -= self.tree[pos]
+            step >>= 1
+        return pos
+
+
+class LeagueSettings:
+    """
+    Team count, starters per team at each position and a points multiplier
+    per position (e.g. {'TE': 1.5} for a TE premium). A position's baseline
+    is the player who would be the last starter across the league.
+    """
+
+    def __init__(self, teams=DEFAULT_TEAMS, starters=None, scoring=None):
+        positions = [pos.name for pos in Position]
+        for name, values in (('starters', starters), ('scoring', scoring)):
+            unknown = [pos for pos in values or {} if pos not in positions]
+            if unknown:
+                raise ValueError(f"Unknown positions in {name}: {unknown}, expected some of {positions}")
+        self.teams = int(teams)
+        self.starters = {pos: float(n) for pos, n in dict(DEFAULT_STARTERS, **(starters or {})).items()}
+        self.scoring = {pos: 1.0 for pos in positions}
+        self.scoring.update({pos: float(scale) for pos, scale in (scoring or {}).items()})
+        if self.teams < 1 or min(self.starters.values()) < 0:
+            raise ValueError("A league needs at least one team and no negative starter counts")
+
+    @classmethod
+    def from_dict(cls, settings: dict):
+        unknown = set(settings) - {'teams', 'starters', 'scoring'}
+        if unknown:
+            raise ValueError(f"Unknown league settings: {sorted(unknown)}")
+        return cls(**settings)
+
+    def to_dict(self) -> dict:
+        return {'teams': self.teams, 'starters': self.starters, 'scoring': self.scoring}
+
+    def baseline_rank(self, pos: str) -> int:
+        return max(1, round(self.teams * self.starters[pos]))
+
+
+class DraftBoard:
+    """
+    VBD that follows a live draft.
+
+    Each position keeps its players sorted by projection once, with a
+    Fenwick tree over which of them are still available. Drafting or
+    restoring a player is one tree update, and the new baseline is one
+    k-th-available lookup, both O(log n); the projections are never
+    recomputed.
+
+    A position's baseline is its best available player after the starter
+    slots left to fill there, so it moves when players are drafted out of
+    order or a position's slots run out. Before any picks it is the same
+    player compute_vbd uses.
+    """
+
+    def __init__(self, ranked: pd.DataFrame, settings=None):
+        self.changed = threading.Condition()
+        self.version = 0
+        self.pool = 0
+        self.picks = []
+        self.names, self.models = [], []
+        self.settings = settings or LeagueSettings()
+        self.load(ranked)
+
+    def load(self, ranked: pd.DataFrame):
+        """
+        (Re)build the board from ranked projections (Player, Pos, Model and
+        Projected_Pts columns), keeping the picks made so far.
+        """
+        with self.changed:
+            picks = [(self.names[i], self.models[i]) for i in self.picks]
+            self.players = ranked[['Player', 'Pos', 'Model', 'Projected_Pts']].reset_index(drop=True)
+            self.names = self.players['Player'].tolist()
+            self.positions = self.players['Pos'].tolist()
+            self.models = self.players['Model'].tolist()
+            positions = np.array(self.positions, dtype=object)
+            projected = self.players['Projected_Pts'].to_numpy(dtype=np.float64)
+
+            self.order = {}
+            self.slot = np.empty(len(self.players), dtype=np.int64)
+            for pos in Position:
+                ids = np.flatnonzero(positions == pos.name)
+                ids = ids[np.argsort(-projected[ids], kind='stable')]
+                self.order[pos.name] = ids.tolist()
+                self.slot[ids] = np.arange(len(ids))
+
+            self.available = {pos: FenwickTree(len(ids)) for pos, ids in self.order.items()}
+            self.filled = {pos: 0 for pos in self.order}
+            self.drafted = set()
+            self.picks = []
+            lookup = {key: i for i, key in enumerate(zip(self.names, self.models))}
+            for key in picks:
+                if key in lookup:
+                    self._draft(lookup[key])
+            self._score()
+
+    def _score(self):
+        # Points under the league's scoring and every baseline; O(n)
+        scale = self.players['Pos'].map(self.settings.scoring).to_numpy(dtype=np.float64)
+        self.points = self.players['Projected_Pts'].to_numpy(dtype=np.float64) * scale
+        self.baselines = {pos: self._baseline(pos) for pos in self.order}
+        self.pool += 1
+        self._changed()
+
+    def _changed(self):
+        self.version += 1
+        self.changed.notify_all()
+
+    def _baseline(self, pos: str) -> float:
+        tree = self.available[pos]
+        if tree.total == 0:
+            return 0.0
+        k = max(1, self.settings.baseline_rank(pos) - self.filled[pos])
+        return float(self.points[self.order[pos][tree.find(min(k, tree.total))]])
+
+    def _draft(self, i: int):
+        pos = self.positions[i]
+        self.available[pos].add(int(self.slot[i]), -1)
+        self.filled[pos] += 1
+        self.drafted.add(i)
+        self.picks.append(i)
+        return pos
+
+    # --- Draft actions ---
+
+    def find(self, name: str, model=None) -> int:
+        matches = [i for i, (player, player_model) in enumerate(zip(self.names, self.models))
+                   if player.lower() == name.lower() and (model is None or player_model == model)]
+        if not matches:
+            raise KeyError(f"No player named '{name}'")
+        if len(matches) > 1:
+            raise ValueError(f"'{name}' matches several players, pass 'model' to pick one")
+        return matches[0]
+
+    def pick(self, i: int):
+        with self.changed:
+            if not 0 <= i < len(self.players):
+                raise KeyError(f"No player with id {i}")
+            if i in self.drafted:
+                raise ValueError(f"{self.names[i]} has already been drafted")
+            pos = self._draft(i)
+            self.baselines[pos] = self._baseline(pos)
+            self._changed()
+
+    def undo(self, i=None):
+        """
+        Put a drafted player (by default the last pick) back on the board.
+        """
+        with self.changed:
+            if i is None:
+                if not self.picks:
+                    raise ValueError("No picks to undo")
+                i = self.picks[-1]
+            if i not in self.drafted:
+                raise ValueError(f"Player {i} has not been drafted")
+            pos = self.positions[i]
+            self.available[pos].add(int(self.slot[i]), 1)
+            self.filled[pos] -= 1
+            self.drafted.remove(i)
+            self.picks.remove(i)
+            self.baselines[pos] = self._baseline(pos)
+            self._changed()
+
+    def reset(self):
+        with self.changed:
+            self.picks = []
+            self.load(self.players)
+
+    def configure(self, settings: LeagueSettings):
+        with self.changed:
+            self.settings = settings
+            self._score()
+
+    # --- Views ---
+
+    def board(self, pos=None, limit=None) -> list:
+        """
+        Available players by live VBD. Each position's list is already in
+        order, so this is a merge of four sorted lists.
+        """
+        def ranked(pos):
+            baseline = self.baselines[pos]
+            for i in self.order[pos]:
+                if i not in self.drafted:
+                    yield self.points[i] - baseline, i
+
+        if pos and pos.upper() not in self.order:
+            raise ValueError(f"Unknown position '{pos}', expected one of {list(self.order)}")
+        with self.changed:
+            positions = [pos.upper()] if pos else list(self.order)
+            merged = heapq.merge(*(ranked(p) for p in positions), key=lambda row: -row[0])
+            rows = []
+            for vbd, i in merged:
+                if limit is not None and len(rows) >= limit:
+                    break
+                rows.append({
+                    'Id': i,
+                    'Player': self.names[i],
+                    'Pos': self.positions[i],
+                    'Model': self.models[i],
+                    'Projected_Pts': float(self.points[i]),
+                    'VBD': float(vbd),
+                })
+            return rows
+
+    def state(self, players=False) -> dict:
+        """
+        Everything a client needs to rank the board itself: the baselines
+        and picks, plus, with players=True, every player as
+        [name, pos, model, points] indexed by id. The player list only
+        changes when 'pool' does.
+        """
+        with self.changed:
+            state = {
+                'version': self.version,
+                'pool': self.pool,
+                'settings': self.settings.to_dict(),
+                'baselines': dict(self.baselines),
+                'picks': list(self.picks),
+            }
+            if players:
+                state['players'] = [
+                    [player, pos, model, float(points)]
+                    for player, pos, model, points in zip(self.names, self.positions, self.models, self.points)
+                ]
+            return state
+
+    def wait(self, version: int, timeout=None) -> bool:
+        """
+        Block until the board is past `version`. False on timeout.
+        """
+        with self.changed:
+            return self.changed.wait_for(lambda: self.version > version, timeout)
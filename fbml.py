@@ -0,0 +1,354 @@
+import argparse
+import sys
+
+
+def parse_years(spec: str) -> list:
+    """
+    Parse a season spec like '2024', '2020-2025' or '2020,2022-2024'.
+    """
+    years = []
+    for part in spec.split(','):
+        if '-' in part:
+            start, end = part.split('-')
+            years.extend(range(int(start), int(end) + 1))
+        else:
+            years.append(int(part))
+    return sorted(set(years))
+
+
+def cmd_scrape(args):
+    from college_store import CollegeStore
+    from scrape_all import scrape_all, make_fetcher
+
+    fetcher = make_fetcher(args.workers, args.rate, args.pfr_rate, not args.no_cache)
+    store = None if args.no_cache else CollegeStore()
+    failed = scrape_all(parse_years(args.years), args.kinds, fetcher, resume=args.resume, store=store)
+    if failed:
+        print("Failed jobs:", ", ".join(f"{kind} {year}" for kind, year in failed))
+        return 1
+    return 0
+
+
+def cmd_migrate_store(args):
+    from datastore import migrate
+
+    migrate()
+    return 0
+
+
+def cmd_preprocess(args):
+    from preprocess_pipeline import run
+
+    rebuilt = run(parse_years(args.years), args.kinds, args.workers, force=args.force)
+    print(f"Rebuilt {len(rebuilt)} season(s)")
+    return 0
+
+
+def cmd_project(args):
+    import time
+    from projections import build_projections, save_projections
+
+    timings = {}
+    start = time.perf_counter()
+    final_projections = build_projections(args.year, args.models_dir, args.store, timings)
+    save_projections(args.year, final_projections, args.output_dir)
+    if args.feed:
+        from feed import save_feed
+
+        save_feed(args.year, final_projections, args.feed_dir, args.page_size)
+    timings['total'] = time.perf_counter() - start
+
+    for stage, seconds in timings.items():
+        print(f"{stage:>20}: {seconds * 1000:8.1f} ms")
+    return 0
+
+
+def cmd_formats(args):
+    import time
+    from scoring import SCORING, load_rules
+    from stat_lines import build_formats, save_formats
+
+    rules = {name: SCORING[name] for name in args.formats}
+    if args.rules:
+        rules.update(load_rules(args.rules))
+    if not rules:
+        print("Error: no scoring formats selected")
+        return 1
+
+    timings = {}
+    start = time.perf_counter()
+    df = build_formats(args.year, rules, args.models_dir, args.store, timings)
+    save_formats(args.year, df, args.output_dir)
+    timings['total'] = time.perf_counter() - start
+
+    for stage, seconds in timings.items():
+        print(f"{stage:>20}: {seconds * 1000:8.1f} ms")
+    return 0
+
+
+def cmd_train_stats(args):
+    from stat_lines import train_stat_models
+
+    train_stat_models(args.models, parse_years(args.years), args.estimator, args.models_dir, not args.no_save)
+    return 0
+
+
+def cmd_simulate(args):
+    import time
+    from simulate import simulate, save_simulation
+
+    timings = {}
+    start = time.perf_counter()
+    summary = simulate(args.year, args.draws, args.method, args.seed, models_dir=args.models_dir,
+                       use_store=args.store, timings=timings)
+    save_simulation(args.year, summary, args.output_dir)
+    timings['total'] = time.perf_counter() - start
+
+    for stage, seconds in timings.items():
+        print(f"{stage:>20}: {seconds * 1000:8.1f} ms")
+    return 0
+
+
+def cmd_serve(args):
+    from draft import LeagueSettings
+    from server import serve
+
+    serve(args.year, args.host, args.port, args.models_dir, args.store, args.verbose, LeagueSettings(teams=args.teams))
+    return 0
+
+
+def cmd_train(args):
+    from train import run
+
+    run(args.models, parse_years(args.years), args.estimators, args.metric, args.all_subsets,
+        args.workers, not args.no_save, args.results, args.models_dir)
+    return 0
+
+
+def cmd_retrain(args):
+    from incremental import retrain
+
+    retrain(args.models, parse_years(args.years), args.estimator, args.window, args.check,
+            not args.no_save, args.models_dir)
+    return 0
+
+
+def cmd_backtest(args):
+    from backtest import run
+
+    summary = run(args.models, parse_years(args.years), args.estimators, args.windows, args.all_subsets,
+                  args.top, args.metric, args.results)
+    if args.summary:
+        summary.to_csv(args.summary, index=False)
+    return 0
+
+
+def cmd_panel(args):
+    from panel import build_panel, save_panel
+
+    for name in args.models:
+        save_panel(name, build_panel(name, parse_years(args.years), args.lags, args.windows, args.store),
+                   args.output_dir)
+    return 0
+
+
+def cmd_ingest(args):
+    from chunked import ingest
+
+    ingest(args.files, args.spec, args.kind, args.workers, args.chunk_rows,
+           None if args.no_split else args.split_mb * 2 ** 20, args.output_dir, not args.no_store)
+    return 0
+
+
+def cmd_player_ids(args):
+    from player_ids import build_index
+
+    index = build_index()
+    index.save()
+    print(f"Indexed {len(index)} players in '{index.path}'")
+    return 0
+
+
+def cmd_export_models(args):
+    import glob
+    import os
+    from model_artifact import export_package
+
+    for path in sorted(glob.glob(os.path.join(args.models_dir, '*.joblib'))):
+        print(f"Exported '{path}' to '{export_package(path)}'")
+    return 0
+
+
+def build_parser():
+    from chunked import DEFAULT_CHUNK_ROWS, DEFAULT_SPLIT_BYTES
+    from fetcher import DEFAULT_RATE
+    from scrape_data import PFR_RATE
+
+    models = ['qb', 'rb_fb', 'wr', 'te', 'rookie_qb', 'rookie_rb_fb', 'rookie_wr', 'rookie_te']
+
+    parser = argparse.ArgumentParser(prog="fbml", description="Fantasy football projections toolkit")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Record a Chrome trace of every pipeline stage to PATH (also: FBML_TRACE=PATH)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scrape = subparsers.add_parser("scrape", help="Scrape player and rookie data for a range of seasons")
+    scrape.add_argument("--years", required=True, help="Seasons to scrape, e.g. 2020-2025")
+    scrape.add_argument("--kinds", nargs="+", choices=["players", "rookies"], default=["players", "rookies"],
+                        help="Which data to scrape")
+    scrape.add_argument("--workers", type=int, default=4, help="Number of concurrent fetch/parse workers")
+    scrape.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help="Max requests per second to Sports-Reference college pages")
+    scrape.add_argument("--pfr-rate", type=float, default=PFR_RATE,
+                        help="Max requests per second to Pro-Football-Reference")
+    scrape.add_argument("--resume", action="store_true", help="Skip seasons finished by a previous run")
+    scrape.add_argument("--no-cache", action="store_true",
+                        help="Always re-download pages instead of using the HTTP cache and college career store")
+    scrape.set_defaults(func=cmd_scrape)
+
+    preprocess = subparsers.add_parser("preprocess", help="Preprocess scraped data for a range of seasons")
+    preprocess.add_argument("--years", required=True, help="Seasons to preprocess, e.g. 2020-2025")
+    preprocess.add_argument("--kinds", nargs="+", choices=["players", "rookies"], default=["players", "rookies"],
+                            help="Which data to preprocess")
+    preprocess.add_argument("--workers", type=int, help="Number of worker processes (default: one per CPU)")
+    preprocess.add_argument("--force", action="store_true", help="Rebuild seasons even if their inputs are unchanged")
+    preprocess.set_defaults(func=cmd_preprocess)
+
+    project = subparsers.add_parser("project", help="Create the projections file for a season")
+    project.add_argument("--year", type=int, required=True, help="Season to project")
+    project.add_argument("--models-dir", default="models", help="Directory holding the model packages")
+    project.add_argument("--output-dir", default="projections", help="Directory to write {year}_projections.csv to")
+    project.add_argument("--store", action="store_true", help="Read stats from the Parquet store instead of the CSVs")
+    project.add_argument("--feed", action="store_true",
+                         help="Also write the paged, pre-compressed feed the frontend loads")
+    project.add_argument("--feed-dir", default="frontend/vite-project/public",
+                         help="Directory to write the {year}_feed/ directory to")
+    project.add_argument("--page-size", type=int, default=200, help="Rows per feed page")
+    project.set_defaults(func=cmd_project)
+
+    formats = subparsers.add_parser("formats", help="Project stat lines and score them under several league formats")
+    formats.add_argument("--year", type=int, required=True, help="Season to project")
+    formats.add_argument("--formats", nargs="*", choices=["standard", "half_ppr", "ppr", "draftkings", "fanduel"],
+                         default=["ppr", "half_ppr", "standard"], help="Built-in scoring formats to apply")
+    formats.add_argument("--rules", help='JSON file of custom formats, {"name": {"base": "ppr", "PassTD": 6}}')
+    formats.add_argument("--models-dir", default="models", help="Directory holding the stat line models")
+    formats.add_argument("--output-dir", default="projections", help="Directory to write {year}_formats.csv to")
+    formats.add_argument("--store", action="store_true", help="Read stats from the Parquet store instead of the CSVs")
+    formats.set_defaults(func=cmd_formats)
+
+    simulate = subparsers.add_parser("simulate", help="Simulate seasons to get each player's floor, ceiling and VBD odds")
+    simulate.add_argument("--year", type=int, required=True, help="Season to project")
+    simulate.add_argument("--draws", type=int, default=5000, help="Number of simulated seasons")
+    simulate.add_argument("--method", choices=["residual", "bootstrap"], default="residual",
+                          help="Draw noise from a normal fit to each model's residuals, or resample the residuals")
+    simulate.add_argument("--seed", type=int, help="Random seed, for reproducible output")
+    simulate.add_argument("--models-dir", default="models", help="Directory holding the model packages")
+    simulate.add_argument("--output-dir", default="projections", help="Directory to write {year}_simulation.csv to")
+    simulate.add_argument("--store", action="store_true", help="Read stats from the Parquet store instead of the CSVs")
+    simulate.set_defaults(func=cmd_simulate)
+
+    serve = subparsers.add_parser("serve", help="Serve projections over HTTP/JSON with the models kept in memory")
+    serve.add_argument("--year", type=int, required=True, help="Season to project")
+    serve.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    serve.add_argument("--port", type=int, default=8025, help="Port to listen on")
+    serve.add_argument("--models-dir", default="models", help="Directory holding the model packages")
+    serve.add_argument("--store", action="store_true", help="Read stats from the Parquet store instead of the CSVs")
+    serve.add_argument("--teams", type=int, default=12, help="Teams in the league, for the live draft's baselines")
+    serve.add_argument("--verbose", action="store_true", help="Log every request")
+    serve.set_defaults(func=cmd_serve)
+
+    train = subparsers.add_parser("train", help="Sweep training configurations for every model and save the best")
+    train.add_argument("--years", default="2020-2024", help="Seasons of data to train and test on; the last is held out")
+    train.add_argument("--models", nargs="+", choices=models, default=models, help="Which models to train")
+    train.add_argument("--estimators", nargs="+",
+                       help="Estimators to try: linear, ridge:<alpha>, lasso:<alpha> or gbr:<max depth> (default: a mix of all four)")
+    train.add_argument("--metric", choices=["rmse", "mae", "rank"], default="rmse",
+                       help="Test metric that picks the winner")
+    train.add_argument("--all-subsets", action="store_true", help="Try every subset of features instead of leave-one-out subsets")
+    train.add_argument("--workers", type=int, help="Number of worker processes (default: one per CPU)")
+    train.add_argument("--results", help="Write every configuration's scores to this CSV")
+    train.add_argument("--models-dir", default="models", help="Directory to write the winning packages to")
+    train.add_argument("--no-save", action="store_true", help="Only report the winners, leave models/ untouched")
+    train.set_defaults(func=cmd_train)
+
+    retrain = subparsers.add_parser("retrain", help="Incrementally retrain the models as new seasons are added")
+    retrain.add_argument("--years", default="2020-2024", help="Seasons of data to train on")
+    retrain.add_argument("--models", nargs="+", choices=models, default=models, help="Which models to retrain")
+    retrain.add_argument("--estimator", default="linear", help="linear or ridge:<alpha>")
+    retrain.add_argument("--window", type=int, help="Only train on this many of the most recent seasons")
+    retrain.add_argument("--check", action="store_true", help="Compare against a full refit from the raw rows")
+    retrain.add_argument("--models-dir", default="models", help="Directory to write the retrained packages to")
+    retrain.add_argument("--no-save", action="store_true", help="Only report, leave models/ untouched")
+    retrain.set_defaults(func=cmd_retrain)
+
+    backtest = subparsers.add_parser("backtest", help="Walk-forward backtest many model configurations at once")
+    backtest.add_argument("--years", default="2020-2024", help="Seasons of data; each is tested on the ones before it")
+    backtest.add_argument("--models", nargs="+", choices=models, default=models, help="Which models to backtest")
+    backtest.add_argument("--estimators", nargs="+",
+                          help="linear and/or ridge:<alpha> (default: linear and ridge at 0.1, 1, 10, 100)")
+    backtest.add_argument("--windows", nargs="+", type=lambda w: None if w == "all" else int(w),
+                          help="Training windows in seasons, or 'all' (default: 1 2 all)")
+    backtest.add_argument("--all-subsets", action="store_true", help="Try every subset of features instead of leave-one-out subsets")
+    backtest.add_argument("--top", nargs="+", type=int, help="Report top-N hit rates for these N (default: 12 24)")
+    backtest.add_argument("--metric", default="rmse",
+                          help="Metric that ranks the configurations: rmse, mae, r2, rank or hit_<N> for a --top N")
+    backtest.add_argument("--results", help="Write every configuration's per-season scores to this CSV")
+    backtest.add_argument("--summary", help="Write every configuration's averaged scores to this CSV")
+    backtest.set_defaults(func=cmd_backtest)
+
+    panel = subparsers.add_parser("panel", help="Build multi-season lag features for the veteran models")
+    panel.add_argument("--years", default="2020-2024", help="Seasons of data to stack")
+    veterans = [name for name in models if not name.startswith('rookie_')]
+    panel.add_argument("--models", nargs="+", choices=veterans, default=veterans,
+                       help="Which veteran models to build panels for")
+    panel.add_argument("--lags", type=int, default=3, help="Seasons of history per row")
+    panel.add_argument("--windows", nargs="+", type=int, default=[2, 3],
+                       help="Seasons averaged by the rolling mean and games-weighted features")
+    panel.add_argument("--output-dir", default="data", help="Directory to write panel_{model}.csv to")
+    panel.add_argument("--store", action="store_true", help="Read stats from the Parquet store instead of the CSVs")
+    panel.set_defaults(func=cmd_panel)
+
+    ingest = subparsers.add_parser("ingest", help="Aggregate large weekly or play-by-play files to player seasons")
+    ingest.add_argument("files", nargs="+", help="CSV files to aggregate (.gz and other compressed files work too)")
+    ingest.add_argument("--spec", default="weekly",
+                        help="Column spec: weekly, pbp_receiving or a JSON file (see chunked.SPECS)")
+    ingest.add_argument("--kind", default="weekly", help="Name for the outputs, {season}{kind}stats_{POS}.csv")
+    ingest.add_argument("--workers", type=int, help="Worker processes (default: one per core)")
+    ingest.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows each worker parses at a time")
+    ingest.add_argument("--split-mb", type=int, default=DEFAULT_SPLIT_BYTES // 2 ** 20, help="Megabytes of a file each map task reads")
+    ingest.add_argument("--no-split", action="store_true",
+                        help="Read each file in one task (needed if quoted fields contain line breaks)")
+    ingest.add_argument("--output-dir", default="data", help="Directory to write the per-position CSVs, and store/ partitions, to")
+    ingest.add_argument("--no-store", action="store_true", help="Don't also write Parquet store partitions")
+    ingest.set_defaults(func=cmd_ingest)
+
+    train_stats = subparsers.add_parser("train-stats", help="Train the stat line models that 'formats' scores")
+    train_stats.add_argument("--years", default="2020-2024", help="Seasons of data to train on")
+    train_stats.add_argument("--models", nargs="+", choices=models, default=models, help="Which models to train")
+    train_stats.add_argument("--estimator", default="linear", help="linear, ridge:<alpha> or lasso:<alpha>")
+    train_stats.add_argument("--models-dir", default="models", help="Directory to write the stat line models to")
+    train_stats.add_argument("--no-save", action="store_true", help="Only report, leave models/ untouched")
+    train_stats.set_defaults(func=cmd_train_stats)
+
+    export_models = subparsers.add_parser("export-models", help="Convert the joblib model packages into compact .fbm artifacts")
+    export_models.add_argument("--models-dir", default="models", help="Directory holding the model packages")
+    export_models.set_defaults(func=cmd_export_models)
+
+    player_ids = subparsers.add_parser("player-ids", help="Rebuild the player id index from the data files")
+    player_ids.set_defaults(func=cmd_player_ids)
+
+    migrate_store = subparsers.add_parser("migrate-store", help="Convert the per-position CSVs in data/ into the Parquet store")
+    migrate_store.set_defaults(func=cmd_migrate_store)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.trace:
+        from instrument import enable
+
+        enable(args.trace)
+    return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import numpy as np
+from instrument import traced
+
+# Per-game features for each model, as (output column, numerator, denominator).
+# A denominator of None copies the numerator as is. Missing values, and ratios
+# over zero games, come out as 0.
+FEATURE_SPECS = {
+    'qb': [
+        ('PassAttPerGame', 'PassAtt', 'GamesPlayed'),
+        ('PassYdsPerGame', 'PassYds', 'GamesPlayed'),
+        ('PassTDsPerGame', 'PassTD', 'GamesPlayed'),
+        ('PassIntPerGame', 'PassInt', 'GamesPlayed'),
+        ('RushYdsPerGame', 'RushYds', 'GamesPlayed'),
+        ('RushTDsPerGame', 'RushTD', 'GamesPlayed'),
+    ],
+    'rb_fb': [
+        ('RushAttPerGame', 'RushAtt', 'GamesPlayed'),
+        ('RushYdsPerGame', 'RushYds', 'GamesPlayed'),
+        ('RushTDsPerGame', 'RushTD', 'GamesPlayed'),
+        ('TargetsPerGame', 'Targets', 'GamesPlayed'),
+        ('RecsPerGame', 'Receptions', 'GamesPlayed'),
+        ('RecYdsPerGame', 'RecYds', 'GamesPlayed'),
+        ('RecTDsPerGame', 'RecTD', 'GamesPlayed'),
+    ],
+    'te': [
+        ('TargetsPerGame', 'Targets', 'GamesPlayed'),
+        ('RecsPerGame', 'Receptions', 'GamesPlayed'),
+        ('RecYdsPerGame', 'RecYds', 'GamesPlayed'),
+        ('RecTDsPerGame', 'RecTD', 'GamesPlayed'),
+    ],
+    'wr': [
+        ('TargetsPerGame', 'Targets', 'GamesPlayed'),
+        ('RecsPerGame', 'Receptions', 'GamesPlayed'),
+        ('RecYdsPerGame', 'RecYds', 'GamesPlayed'),
+        ('RecTDsPerGame', 'RecTD', 'GamesPlayed'),
+    ],
+    'rookie_qb': [
+        ('GamesPlayed', 'Coll_games', None),
+        ('CompletionPct', 'Coll_pass_cmp_pct', None),
+        ('PassAttPerGame', 'Coll_pass_att', 'Coll_games'),
+        ('PassYdsPerGame', 'Coll_pass_yds_per_g', None),
+        ('PassTDsPerGame', 'Coll_pass_td', 'Coll_games'),
+        ('PassIntPerGame', 'Coll_pass_int', 'Coll_games'),
+        ('RushYdsPerGame', 'Coll_rush_yds_per_g', None),
+        ('RushTDsPerGame', 'Coll_rush_td', 'Coll_games'),
+    ],
+    'rookie_rb_fb': [
+        ('GamesPlayed', 'Coll_games', None),
+        ('RushAttPerGame', 'Coll_rush_att', 'Coll_games'),
+        ('RushYdsPerGame', 'Coll_rush_yds_per_g', None),
+        ('RushTDsPerGame', 'Coll_rush_td', 'Coll_games'),
+        ('RecsPerGame', 'Coll_rec', 'Coll_games'),
+        ('RecYdsPerGame', 'Coll_rec_yds_per_g', None),
+        ('RecTDsPerGame', 'Coll_rec_td', 'Coll_games'),
+    ],
+    'rookie_te': [
+        ('GamesPlayed', 'Coll_games', None),
+        ('RecsPerGame', 'Coll_rec', 'Coll_games'),
+        ('RecYdsPerGame', 'Coll_rec_yds_per_g', None),
+        ('RecTDsPerGame', 'Coll_rec_td', 'Coll_games'),
+    ],
+    'rookie_wr': [
+        ('GamesPlayed', 'Coll_games', None),
+        ('RecsPerGame', 'Coll_rec', 'Coll_games'),
+        ('RecYdsPerGame', 'Coll_rec_yds_per_g', None),
+        ('RecTDsPerGame', 'Coll_rec_td', 'Coll_games'),
+    ],
+}
+
+
+def feature_block(df, position):
+    """
+    Compute every feature for a position in one NumPy pass.
+    Returns (feature names, float64 array of shape (rows, features)).
+
+    Each input column is read once into a float64 block, and all ratios
+    are divided together under a single mask that zeroes out missing
+    values and zero denominators.
+    """
+    spec = FEATURE_SPECS[position]
+    outputs = [output for output, _, _ in spec]
+
+    inputs = []
+    for _, numerator, denominator in spec:
+        for col in (numerator, denominator):
+            if col is not None and col not in inputs:
+                inputs.append(col)
+    block = df[inputs].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    # Pass-through features divide by a trailing column of ones
+    block = np.hstack([block, np.ones((len(block), 1))])
+    ones = block.shape[1] - 1
+    numerators = block[:, [inputs.index(n) for _, n, _ in spec]]
+    denominators = block[:, [ones if d is None else inputs.index(d) for _, _, d in spec]]
+
+    values = np.zeros_like(numerators)
+    valid = (denominators != 0) & np.isfinite(denominators) & np.isfinite(numerators)
+    np.divide(numerators, denominators, out=values, where=valid)
+    return outputs, values
+
+
+@traced()
+def compute_features(df, position):
+    """
+    Add the position's features to df in place.
+    """
+    outputs, values = feature_block(df, position)
+    df[outputs] = values
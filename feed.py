@@ -0,0 +1,135 @@
+import gzip
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+from projections import Position
+
+FEED_VERSION = 1
+DEFAULT_PAGE_SIZE = 200
+# Decimal places kept for float columns; the frontend shows two
+FLOAT_DECIMALS = 3
+
+
+def feed_dir(year: int, output_dir='frontend/vite-project/public') -> str:
+    return os.path.join(output_dir, f'{year}_feed')
+
+
+def compressors() -> dict:
+    # brotli is optional, gzip is always written
+    encoders = {'.gz': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+        encoders['.br'] = lambda data: brotli.compress(data, quality=11)
+    except ImportError:
+        pass
+    return encoders
+
+
+def column_type(series: pd.Series) -> str:
+    if pd.api.types.is_integer_dtype(series):
+        return 'int'
+    if pd.api.types.is_float_dtype(series):
+        return 'float'
+    return 'str'
+
+
+def encode_rows(df: pd.DataFrame) -> list:
+    """
+    One compact JSON array per row, in column order. Floats are rounded to
+    FLOAT_DECIMALS and missing values are null.
+    """
+    values = df.round(FLOAT_DECIMALS).astype(object)
+    values = values.where(df.notna(), None).to_numpy().tolist()
+    return [json.dumps(row, separators=(',', ':'), allow_nan=False) for row in values]
+
+
+def write_file(directory: str, name: str, text: str, encoders: dict) -> int:
+    # The plain file plus a pre-compressed copy per encoding, for static
+    # hosts that serve them directly (nginx gzip_static/brotli_static)
+    data = text.encode('utf-8')
+    with open(os.path.join(directory, name), 'wb') as f:
+        f.write(data)
+    for suffix, encode in encoders.items():
+        with open(os.path.join(directory, name + suffix), 'wb') as f:
+            f.write(encode(data))
+    return len(data)
+
+
+def write_feed(df: pd.DataFrame, directory: str, sort_by='VBD', page_size=DEFAULT_PAGE_SIZE) -> dict:
+    """
+    Write ranked projections as a paged feed the frontend can load a piece
+    at a time:
+
+        manifest.json       columns, types, row count and every file below
+        page-0000.ndjson    rows 0..page_size-1, best `sort_by` first, one
+                            JSON array per line
+        index-QB.json       the rows of each position, in the same order
+
+    Every file also gets pre-compressed copies (.gz, and .br if brotli is
+    installed). Any column works, so percentiles, per-format scores or
+    other seasons just add to the manifest. Returns the manifest.
+    """
+    df = df.sort_values(by=sort_by, ascending=False, kind='stable').reset_index(drop=True)
+    os.makedirs(directory, exist_ok=True)
+    # Pages from a longer previous feed would otherwise linger
+    for stale in glob.glob(os.path.join(glob.escape(directory), '*')):
+        if os.path.basename(stale).startswith(('page-', 'index-', 'manifest.json')):
+            os.remove(stale)
+
+    encoders = compressors()
+    rows = encode_rows(df)
+    pages = []
+    size = 0
+    for start in range(0, len(rows), page_size):
+        name = f'page-{len(pages):04d}.ndjson'
+        size += write_file(directory, name, '\n'.join(rows[start:start + page_size]) + '\n', encoders)
+        pages.append(name)
+
+    positions = {}
+    if 'Pos' in df:
+        pos_values = df['Pos'].to_numpy()
+        for pos in Position:
+            ids = np.flatnonzero(pos_values == pos.name)
+            if len(ids):
+                name = f'index-{pos.name}.json'
+                write_file(directory, name, json.dumps(ids.tolist(), separators=(',', ':')), encoders)
+                positions[pos.name] = name
+
+    manifest = {
+        'version': FEED_VERSION,
+        'rows': len(df),
+        'columns': list(df.columns),
+        'types': [column_type(df[column]) for column in df.columns],
+        'sort': sort_by,
+        'page_size': page_size,
+        'pages': pages,
+        'positions': positions,
+        'encodings': [suffix.lstrip('.') for suffix in encoders],
+        'bytes': size,
+    }
+    # Written last, so a reader never sees a manifest without its pages
+    write_file(directory, 'manifest.json', json.dumps(manifest, indent=1), encoders)
+    return manifest
+
+
+def read_feed(directory: str) -> pd.DataFrame:
+    """
+    The feed back as a frame, in feed order.
+    """
+    with open(os.path.join(directory, 'manifest.json')) as f:
+        manifest = json.load(f)
+    rows = []
+    for page in manifest['pages']:
+        with open(os.path.join(directory, page)) as f:
+            rows.extend(json.loads(line) for line in f if line.strip())
+    return pd.DataFrame(rows, columns=manifest['columns'])
+
+
+def save_feed(year: int, df, output_dir='frontend/vite-project/public', page_size=DEFAULT_PAGE_SIZE) -> str:
+    directory = feed_dir(year, output_dir)
+    manifest = write_feed(df, directory, page_size=page_size)
+
+    print(f"{year} projections feed has been created: {manifest['rows']} rows in {len(manifest['pages'])} pages.")
+    return directory
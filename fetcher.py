@@ -0,0 +1,183 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import http.client
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlparse
+from urllib.request import Request, urlopen
+import threading
+import time
+from instrument import count, span
+
+# Sports-Reference asks scrapers to stay well under 20 requests a minute.
+# The old scripts slept 10 seconds between college pages, so keep that as the
+# default pace for every host unless told otherwise.
+DEFAULT_RATE = 0.1
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+USER_AGENT = "fbml-scraper/1.0"
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() blocks until a token is available,
+    so `rate` is the sustained requests per second and `capacity` the burst.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self, seconds: float):
+        # Push the bucket into debt so every worker backs off together,
+        # e.g. after a 429 with a Retry-After header.
+        with self.lock:
+            self.tokens = min(self.tokens, 1) - seconds * self.rate
+
+
+class Fetcher:
+    """
+    Bounded thread pool for polite, concurrent page fetches.
+
+    Every request to a host first takes a token from that host's bucket, so
+    the per-host rate limit holds no matter how many workers are running.
+    Workers overlap their network waits and the parsing of earlier pages.
+    """
+
+    def __init__(self, max_workers=4, rate=DEFAULT_RATE, burst=1, host_rates=None,
+                 retries=3, backoff=5.0, timeout=30, opener=urlopen, cache=None):
+        self.max_workers = max_workers
+        self.rate = rate
+        self.burst = burst
+        self.host_rates = host_rates or {}
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.opener = opener
+        self.cache = cache
+        self.buckets = {}
+        self.buckets_lock = threading.Lock()
+        self.pool = None
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        with self.buckets_lock:
+            if host not in self.buckets:
+                rate = self.host_rates.get(host, self.rate)
+                self.buckets[host] = TokenBucket(rate, self.burst)
+            return self.buckets[host]
+
+    def fetch(self, url: str) -> bytes:
+        """
+        Fetch a URL and return the response body. Retries connection errors
+        and retryable HTTP statuses with exponential backoff.
+
+        With a cache, fresh cached pages are returned without touching the
+        network (or the rate limit) and stale ones are revalidated with a
+        conditional request.
+        """
+        with span('fetcher.fetch') as s:
+            body = self._fetch(url)
+            s.count('bytes', len(body))
+            return body
+
+    def _fetch(self, url: str) -> bytes:
+        headers = {"User-Agent": USER_AGENT}
+        cached_body = None
+        if self.cache is not None:
+            cached_body, entry = self.cache.lookup(url)
+            if cached_body is not None:
+                if self.cache.is_fresh(url, entry):
+                    count('cache_hits')
+                    return cached_body
+                headers.update(self.cache.conditional_headers(entry))
+
+        bucket = self.bucket_for(url)
+        request = Request(url, headers=headers)
+
+        for attempt in range(self.retries + 1):
+            with span('fetcher.rate_limit_wait'):
+                bucket.acquire()
+            try:
+                count('requests')
+                with self.opener(request, timeout=self.timeout) as response:
+                    body = response.read()
+                    if self.cache is not None:
+                        self.cache.store(url, body, response.headers)
+                    return body
+            except HTTPError as e:
+                if e.code == 304 and cached_body is not None:
+                    if not self.cache.revalidated(url):
+                        # Evicted while we asked: the next lookup misses and
+                        # the page is fetched without conditional headers
+                        return self._fetch(url)
+                    count('cache_revalidated')
+                    return cached_body
+                if e.code not in RETRYABLE_STATUS or attempt == self.retries:
+                    raise
+                delay = self.retry_delay(attempt, e.headers.get("Retry-After"))
+                print(f"HTTP {e.code} from {url}, retrying in {delay:.0f}s")
+                count('retries')
+                # The host is struggling, so slow down every worker hitting it
+                bucket.penalize(delay)
+            except (URLError, TimeoutError, ConnectionError, http.client.HTTPException) as e:
+                # Connection failures, and timeouts or resets while reading
+                # the body, which urlopen does not wrap in URLError
+                if attempt == self.retries:
+                    raise
+                delay = self.retry_delay(attempt)
+                print(f"Error fetching {url} ({getattr(e, 'reason', e)}), retrying in {delay:.0f}s")
+                count('retries')
+                time.sleep(delay)
+
+    def retry_delay(self, attempt: int, retry_after=None) -> float:
+        if retry_after is not None:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.backoff * (2 ** attempt)
+
+    def submit(self, fn, url):
+        """
+        Fetch a URL and call fn(url, body) on the shared worker pool.
+        Returns a Future. Every batch submitted to the same Fetcher shares one
+        bounded pool, so concurrent callers cannot multiply the worker count.
+        """
+        with self.buckets_lock:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self.pool.submit(lambda: fn(url, self.fetch(url)))
+
+    def map(self, fn, urls):
+        """
+        Fetch every URL and call fn(url, body) on a worker thread.
+        Yields (url, result) pairs in completion order. A URL whose fetch or
+        parse fails yields its exception as the result instead of raising, so
+        one bad page does not sink the whole batch.
+        """
+        futures = {self.submit(fn, url): url for url in urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                yield url, future.result()
+            except Exception as e:
+                yield url, e
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
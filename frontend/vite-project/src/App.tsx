@@ -1,12 +1,49 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useMemo, useRef } from 'react';
 import Papa from 'papaparse';
+import {
+	loadManifest,
+	loadPage,
+	loadPositionIndex,
+	toRecord,
+	type FeedManifest,
+} from './feed';
 import './App.css';
 
-// Define a type for our player data for type safety
+// The projection server started with `python fbml.py serve --year 2025`
+const API_URL: string =
+	import.meta.env.VITE_API_URL ?? 'http://127.0.0.1:8025';
+// Written by `python fbml.py project --year 2025 --feed`
+const FEED_URL = '/2025_feed';
+
+// Only the rows in view (plus OVERSCAN either side) are rendered, so every
+// row must be ROW_HEIGHT pixels tall (see .table-scroll in App.css)
+const ROW_HEIGHT = 48;
+const OVERSCAN = 10;
+const POSITIONS = ['QB', 'RB', 'WR', 'TE'];
+
+// Define a type for our player data for type safety. Feed rows carry
+// whatever extra columns the projections have.
 interface Player {
+	Id?: number;
 	Player: string;
+	Pos?: string;
 	Projected_Pts: number;
 	VBD: number;
+	[column: string]: string | number | null | undefined;
+}
+
+// One /draft/events message. players is [name, pos, model, points] by id and
+// is only sent when the pool of players changes.
+interface DraftState {
+	version: number;
+	pool: number;
+	baselines: Record<string, number>;
+	picks: number[];
+	players?: [string, string, string, number][];
+}
+
+function label(column: string) {
+	return column.replace(/_/g, ' ');
 }
 
 function App() {
@@ -15,35 +52,229 @@ function App() {
 	const [draftedPlayers, setDraftedPlayers] = useState(
 		() => new Set<string>()
 	);
+	// Set while connected to the server's live draft
+	const [pool, setPool] = useState<Player[] | null>(null);
+	const [draft, setDraft] = useState<DraftState | null>(null);
+	// Set when reading the paged feed. feedRows fills in as pages load.
+	const [manifest, setManifest] = useState<FeedManifest | null>(null);
+	const [feedRows, setFeedRows] = useState<(Player | undefined)[]>([]);
+	const [positionIndex, setPositionIndex] = useState<
+		Record<string, number[]>
+	>({});
+	const requestedPages = useRef(new Set<number>());
+
+	const [posFilter, setPosFilter] = useState('');
+	const [scrollTop, setScrollTop] = useState(0);
+	const [viewHeight, setViewHeight] = useState(600);
+	const scroller = useRef<HTMLDivElement>(null);
 
 	useEffect(() => {
-		const csvFilePath = '/2025_projections.csv';
-
-		Papa.parse<Player>(csvFilePath, {
-			download: true,
-			header: true,
-			dynamicTyping: true,
-			complete: (results) => {
-				// Filter out any rows that might be empty or don't have a player name
-				const validPlayers = results.data.filter(
-					(p) => p.Player && p.VBD !== null
+		const loadCsv = () => {
+			const csvFilePath = '/2025_projections.csv';
+
+			Papa.parse<Player>(csvFilePath, {
+				download: true,
+				header: true,
+				dynamicTyping: true,
+				complete: (results) => {
+					// Filter out any rows that might be empty or don't have a player name
+					const validPlayers = results.data.filter(
+						(p) => p.Player && p.VBD !== null
+					);
+					setPlayers(validPlayers);
+				},
+				error: (err) => {
+					setError('Failed to load or parse the CSV file.');
+					console.error('PapaParse Error:', err);
+				},
+			});
+		};
+
+		// Prefer the feed: only the manifest and the pages in view are
+		// downloaded and parsed. Older builds only have the CSV.
+		const loadStatic = () => {
+			loadManifest(FEED_URL)
+				.then((feed) => {
+					setFeedRows(new Array(feed.rows));
+					setManifest(feed);
+				})
+				.catch(loadCsv);
+		};
+
+		// Follow the live draft if the server is up, otherwise fall back to
+		// the static projections
+		let connected = false;
+		const events = new EventSource(`${API_URL}/draft/events`);
+		events.addEventListener('draft', (event) => {
+			connected = true;
+			const state: DraftState = JSON.parse(event.data);
+			if (state.players) {
+				setPool(
+					state.players.map(([name, pos, , points], id) => ({
+						Id: id,
+						Player: name,
+						Pos: pos,
+						Projected_Pts: points,
+						VBD: 0,
+					}))
 				);
-				setPlayers(validPlayers);
-			},
-			error: (err) => {
-				setError('Failed to load or parse the CSV file.');
-				console.error('PapaParse Error:', err);
-			},
+			}
+			setDraft(state);
 		});
+		events.onerror = () => {
+			if (!connected) {
+				events.close();
+				loadStatic();
+			}
+		};
+		return () => events.close();
 	}, []); // Empty dependency array ensures this runs only once
 
-	const handleRowClick = (playerName: string) => {
+	useEffect(() => {
+		const element = scroller.current;
+		if (!element) {
+			return;
+		}
+		const observer = new ResizeObserver(() =>
+			setViewHeight(element.clientHeight)
+		);
+		observer.observe(element);
+		return () => observer.disconnect();
+	}, []);
+
+	// Re-rank the pool against the current baselines after every pick
+	const board = useMemo(() => {
+		if (!pool || !draft) {
+			return players;
+		}
+		return pool
+			.map((p) => ({
+				...p,
+				VBD: p.Projected_Pts - draft.baselines[p.Pos ?? ''],
+			}))
+			.sort((a, b) => b.VBD - a.VBD);
+	}, [players, pool, draft]);
+
+	const live = pool !== null && draft !== null;
+	const fromFeed = !live && manifest !== null;
+	const picks = useMemo(() => new Set(draft?.picks), [draft]);
+
+	const isDrafted = (player: Player) =>
+		live ? picks.has(player.Id ?? -1) : draftedPlayers.has(player.Player);
+
+	// The rows being shown. From the feed they are row numbers into
+	// feedRows, which may not have loaded yet.
+	const feedIds = useMemo(() => {
+		if (!fromFeed || !manifest) {
+			return null;
+		}
+		if (posFilter) {
+			return positionIndex[posFilter] ?? [];
+		}
+		return Array.from({ length: manifest.rows }, (_, i) => i);
+	}, [fromFeed, manifest, posFilter, positionIndex]);
+
+	const list = useMemo(
+		() =>
+			posFilter && !fromFeed
+				? board.filter((p) => p.Pos === posFilter)
+				: board,
+		[board, posFilter, fromFeed]
+	);
+	const rowCount = feedIds ? feedIds.length : list.length;
+	const rowAt = (i: number) => (feedIds ? feedRows[feedIds[i]] : list[i]);
+
+	// In a live draft, drafted players keep their place but not a rank
+	const ranks = useMemo(() => {
+		if (!live) {
+			return null;
+		}
+		let rank = 0;
+		return list.map((p) => (picks.has(p.Id ?? -1) ? 0 : ++rank));
+	}, [live, list, picks]);
+
+	const start = Math.max(0, Math.floor(scrollTop / ROW_HEIGHT) - OVERSCAN);
+	const end = Math.min(
+		rowCount,
+		Math.ceil((scrollTop + viewHeight) / ROW_HEIGHT) + OVERSCAN
+	);
+
+	// Fetch the position's index the first time it is filtered on
+	useEffect(() => {
+		if (!fromFeed || !manifest || !posFilter || positionIndex[posFilter]) {
+			return;
+		}
+		loadPositionIndex(FEED_URL, manifest, posFilter)
+			.then((ids) =>
+				setPositionIndex((prev) => ({ ...prev, [posFilter]: ids }))
+			)
+			.catch((err) => console.error('Feed Error:', err));
+	}, [fromFeed, manifest, posFilter, positionIndex]);
+
+	// Fetch the pages behind the rows in view, plus the next one
+	useEffect(() => {
+		if (!manifest || !feedIds || end <= start) {
+			return;
+		}
+		const pages = new Set<number>();
+		for (let i = start; i < end; i++) {
+			pages.add(Math.floor(feedIds[i] / manifest.page_size));
+		}
+		const last = Math.floor(feedIds[end - 1] / manifest.page_size);
+		if (last + 1 < manifest.pages.length) {
+			pages.add(last + 1);
+		}
+		for (const page of pages) {
+			if (requestedPages.current.has(page)) {
+				continue;
+			}
+			requestedPages.current.add(page);
+			loadPage(FEED_URL, manifest, page)
+				.then((rows) =>
+					setFeedRows((prev) => {
+						const next = prev.slice();
+						rows.forEach((values, i) => {
+							next[page * manifest.page_size + i] = toRecord<Player>(
+								manifest,
+								values
+							);
+						});
+						return next;
+					})
+				)
+				.catch((err) => {
+					requestedPages.current.delete(page);
+					console.error('Feed Error:', err);
+				});
+		}
+	}, [manifest, feedIds, start, end]);
+
+	// Every numeric column the feed has, or the CSV's two
+	const columns = useMemo(() => {
+		if (!fromFeed || !manifest) {
+			return ['Projected_Pts', 'VBD'];
+		}
+		return manifest.columns.filter(
+			(column, i) => manifest.types[i] !== 'str' && column !== 'Id'
+		);
+	}, [fromFeed, manifest]);
+
+	const handleRowClick = (player: Player) => {
+		if (live) {
+			const action = picks.has(player.Id ?? -1) ? 'undo' : 'pick';
+			fetch(`${API_URL}/draft/${action}`, {
+				method: 'POST',
+				headers: { 'Content-Type': 'application/json' },
+				body: JSON.stringify({ id: player.Id }),
+			}).catch((err) => console.error('Draft Error:', err));
+			return;
+		}
 		setDraftedPlayers((prevDrafted) => {
 			const newDrafted = new Set(prevDrafted);
-			if (newDrafted.has(playerName)) {
-				newDrafted.delete(playerName);
+			if (newDrafted.has(player.Player)) {
+				newDrafted.delete(player.Player);
 			} else {
-				newDrafted.add(playerName);
+				newDrafted.add(player.Player);
 			}
 			return newDrafted;
 		});
@@ -52,37 +283,107 @@ function App() {
 		return <div className="error">{error}</div>;
 	}
 
+	const rows = [];
+	for (let index = start; index < end; index++) {
+		const player = rowAt(index);
+		const stripe = index % 2 ? 'odd' : '';
+		if (!player) {
+			rows.push(
+				<tr key={`loading-${index}`} className={`loading ${stripe}`}>
+					<td>{index + 1}</td>
+					<td colSpan={columns.length + 1}>Loading…</td>
+				</tr>
+			);
+			continue;
+		}
+		const drafted = isDrafted(player);
+		rows.push(
+			<tr
+				key={player.Id ?? `${player.Player}-${player.Model ?? index}`}
+				className={`${drafted ? 'drafted' : ''} ${stripe}`}
+				onClick={() => handleRowClick(player)}
+			>
+				<td>{ranks ? ranks[index] || '' : index + 1}</td>
+				<td>
+					{player.Player}
+					{player.Pos && (
+						<span className="pos">
+							{' '}
+							{player.Pos}
+						</span>
+					)}
+				</td>
+				{columns.map((column) => {
+					const value = player[column];
+					return (
+						<td key={column} className="num">
+							{typeof value === 'number' ? value.toFixed(2) : ''}
+						</td>
+					);
+				})}
+			</tr>
+		);
+	}
+
 	return (
 		<div className="App">
 			<h1>Fantasy Football Projections 2025</h1>
-			<table>
-				<thead>
-					<tr>
-						<th>Rank</th>
-						<th>Player</th>
-						<th>Projected Pts</th>
-						<th>VBD</th>
-					</tr>
-				</thead>
-				<tbody>
-					{players.map((player, index) => (
-						<tr
-							key={player.Player || index}
-							className={
-								draftedPlayers.has(player.Player)
-									? 'drafted'
-									: ''
-							}
-							onClick={() => handleRowClick(player.Player)}
-						>
-							<td>{index + 1}</td>
-							<td>{player.Player}</td>
-							<td>{player.Projected_Pts?.toFixed(2)}</td>
-							<td>{player.VBD?.toFixed(2)}</td>
+			{live && (
+				<p className="draft-status">
+					Live draft: {draft.picks.length} picks. Baselines{' '}
+					{Object.entries(draft.baselines)
+						.map(([pos, pts]) => `${pos} ${pts.toFixed(1)}`)
+						.join(', ')}
+				</p>
+			)}
+			<div className="pos-filter">
+				{['', ...POSITIONS].map((pos) => (
+					<button
+						key={pos || 'all'}
+						className={pos === posFilter ? 'active' : ''}
+						onClick={() => {
+							setPosFilter(pos);
+							scroller.current?.scrollTo({ top: 0 });
+						}}
+					>
+						{pos || 'All'}
+					</button>
+				))}
+			</div>
+			<div
+				className="table-scroll"
+				ref={scroller}
+				onScroll={(event) => setScrollTop(event.currentTarget.scrollTop)}
+			>
+				<table>
+					<thead>
+						<tr>
+							<th>Rank</th>
+							<th>Player</th>
+							{columns.map((column) => (
+								<th key={column} className="num">
+									{label(column)}
+								</th>
+							))}
 						</tr>
-					))}
-				</tbody>
-			</table>
+					</thead>
+					<tbody>
+						{start > 0 && (
+							<tr
+								className="spacer"
+								style={{ height: start * ROW_HEIGHT }}
+							/>
+						)}
+						{rows}
+						{end < rowCount && (
+							<tr
+								className="spacer"
+								style={{ height: (rowCount - end) * ROW_HEIGHT }}
+							/>
+						)}
+					</tbody>
+				</table>
+			</div>
 		</div>
 	);
 }
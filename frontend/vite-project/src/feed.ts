@@ -0,0 +1,66 @@
+// Loader for the paged projections feed written by
+// `python fbml.py project --year 2025 --feed` (see feed.py)
+
+export type FeedValue = string | number | null;
+
+export interface FeedManifest {
+	version: number;
+	rows: number;
+	columns: string[];
+	types: ('str' | 'int' | 'float')[];
+	sort: string;
+	page_size: number;
+	pages: string[];
+	positions: Record<string, string>;
+}
+
+export async function loadManifest(base: string): Promise<FeedManifest> {
+	const response = await fetch(`${base}/manifest.json`);
+	// Vite answers unknown paths with index.html, so check the type too
+	if (
+		!response.ok ||
+		!response.headers.get('Content-Type')?.includes('json')
+	) {
+		throw new Error(`No projections feed at ${base}`);
+	}
+	return response.json();
+}
+
+// One page of rows, each an array of values in manifest column order
+export async function loadPage(
+	base: string,
+	manifest: FeedManifest,
+	page: number
+): Promise<FeedValue[][]> {
+	const response = await fetch(`${base}/${manifest.pages[page]}`);
+	if (!response.ok) {
+		throw new Error(`Failed to load ${manifest.pages[page]}`);
+	}
+	const text = await response.text();
+	return text
+		.split('\n')
+		.filter((line) => line)
+		.map((line) => JSON.parse(line));
+}
+
+// Feed row numbers of one position's players, best first
+export async function loadPositionIndex(
+	base: string,
+	manifest: FeedManifest,
+	pos: string
+): Promise<number[]> {
+	const response = await fetch(`${base}/${manifest.positions[pos]}`);
+	if (!response.ok) {
+		throw new Error(`Failed to load the ${pos} index`);
+	}
+	return response.json();
+}
+
+// A row as an object keyed by column name
+export function toRecord<T>(manifest: FeedManifest, values: FeedValue[]): T {
+	const record: Record<string, FeedValue> = {};
+	manifest.columns.forEach((column, i) => {
+		record[column] = values[i];
+	});
+	return record as T;
+}
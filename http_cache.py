@@ -0,0 +1,201 @@
+from datetime import date
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+CACHE_DIR = os.path.join('cache', 'http')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# index.json is rewritten after this many stores, and at exit
+SAVE_EVERY = 50
+
+# How long a page may be served without asking the server again.
+# None means the page never expires.
+CURRENT_SEASON_TTL = 6 * 60 * 60
+UNDATED_TTL = 30 * 24 * 60 * 60
+
+SEASON_RE = re.compile(r'/years/(\d{4})/')
+
+
+def current_season(today=None) -> int:
+    # A season is only final once the playoffs are over, so until March we
+    # are still in last year's season.
+    today = today or date.today()
+    return today.year if today.month >= 3 else today.year - 1
+
+
+def ttl_for_url(url: str, season=None):
+    """
+    Pages for closed seasons never change, so they never expire. Pages for the
+    current season (or later) expire quickly and get revalidated, and pages
+    without a season in the URL (e.g. college career pages) expire slowly.
+    """
+    match = SEASON_RE.search(url)
+    if not match:
+        return UNDATED_TTL
+    if int(match.group(1)) < (season or current_season()):
+        return None
+    return CURRENT_SEASON_TTL
+
+
+class HttpCache:
+    """
+    On-disk HTTP response cache.
+
+    Bodies are stored gzipped under the SHA-256 of their content, so identical
+    pages share one blob. index.json maps each URL to its blob plus the
+    validators (ETag / Last-Modified) needed to revalidate it. Once the blobs
+    exceed max_bytes the least recently used URLs are evicted.
+
+    The index is written every save_every stores and at exit, rather than
+    after each page; call save() to write it sooner.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, season=None, save_every=SAVE_EVERY):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.season = season
+        self.save_every = save_every
+        self.lock = threading.Lock()
+        self.index_path = os.path.join(root, 'index.json')
+        os.makedirs(os.path.join(root, 'blobs'), exist_ok=True)
+
+        self.entries = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.entries = json.load(f)
+        # How many URLs point at each blob, and the size of all blobs
+        self.refs = {}
+        self.total_bytes = 0
+        for entry in self.entries.values():
+            self._add_ref(entry)
+        self.dirty = False
+        self.unsaved = 0
+        atexit.register(self.save)
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, 'blobs', digest[:2], digest + '.gz')
+
+    def _add_ref(self, entry):
+        count = self.refs.get(entry['digest'], 0)
+        if not count:
+            self.total_bytes += entry['size']
+        self.refs[entry['digest']] = count + 1
+
+    def _remove(self, url: str) -> bool:
+        """
+        Drop a URL's entry. True if nothing points at its blob any more.
+        """
+        entry = self.entries.pop(url)
+        digest = entry['digest']
+        self.refs[digest] -= 1
+        if self.refs[digest]:
+            return False
+        del self.refs[digest]
+        self.total_bytes -= entry['size']
+        return True
+
+    def lookup(self, url: str):
+        """
+        Return (body, entry) for a cached URL, or (None, None) on a miss.
+        """
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return None, None
+            path = self.blob_path(entry['digest'])
+            if not os.path.exists(path):
+                self._remove(url)
+                self.dirty = True
+                return None, None
+            entry['accessed'] = time.time()
+            self.dirty = True
+
+        with gzip.open(path, 'rb') as f:
+            return f.read(), entry
+
+    def is_fresh(self, url: str, entry) -> bool:
+        ttl = ttl_for_url(url, self.season)
+        return ttl is None or time.time() - entry['fetched'] < ttl
+
+    def conditional_headers(self, entry) -> dict:
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def revalidated(self, url: str) -> bool:
+        """
+        Server answered 304 Not Modified, so the cached copy is good again.
+        False if the entry was evicted since it was looked up, in which case
+        the page has to be fetched again in full.
+        """
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return False
+            entry['fetched'] = entry['accessed'] = time.time()
+            self.dirty = True
+            return True
+
+    def store(self, url: str, body: bytes, headers):
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(gzip.compress(body))
+            os.replace(tmp, path)
+
+        now = time.time()
+        with self.lock:
+            if url in self.entries:
+                self._remove(url)
+            self.entries[url] = entry = {
+                'digest': digest,
+                'size': os.path.getsize(path),
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'fetched': now,
+                'accessed': now,
+            }
+            self._add_ref(entry)
+            self.dirty = True
+            self.evict()
+            self.unsaved += 1
+            due = self.unsaved >= self.save_every
+        if due:
+            self.save()
+
+    def evict(self):
+        # Caller holds the lock. Blobs can be shared by several URLs, so a
+        # blob's size only comes off the total once nothing points at it.
+        if self.total_bytes <= self.max_bytes:
+            return
+
+        for url, entry in sorted(self.entries.items(), key=lambda item: item[1]['accessed']):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if self._remove(url):
+                try:
+                    os.remove(self.blob_path(entry['digest']))
+                except FileNotFoundError:
+                    pass
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            tmp = f'{self.index_path}.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp, self.index_path)
+            self.dirty = False
+            self.unsaved = 0
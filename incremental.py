@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import time
+import numpy as np
+from features import FEATURE_SPECS, feature_block
+from player_ids import INDEX_FILE, KEY_COLUMN
+from projections import MODELS, model_path, load_model
+from train import TARGETS, sample_frame, sample_years, stack, init_worker, load_training_data, fit, save_package
+
+STATS_DIR = os.path.join('cache', 'train_stats')
+
+
+class SufficientStats:
+    """
+    Row count, column means and centered scatter matrix of the rows [X, y].
+
+    That is everything a StandardScaler + linear/ridge fit needs: X^T X,
+    X^T y, means and variances all follow from it. Stats of disjoint row
+    sets merge exactly (Chan et al.'s pairwise update), so a new season
+    costs O(new rows) no matter how much history came before it.
+    """
+
+    def __init__(self, n, mean, scatter):
+        self.n = int(n)
+        self.mean = mean
+        self.scatter = scatter
+
+    @classmethod
+    def from_rows(cls, X, y):
+        Z = np.column_stack([X, y])
+        mean = Z.mean(axis=0)
+        centered = Z - mean
+        return cls(len(Z), mean, centered.T @ centered)
+
+    def merge(self, other):
+        if self.n == 0:
+            return other
+        if other.n == 0:
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        mean = self.mean + delta * (other.n / n)
+        scatter = self.scatter + other.scatter + np.outer(delta, delta) * (self.n * other.n / n)
+        return SufficientStats(n, mean, scatter)
+
+    def fit(self, index, alpha=0.0):
+        """
+        Solve for the features at column positions `index`, standardized
+        like StandardScaler. alpha=0 is ordinary least squares, otherwise
+        ridge. Returns (mean, var, scale, coef, intercept), with coef and
+        intercept on the scaled features.
+        """
+        mean = self.mean[index]
+        var = np.diag(self.scatter)[index] / self.n
+        # StandardScaler leaves constant features unscaled
+        scale = np.where(var > 0, np.sqrt(var), 1.0)
+
+        xx = self.scatter[np.ix_(index, index)] / np.outer(scale, scale)
+        xy = self.scatter[index, -1] / scale
+        if alpha:
+            coef = np.linalg.solve(xx + alpha * np.eye(len(index)), xy)
+        else:
+            coef = np.linalg.lstsq(xx, xy, rcond=None)[0]
+        return mean, var, scale, coef, self.mean[-1]
+
+
+# --- Per-season stats on disk ---
+
+def stats_path(name: str, stats_dir=STATS_DIR) -> str:
+    return os.path.join(stats_dir, f'{name}.npz')
+
+
+def sample_inputs(name: str, year: int) -> list:
+    # The files sample_frame reads for this season, plus the player id index
+    # its seasons are joined through, when there is one
+    _, pos, _ = MODELS[name]
+    if TARGETS[name] == 'rookie_season':
+        files = [f'{year}rookiestats_{pos}.csv', f'{year}playerstats_{pos}.csv']
+    else:
+        files = [f'{year}playerstats_{pos}.csv', f'{year + 1}playerstats_{pos}.csv']
+    paths = [os.path.join('data', f) for f in files]
+    return paths + [INDEX_FILE] if os.path.exists(INDEX_FILE) else paths
+
+
+def sample_fingerprint(name: str, year: int) -> str:
+    digest = hashlib.sha256(json.dumps([FEATURE_SPECS[name], TARGETS[name], KEY_COLUMN]).encode())
+    for path in sample_inputs(name, year):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def load_stats(name: str, stats_dir=STATS_DIR) -> dict:
+    """
+    {year: (fingerprint, SufficientStats)} saved by a previous run.
+    """
+    path = stats_path(name, stats_dir)
+    if not os.path.exists(path):
+        return {}
+    stats = {}
+    with np.load(path) as f:
+        for year in f['years']:
+            stats[int(year)] = (str(f[f'{year}_fingerprint']), SufficientStats(
+                f[f'{year}_n'], f[f'{year}_mean'], f[f'{year}_scatter']))
+    return stats
+
+
+def save_stats(name: str, stats: dict, stats_dir=STATS_DIR):
+    arrays = {'years': np.array(sorted(stats), dtype=np.int64)}
+    for year, (fingerprint, s) in stats.items():
+        arrays[f'{year}_fingerprint'] = np.array(fingerprint)
+        arrays[f'{year}_n'] = np.array(s.n)
+        arrays[f'{year}_mean'] = s.mean
+        arrays[f'{year}_scatter'] = s.scatter
+    os.makedirs(stats_dir, exist_ok=True)
+    tmp = stats_path(name, stats_dir) + '.tmp.npz'
+    np.savez(tmp, **arrays)
+    os.replace(tmp, stats_path(name, stats_dir))
+
+
+def update_stats(name: str, years, stats_dir=STATS_DIR) -> tuple:
+    """
+    Bring a model's per-season stats up to date. Only seasons that are new,
+    or whose input files changed, are read and reduced.
+    Returns (stats, list of seasons recomputed).
+    """
+    stats = load_stats(name, stats_dir)
+    frames = {}
+    updated = []
+    for year in sample_years(name, years):
+        fingerprint = sample_fingerprint(name, year)
+        if year in stats and stats[year][0] == fingerprint:
+            continue
+        df = sample_frame(name, year, frames)
+        _, X = feature_block(df, name)
+        y = df['Target'].to_numpy(dtype=np.float64)
+        keep = np.isfinite(y)
+        stats[year] = (fingerprint, SufficientStats.from_rows(X[keep], y[keep]))
+        updated.append(year)
+    if updated:
+        save_stats(name, stats, stats_dir)
+    return stats, updated
+
+
+# --- Retraining ---
+
+def parse_estimator(spec: str) -> float:
+    # Only estimators with a closed form over the stats can be updated
+    kind, _, param = spec.partition(':')
+    if kind == 'linear':
+        return 0.0
+    if kind == 'ridge':
+        return float(param or 1.0)
+    raise ValueError(f"Incremental retraining supports 'linear' and 'ridge:<alpha>', not '{spec}'")
+
+
+def build_package(features, n, solution, alpha=0.0) -> dict:
+    """
+    A joblib model package equivalent to fitting StandardScaler + the
+    estimator on the rows the stats came from.
+    """
+    from sklearn.linear_model import LinearRegression, Ridge
+    from sklearn.preprocessing import StandardScaler
+
+    mean, var, scale, coef, intercept = solution
+    scaler = StandardScaler()
+    scaler.mean_, scaler.var_, scaler.scale_ = mean, var, scale
+    scaler.n_samples_seen_ = n
+    scaler.n_features_in_ = len(features)
+    scaler.feature_names_in_ = np.array(features, dtype=object)
+
+    model = Ridge(alpha=alpha) if alpha else LinearRegression()
+    model.coef_, model.intercept_ = coef, float(intercept)
+    model.n_features_in_ = len(features)
+    return {'model': model, 'scaler': scaler, 'features': list(features)}
+
+
+def model_features(name: str, models_dir='models') -> list:
+    try:
+        return load_model(model_path(name, models_dir)).features
+    except FileNotFoundError:
+        return [output for output, _, _ in FEATURE_SPECS[name]]
+
+
+def full_refit_difference(name, years, train_years, features, estimator, package) -> float:
+    """
+    Refit from every raw row with sklearn and return the largest absolute
+    difference between its predictions and the package's on those rows.
+    """
+    init_worker(load_training_data([name], years))
+    X, y = stack(name, train_years, features)
+    scaler, model = fit(estimator, X, y)
+    expected = model.predict(scaler.transform(X))
+    actual = package['model'].predict((X - package['scaler'].mean_) / package['scaler'].scale_)
+    return float(np.max(np.abs(expected - actual)))
+
+
+def retrain(names=MODELS, years=range(2020, 2025), estimator='linear', window=None, check=False,
+            save=True, models_dir='models', stats_dir=STATS_DIR):
+    """
+    Retrain each model on its seasons' merged sufficient statistics, using
+    its current features. window limits training to the most recent seasons.
+    """
+    alpha = parse_estimator(estimator)
+    years = sorted(years)
+    spec_columns = {name: [output for output, _, _ in FEATURE_SPECS[name]] for name in names}
+
+    for name in names:
+        start = time.perf_counter()
+        stats, updated = update_stats(name, years, stats_dir)
+        train_years = sample_years(name, years)
+        if window:
+            train_years = train_years[-window:]
+        if not train_years:
+            print(f"Skipping {name}, no seasons to train on")
+            continue
+
+        merged = SufficientStats(0, None, None)
+        for year in train_years:
+            merged = merged.merge(stats[year][1])
+
+        features = model_features(name, models_dir)
+        index = [spec_columns[name].index(f) for f in features]
+        solution = merged.fit(index, alpha)
+        elapsed = time.perf_counter() - start
+        package = build_package(features, merged.n, solution, alpha)
+
+        print(f"{name}: {merged.n} rows from {train_years}, recomputed {updated or 'no'} seasons "
+              f"in {elapsed * 1000:.1f} ms")
+        if check:
+            difference = full_refit_difference(name, years, train_years, features, estimator, package)
+            print(f"    max difference from a full refit: {difference:.3g}")
+        if save:
+            print(f"    saved to '{save_package(name, package, models_dir)}'")
@@ -0,0 +1,295 @@
+from functools import wraps
+import atexit
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import pandas as pd
+
+# Set to a file path to trace any script, e.g.
+#   FBML_TRACE=trace.json python preprocess_data.py 2024
+# Processes started by a traced process (worker pools) inherit it and send
+# their spans back to it through part files next to the trace.
+TRACE_ENV = 'FBML_TRACE'
+TRACE_PID_ENV = 'FBML_TRACE_PID'
+
+# ru_maxrss is in kilobytes on Linux and bytes on macOS
+RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+def peak_rss_mb():
+    # resource is Unix-only, and only imported once a span ends, so
+    # importing this module works everywhere. Elsewhere there is no peak.
+    try:
+        import resource
+    except ImportError:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT / 2 ** 20, 1)
+
+
+class Span:
+    """
+    One timed stage. count() adds to its counters (rows, bytes, cache
+    hits, ...), which end up in the trace event's args.
+    """
+
+    __slots__ = ('name', 'start', 'counters')
+
+    def __init__(self, name: str, counters: dict):
+        self.name = name
+        self.start = time.perf_counter_ns()
+        self.counters = counters
+
+    def count(self, counter: str, value=1):
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+
+class _NoSpan:
+    # What span() returns while tracing is off: enter, count and exit do nothing
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, counter: str, value=1):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class _OpenSpan:
+    __slots__ = ('tracer', 'name', 'args', 'span')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self) -> Span:
+        self.span = self.tracer.begin(self.name, self.args)
+        return self.span
+
+    def __exit__(self, *exc):
+        self.tracer.end(self.span)
+        return False
+
+
+class Tracer:
+    """
+    Collects finished spans as Chrome trace 'complete' events, viewable in
+    chrome://tracing or https://ui.perfetto.dev.
+
+    Every event records wall time, its counters and the process's peak RSS
+    so far. Spans nest per thread. In a worker process each top-level span
+    is appended to a part file, which the owning process merges on save.
+    """
+
+    def __init__(self, path=None, owner_pid=None):
+        self.path = path
+        self.owner_pid = owner_pid or os.getpid()
+        self.events = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def stack(self) -> list:
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def begin(self, name: str, args: dict) -> Span:
+        span = Span(name, dict(args))
+        self.stack().append(span)
+        return span
+
+    def end(self, span: Span):
+        end = time.perf_counter_ns()
+        stack = self.stack()
+        stack.pop()
+        event = {
+            'name': span.name,
+            'cat': span.name.split('.')[0],
+            'ph': 'X',
+            'ts': span.start / 1000,
+            'dur': (end - span.start) / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': dict(span.counters, peak_rss_mb=peak_rss_mb()),
+        }
+        with self.lock:
+            self.events.append(event)
+        if not stack and os.getpid() != self.owner_pid and self.path:
+            self.flush_part()
+
+    def flush_part(self):
+        # Worker processes exit without running atexit, so write as we go
+        with self.lock:
+            events, self.events = self.events, []
+        with open(f'{self.path}.{os.getpid()}.part', 'a') as f:
+            for event in events:
+                f.write(json.dumps(event) + '\n')
+
+    def collect_parts(self):
+        if not self.path:
+            return
+        for part in glob.glob(f'{glob.escape(self.path)}.*.part'):
+            with open(part) as f:
+                self.events.extend(json.loads(line) for line in f if line.strip())
+            os.remove(part)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Calls, total and mean wall time, summed counters and peak RSS per
+        span name, slowest first. Nested spans are counted in their parents
+        too.
+        """
+        if not self.events:
+            return pd.DataFrame()
+        rows = [dict(e['args'], Stage=e['name'], Seconds=e['dur'] / 1e6) for e in self.events]
+        df = pd.DataFrame(rows)
+        counters = [c for c in df.columns if c not in ('Stage', 'Seconds', 'peak_rss_mb')]
+        summary = df.groupby('Stage').agg(
+            Calls=('Seconds', 'size'),
+            Seconds=('Seconds', 'sum'),
+            **{c: (c, lambda values: values.sum(min_count=1)) for c in counters},
+            Peak_RSS_MB=('peak_rss_mb', 'max'),
+        )
+        summary.insert(2, 'Mean_ms', summary['Seconds'] / summary['Calls'] * 1000)
+        summary[counters] = summary[counters].round().astype('Int64')
+        return summary.sort_values(by='Seconds', ascending=False)
+
+    def save(self, path=None) -> str:
+        path = path or self.path
+        self.collect_parts()
+        trace = {
+            'traceEvents': sorted(self.events, key=lambda e: e['ts']),
+            'displayTimeUnit': 'ms',
+            'otherData': {'argv': sys.argv},
+        }
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(trace, f)
+        os.replace(tmp, path)
+        return path
+
+
+_tracer = None
+
+
+def enable(path=None, report=True) -> Tracer:
+    """
+    Start tracing this process and any it starts. With a path, the trace is
+    written there at exit, and with report a summary table is printed.
+    """
+    global _tracer
+    _tracer = Tracer(path)
+    if path:
+        path = os.path.abspath(path)
+        _tracer.path = path
+        os.environ[TRACE_ENV] = path
+        os.environ[TRACE_PID_ENV] = str(os.getpid())
+        atexit.register(finish, report)
+    return _tracer
+
+
+def disable():
+    global _tracer
+    _tracer = None
+    os.environ.pop(TRACE_ENV, None)
+    os.environ.pop(TRACE_PID_ENV, None)
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def finish(report=True):
+    tracer = _tracer
+    if tracer is None or os.getpid() != tracer.owner_pid:
+        return
+    path = tracer.save()
+    if report:
+        with pd.option_context('display.width', 200, 'display.max_columns', 20, 'display.float_format', '{:.3f}'.format):
+            print(tracer.summary().to_string())
+    print(f"Trace written to '{path}'")
+
+
+def span(name: str, **args):
+    """
+    Context manager timing a stage: `with span('load') as s: s.count('rows', n)`.
+    A shared no-op while tracing is off.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return NO_SPAN
+    return _OpenSpan(tracer, name, args)
+
+
+def count(counter: str, value=1):
+    """
+    Add to a counter on the innermost open span of this thread, e.g. bytes
+    fetched deep inside a stage that does not know it is being traced.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return
+    stack = tracer.stack()
+    if stack:
+        stack[-1].count(counter, value)
+
+
+def row_count(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if isinstance(value, dict) and value and all(isinstance(v, pd.DataFrame) for v in value.values()):
+        return sum(len(v) for v in value.values())
+    return None
+
+
+def traced(name=None):
+    """
+    Decorator putting a function's calls in a span named after it. Rows
+    processed are recorded from the returned frame (or dict of frames),
+    or failing that from the first frame argument.
+    """
+    def decorate(fn):
+        label = name or f'{fn.__module__}.{fn.__qualname__}'
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with _OpenSpan(tracer, label, {}) as s:
+                result = fn(*args, **kwargs)
+                rows = row_count(result)
+                if rows is None:
+                    rows = next((row_count(a) for a in args if row_count(a) is not None), None)
+                if rows is not None:
+                    s.count('rows', rows)
+                return result
+        return wrapper
+    return decorate
+
+
+def _after_fork():
+    # A forked worker starts with its parent's events, which are not its own
+    if _tracer is not None:
+        _tracer.events = []
+        _tracer.lock = threading.Lock()
+        _tracer.local = threading.local()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+if os.environ.get(TRACE_ENV):
+    # Either a worker of a traced process, or a script run with FBML_TRACE set
+    if os.environ.get(TRACE_PID_ENV):
+        _tracer = Tracer(os.environ[TRACE_ENV], int(os.environ[TRACE_PID_ENV]))
+    else:
+        enable(os.environ[TRACE_ENV])
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import struct
+import numpy as np
+import pandas as pd
+
+# A .fbm file is a fixed header, JSON metadata, then the coefficients:
+#
+#   magic     4 bytes  b'FBML'
+#   version   uint16
+#   reserved  uint16
+#   meta_len  uint32   length of the JSON metadata in bytes
+#   features  uint32   number of input features
+#   outputs   uint32   number of predicted values per row
+#   metadata  meta_len bytes of UTF-8 JSON, space padded to an 8 byte boundary
+#   params    float64 array of shape (outputs, features + 1): the intercept
+#             followed by the weights on the raw (unscaled) features
+#
+# Everything is little-endian and the parameters are 8 byte aligned, so they
+# can be memory mapped as is.
+MAGIC = b'FBML'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHIII')
+EXTENSION = '.fbm'
+
+
+class LinearModel:
+    """
+    A linear model on raw features: predict(X) = X @ weights.T + intercept.
+
+    Like sklearn's coef_, weights is 1-D and intercept a float for a single
+    output, and (outputs, features) and (outputs,) for several.
+    """
+
+    def __init__(self, features, weights, intercept, metadata=None):
+        self.features = list(features)
+        self.weights = weights
+        self.intercept = intercept
+        self.metadata = metadata or {}
+
+    @property
+    def outputs(self) -> list:
+        return self.metadata.get('outputs', ['Projected_Pts'])
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.weights.T + self.intercept
+
+
+class PackageModel:
+    """
+    A joblib package whose estimator cannot be folded into weights (e.g. a
+    tree ensemble). Predicts through its scaler and model, so using it
+    imports sklearn.
+    """
+
+    def __init__(self, model_package):
+        self.package = model_package
+        self.features = list(model_package['features'])
+        self.metadata = {'estimator': type(model_package['model']).__name__}
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        data = pd.DataFrame(np.atleast_2d(X), columns=self.features)
+        preds = self.package['model'].predict(self.package['scaler'].transform(data))
+        return preds if X.ndim > 1 else preds[0]
+
+
+def fold_package(model_package, **metadata) -> LinearModel:
+    """
+    Fold a StandardScaler + linear model package into one LinearModel, so
+    that model.predict(scaler.transform(X)) == X @ weights.T + intercept.
+    """
+    model = model_package['model']
+    scaler = model_package['scaler']
+    features = list(model_package['features'])
+
+    mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(len(features))
+    scale = scaler.scale_ if scaler.scale_ is not None else np.ones(len(features))
+
+    weights = np.asarray(model.coef_, dtype=np.float64) / scale
+    intercept = model.intercept_ - weights @ mean
+    if weights.ndim == 1:
+        intercept = float(intercept)
+
+    metadata = {
+        'estimator': type(model).__name__,
+        'scaler': type(scaler).__name__,
+        'n_samples_seen': int(np.max(getattr(scaler, 'n_samples_seen_', 0))),
+        **metadata,
+    }
+    if 'outputs' in model_package:
+        # Names of a multi-output model's predictions, e.g. stat lines
+        metadata['outputs'] = list(model_package['outputs'])
+    return LinearModel(features, weights, intercept, metadata)
+
+
+def save_artifact(path: str, model: LinearModel):
+    weights = np.atleast_2d(np.asarray(model.weights, dtype='<f8'))
+    intercept = np.atleast_1d(np.asarray(model.intercept, dtype='<f8'))
+    params = np.hstack([intercept[:, None], weights])
+
+    metadata = dict(model.metadata, features=model.features)
+    meta = json.dumps(metadata, sort_keys=True).encode()
+    meta += b' ' * (-(HEADER.size + len(meta)) % 8)
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(meta), weights.shape[1], weights.shape[0]))
+        f.write(meta)
+        f.write(params.tobytes())
+    os.replace(tmp, path)
+
+
+def load_artifact(path: str, mmap=False) -> LinearModel:
+    """
+    Read a .fbm file. With mmap=True the parameters stay a read-only view
+    of the file instead of being copied into memory.
+    """
+    with open(path, 'rb') as f:
+        magic, version, _, meta_len, n_features, n_outputs = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"'{path}' is not a model artifact")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"'{path}' uses artifact format {version}, this version of fbml reads up to {FORMAT_VERSION}")
+        metadata = json.loads(f.read(meta_len))
+
+        shape = (n_outputs, n_features + 1)
+        if mmap:
+            params = np.memmap(path, dtype='<f8', mode='r', offset=HEADER.size + meta_len, shape=shape)
+        else:
+            params = np.fromfile(f, dtype='<f8', count=n_outputs * (n_features + 1)).reshape(shape)
+
+    features = metadata.pop('features')
+    if n_outputs == 1:
+        return LinearModel(features, params[0, 1:], float(params[0, 0]), metadata)
+    return LinearModel(features, params[:, 1:], params[:, 0], metadata)
+
+
+def artifact_path(joblib_path: str) -> str:
+    return os.path.splitext(joblib_path)[0] + EXTENSION
+
+
+def file_sha256(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def read_metadata(path: str) -> dict:
+    """
+    Read only the JSON metadata of a .fbm file, not its parameters.
+    """
+    with open(path, 'rb') as f:
+        magic, _, _, meta_len, _, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"'{path}' is not a model artifact")
+        return json.loads(f.read(meta_len))
+
+
+def is_current(fbm_path: str, joblib_path: str) -> bool:
+    """
+    Whether a .fbm artifact was exported from the joblib package as it is
+    now. A package retrained or copied in since the export makes the
+    artifact stale. Without the package there is nothing to compare, so the
+    artifact stands on its own.
+    """
+    if not os.path.exists(joblib_path):
+        return True
+    try:
+        source_hash = read_metadata(fbm_path).get('source_sha256')
+    except (OSError, ValueError, struct.error):
+        return False
+    return source_hash == file_sha256(joblib_path)
+
+
+def export_package(joblib_path: str) -> str:
+    """
+    Convert one joblib model package into a .fbm artifact next to it.
+    """
+    import joblib
+    import sklearn
+
+    model = fold_package(
+        joblib.load(joblib_path),
+        source=os.path.basename(joblib_path),
+        source_sha256=file_sha256(joblib_path),
+        sklearn_version=sklearn.__version__,
+    )
+    path = artifact_path(joblib_path)
+    save_artifact(path, model)
+    return path
+
+
+def load_model(path: str, mmap=False):
+    """
+    Load a model from a .fbm artifact, or from a joblib package (importing
+    joblib and sklearn) when given one. Linear packages are folded into a
+    LinearModel, anything else is wrapped in a PackageModel.
+    """
+    if path.endswith(EXTENSION):
+        return load_artifact(path, mmap)
+
+    import joblib
+
+    model_package = joblib.load(path)
+    if hasattr(model_package['model'], 'coef_'):
+        return fold_package(model_package)
+    return PackageModel(model_package)
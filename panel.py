@@ -0,0 +1,167 @@
+import os
+import numpy as np
+import pandas as pd
+from features import FEATURE_SPECS
+from player_ids import KEY_COLUMN, PFR_ID_COLUMN, add_player_keys
+from projections import MODELS
+
+DEFAULT_LAGS = 3
+# Seasons averaged by the rolling mean and games-weighted features
+DEFAULT_WINDOWS = [2, 3]
+TARGET_COLUMN = 'FantasyPtsPPR'
+
+
+def panel_models() -> list:
+    # Rookie models have one college career record, so no history to lag
+    return [name for name, (kind, _, _) in MODELS.items() if kind == 'players']
+
+
+def spec_columns(name: str) -> list:
+    columns = []
+    for _, numerator, denominator in FEATURE_SPECS[name]:
+        for column in (numerator, denominator):
+            if column is not None and column not in columns:
+                columns.append(column)
+    return columns
+
+
+def load_panel(name: str, years, use_store=False) -> pd.DataFrame:
+    """
+    Every season of a veteran model's position stacked into one frame, read
+    once, with a Season column and the players' keys. Only the columns the
+    features and target need are kept. A player with two rows in a season
+    keeps the first.
+    """
+    _, pos, _ = MODELS[name]
+    years = sorted(years)
+    columns = ['Player', *spec_columns(name), TARGET_COLUMN]
+    if use_store:
+        import datastore
+
+        stacked = datastore.read('players', years, [pos]).rename(columns={'year': 'Season'})
+        frames = [frame for _, frame in stacked.groupby('Season', sort=True)]
+    else:
+        frames = [pd.read_csv(os.path.join('data', f"{year}playerstats_{pos}.csv")).assign(Season=year)
+                  for year in years]
+
+    # Keys are resolved a season at a time: within one table, two rows with
+    # the same name are two players
+    keep = [c for c in [*columns, PFR_ID_COLUMN, 'Season'] if c in frames[0]]
+    panel = pd.concat([add_player_keys(frame[keep]) for frame in frames], ignore_index=True)
+    return panel.drop_duplicates([KEY_COLUMN, 'Season']).reset_index(drop=True)
+
+
+def per_game(panel: pd.DataFrame, name: str) -> pd.DataFrame:
+    """
+    The model's per-game features for every panel row, computed like
+    features.feature_block (0 for missing values and zero games).
+    """
+    values = {}
+    for output, numerator, denominator in FEATURE_SPECS[name]:
+        top = panel[numerator].to_numpy(dtype=np.float64, na_value=np.nan)
+        bottom = np.ones(len(panel)) if denominator is None else panel[denominator].to_numpy(
+            dtype=np.float64, na_value=np.nan)
+        out = np.zeros(len(panel))
+        valid = (bottom != 0) & np.isfinite(bottom) & np.isfinite(top)
+        np.divide(top, bottom, out=out, where=valid)
+        values[output] = out
+    return pd.DataFrame(values, index=panel.index)
+
+
+def lag_features(panel: pd.DataFrame, name: str, lags=DEFAULT_LAGS, windows=DEFAULT_WINDOWS) -> pd.DataFrame:
+    """
+    One row per (player, season) a model could project: every season in the
+    panel after its first, plus the season after its last, for each player
+    who played the season before. Columns:
+
+        {feature}_lag{k}     the per-game feature k seasons back (lag 1 is
+                             what the model uses today), NaN if the player
+                             did not play that season
+        {feature}_mean{w}    mean of the per-game feature over the last w
+                             seasons the player played
+        {feature}_wavg{w}    total over total games in the last w seasons,
+                             so a 4-game season counts for less than a
+                             17-game one
+        SeasonsPlayed        seasons played in the last `lags`
+        Target               FantasyPtsPPR in the season, NaN if unplayed
+
+    The panel is laid out on a full player x season grid, so a season's
+    lags are one groupby shift per lag, aligned by season even across
+    missed years, with no merges.
+    """
+    spec = FEATURE_SPECS[name]
+    outputs = [output for output, _, _ in spec]
+    raw = spec_columns(name)
+    windows = [w for w in windows if w <= lags]
+
+    seasons = np.arange(panel['Season'].min(), panel['Season'].max() + 2)
+    values = pd.concat([panel[[KEY_COLUMN, 'Season', 'Player', *raw, TARGET_COLUMN]],
+                        per_game(panel, name)], axis=1)
+    if PFR_ID_COLUMN in panel:
+        values[PFR_ID_COLUMN] = panel[PFR_ID_COLUMN]
+    grid = pd.MultiIndex.from_product([panel[KEY_COLUMN].unique(), seasons], names=[KEY_COLUMN, 'Season'])
+    values = values.set_index([KEY_COLUMN, 'Season']).reindex(grid)
+
+    by_player = values.groupby(level=KEY_COLUMN, sort=False)
+    shifted = {k: by_player.shift(k) for k in range(1, lags + 1)}
+
+    # Rows a model could project: the player played the season before
+    played = shifted[1]['Player'].notna().to_numpy()
+    out = {
+        'Player': shifted[1]['Player'].to_numpy()[played],
+    }
+    if PFR_ID_COLUMN in values:
+        out[PFR_ID_COLUMN] = shifted[1][PFR_ID_COLUMN].to_numpy()[played]
+
+    # (lags, rows, features) blocks of the lagged per-game features and raw stats
+    lagged = np.stack([shifted[k][outputs].to_numpy(dtype=np.float64)[played] for k in shifted])
+    lagged_raw = np.stack([shifted[k][raw].to_numpy(dtype=np.float64)[played] for k in shifted])
+    present = np.stack([shifted[k]['Player'].notna().to_numpy()[played] for k in shifted])
+
+    for k in range(lags):
+        for j, output in enumerate(outputs):
+            out[f'{output}_lag{k + 1}'] = lagged[k, :, j]
+
+    for w in windows:
+        counts = present[:w].sum(axis=0)
+        sums = np.where(present[:w, :, None], lagged[:w], 0.0).sum(axis=0)
+        means = sums / counts[:, None]
+        totals = np.nansum(np.where(present[:w, :, None], lagged_raw[:w], np.nan), axis=0)
+        for j, (output, numerator, denominator) in enumerate(spec):
+            out[f'{output}_mean{w}'] = means[:, j]
+            if denominator is None:
+                out[f'{output}_wavg{w}'] = means[:, j]
+                continue
+            top, bottom = totals[:, raw.index(numerator)], totals[:, raw.index(denominator)]
+            wavg = np.zeros(len(top))
+            np.divide(top, bottom, out=wavg, where=bottom > 0)
+            out[f'{output}_wavg{w}'] = wavg
+
+    out['SeasonsPlayed'] = present.sum(axis=0)
+    out['Target'] = values[TARGET_COLUMN].to_numpy(dtype=np.float64)[played]
+
+    index = values.index[played]
+    frame = pd.DataFrame(out)
+    frame.insert(0, KEY_COLUMN, index.get_level_values(KEY_COLUMN).to_numpy())
+    frame.insert(1, 'Season', index.get_level_values('Season').to_numpy())
+    return frame.sort_values(['Season', KEY_COLUMN], ignore_index=True)
+
+
+def build_panel(name: str, years, lags=DEFAULT_LAGS, windows=DEFAULT_WINDOWS, use_store=False) -> pd.DataFrame:
+    """
+    Lag features for every season a veteran model can be trained on or
+    project from `years` of data (see lag_features). Training rows are
+    the ones with a Target; the season after the last has none.
+    """
+    if name not in panel_models():
+        raise ValueError(f"'{name}' is not a veteran model, expected one of {panel_models()}")
+    return lag_features(load_panel(name, years, use_store), name, lags, windows)
+
+
+def save_panel(name: str, df, output_dir='data') -> str:
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, f'panel_{name}.csv')
+    df.to_csv(filepath, index=False)
+
+    print(f"{name} panel with {len(df)} player seasons has been created.")
+    return filepath
@@ -0,0 +1,200 @@
+from io import BytesIO
+from lxml import etree
+import pandas as pd
+from player_ids import PFR_ID_COLUMN
+
+# Rows PFR repeats inside tbody to re-show the column headers
+HEADER_ROW_CLASSES = {'thead', 'over_header'}
+
+
+def _iter_tables(html: bytes, table_ids=None, include_comments=True):
+    """
+    Incrementally parse an HTML page and yield (table_id, table element) for
+    every wanted table. table_ids=None means "any table that is not hidden in a
+    comment", which matches what pd.read_html sees.
+
+    Everything outside the wanted tables is cleared as soon as it is parsed,
+    so memory stays at roughly one table no matter how big the page is. Sports
+    Reference hides many tables inside HTML comments, so comments containing a
+    wanted table are parsed the same way.
+    """
+    context = etree.iterparse(BytesIO(html), events=('start', 'end', 'comment'), html=True)
+    depth = 0
+    for event, elem in context:
+        if event == 'comment':
+            text = elem.text or ''
+            if include_comments and table_ids is not None and '<table' in text:
+                if any(f'id="{table_id}"' in text for table_id in table_ids):
+                    yield from _iter_tables(text.encode('utf-8'), table_ids, include_comments=False)
+            continue
+
+        if elem.tag == 'table':
+            if event == 'start':
+                depth += 1
+                continue
+            depth -= 1
+            table_id = elem.get('id')
+            if depth == 0 and (table_ids is None or table_id in table_ids):
+                yield table_id, elem
+            elem.clear(keep_tail=True)
+        elif event == 'end' and depth == 0:
+            elem.clear(keep_tail=True)
+            # Drop the cleared siblings too, not just their contents
+            parent = elem.getparent()
+            while parent is not None and elem.getprevious() is not None:
+                del parent[0]
+
+
+def _cell_text(cell) -> str:
+    # Most cells are plain text; only walk the subtree for links and such
+    if len(cell) == 0:
+        return (cell.text or '').strip()
+    return ''.join(cell.itertext()).strip()
+
+
+def _row_classes(row) -> set:
+    return set((row.get('class') or '').split())
+
+
+def find_table(html: bytes, table_id=None):
+    """
+    Return the first table with the given id (searching commented-out tables
+    too), or the first visible table when table_id is None.
+    """
+    table_ids = None if table_id is None else {table_id}
+    for _, table in _iter_tables(html, table_ids):
+        return table
+    return None
+
+
+def _column_names(header_rows) -> list:
+    # Mirror what scrape_pfr_table did with pd.read_html's MultiIndex: prefix
+    # each column with its over-header ('Passing_Yds'), unless it has none.
+    if not header_rows:
+        return []
+
+    names = [_cell_text(cell) for cell in header_rows[-1]]
+    if len(header_rows) > 1:
+        prefixes = []
+        for cell in header_rows[-2]:
+            prefixes.extend([_cell_text(cell)] * int(cell.get('colspan', 1)))
+        names = [f'{prefix}_{name}'.strip() if prefix else name for prefix, name in zip(prefixes, names)]
+
+    # Duplicate names get '.1', '.2', ... suffixes like pandas does
+    seen = {}
+    unique = []
+    for name in names:
+        if name in seen:
+            seen[name] += 1
+            unique.append(f'{name}.{seen[name]}')
+        else:
+            seen[name] = 0
+            unique.append(name)
+    return unique
+
+
+def _typed_column(values) -> pd.Series:
+    series = pd.Series([value or None for value in values], dtype=object)
+    try:
+        return pd.to_numeric(series)
+    except (ValueError, TypeError):
+        return series
+
+
+def table_to_frame(table) -> pd.DataFrame:
+    """
+    Build a DataFrame from a parsed table element. Columns are numeric when
+    every value parses as a number and strings otherwise, as with read_html.
+    Tables with a Player column also get the PFR player ids, when the page
+    has them, in a PfrId column next to it.
+    """
+    header_rows = []
+    body_rows = []
+    for row in table.iter('tr'):
+        section = row.getparent().tag
+        if section == 'thead':
+            header_rows.append(row)
+        elif section != 'tfoot' and not (_row_classes(row) & HEADER_ROW_CLASSES):
+            body_rows.append(row)
+
+    columns = _column_names(header_rows)
+    data = [[] for _ in columns]
+    player_ids = []
+    for row in body_rows:
+        cells = [_cell_text(cell) for cell in row]
+        # Some body rows repeat the header without marking it with a class
+        if columns and cells and cells[0] == columns[0]:
+            continue
+        cells = (cells + [''] * len(columns))[:len(columns)]
+        for column, value in zip(data, cells):
+            column.append(value)
+        player_ids.append(next((cell.get('data-append-csv') for cell in row if cell.get('data-stat') == 'player'), None))
+
+    df = pd.DataFrame({name: _typed_column(values) for name, values in zip(columns, data)})
+    if 'Player' in df and any(player_ids):
+        df.insert(df.columns.get_loc('Player') + 1, PFR_ID_COLUMN, pd.array(player_ids, dtype='string'))
+    return df
+
+
+def read_table(html: bytes, table_id=None) -> pd.DataFrame:
+    table = find_table(html, table_id)
+    if table is None:
+        raise ValueError(f"No table found with id {table_id!r}")
+    return table_to_frame(table)
+
+
+def strip_award_markers(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    PFR marks award winners with a trailing '+' (First-Team All-Pro) and/or
+    '*' (Pro Bowl) on the player name. Move them into flag columns.
+    """
+    player = df['Player'].astype('string')
+
+    all_pro = player.str.endswith('+').fillna(False).to_numpy(bool)
+    player = player.str.removesuffix('+')
+    pro_bowl = player.str.endswith('*').fillna(False).to_numpy(bool)
+    player = player.str.removesuffix('*')
+
+    df['Player'] = player.astype(object).where(player.notna(), None)
+    if all_pro.any():
+        df.loc[all_pro, 'FirstTeamAllPro'] = 1
+    if pro_bowl.any():
+        df.loc[pro_bowl, 'SelectedToProBowl'] = 1
+    return df
+
+
+def find_rows(html: bytes, targets: dict) -> dict:
+    """
+    Pull single rows out of a page in one pass.
+
+    targets maps a table id to the id of the row wanted from it, e.g.
+    {'passing_standard': 'passing_standard.Career'}. When a table has no row
+    with that id, its tfoot row whose first header cell mentions the row label
+    is used instead. Returns {table_id: {data-stat: text}} for the rows found;
+    parsing stops as soon as every table has been seen.
+    """
+    rows = {}
+    for table_id, table in _iter_tables(html, set(targets)):
+        if table_id in rows:
+            continue
+        row_id = targets[table_id]
+        row = next((r for r in table.iter('tr') if r.get('id') == row_id), None)
+        if row is None:
+            label = row_id.rsplit('.', 1)[-1]
+            for candidate in table.iter('tr'):
+                if candidate.getparent().tag != 'tfoot':
+                    continue
+                first_header_cell = next(candidate.iter('th'), None)
+                if first_header_cell is not None and label in _cell_text(first_header_cell):
+                    print("Manual search for", table_id, label, "row")
+                    row = candidate
+                    break
+        if row is not None:
+            rows[table_id] = {
+                cell.get('data-stat'): _cell_text(cell)
+                for cell in row
+                if cell.get('data-stat') is not None
+            }
+        if len(rows) == len(targets):
+            break
+    return rows
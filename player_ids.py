@@ -0,0 +1,171 @@
+from functools import lru_cache
+import glob
+import os
+import re
+import threading
+import unicodedata
+import numpy as np
+import pandas as pd
+
+INDEX_FILE = os.path.join('data', 'player_ids.csv')
+
+# PFR's id for a player (e.g. 'ChasJa00'), from the data-append-csv attribute
+# of the player cell. Only present in data scraped since it was captured.
+PFR_ID_COLUMN = 'PfrId'
+KEY_COLUMN = 'PlayerKey'
+
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+
+
+@lru_cache(maxsize=None)
+def normalize_name(name: str) -> str:
+    """
+    Lookup key for a player name: no accents, punctuation, case or
+    generational suffix, so 'D.J. Moore' and 'DJ Moore', or 'Marvin
+    Harrison Jr.' and 'Marvin Harrison Jr', match.
+    """
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode()
+    name = re.sub(r"[.'`]", '', name.lower())
+    words = re.sub(r'[^a-z0-9]+', ' ', name).split()
+    while len(words) > 1 and words[-1] in NAME_SUFFIXES:
+        words.pop()
+    return ' '.join(words)
+
+
+class PlayerIndex:
+    """
+    Persistent map from players to small integer keys.
+
+    A player is identified by their PFR id when the data has one, and by
+    normalized name otherwise. Both are plain dict (hash) lookups. Keys are
+    never reused, so they stay valid across seasons and tables, and can be
+    joined on instead of name strings.
+    """
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.pfr_ids = []
+        self.names = []
+        self.by_pfr_id = {}
+        self.by_name = {}
+        if path is not None and os.path.exists(path):
+            df = pd.read_csv(path, dtype={PFR_ID_COLUMN: 'string'}, keep_default_na=False)
+            for pfr_id, name in zip(df[PFR_ID_COLUMN], df['Player']):
+                self._add(name, pfr_id or None)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _add(self, name: str, pfr_id=None) -> int:
+        key = len(self.names)
+        self.names.append(name)
+        self.pfr_ids.append(pfr_id)
+        if pfr_id is not None:
+            self.by_pfr_id[pfr_id] = key
+        self.by_name.setdefault(normalize_name(name), []).append(key)
+        return key
+
+    def _resolve(self, name: str, pfr_id, taken: set) -> int:
+        if pfr_id is not None and pfr_id in self.by_pfr_id:
+            return self.by_pfr_id[pfr_id]
+
+        # Two rows of one table are two players, so skip keys already taken
+        # by an earlier row with the same name
+        for key in self.by_name.get(normalize_name(name), []):
+            if key in taken:
+                continue
+            if pfr_id is None:
+                return key
+            if self.pfr_ids[key] is None:
+                # First time this name-only player is seen with an id
+                self.pfr_ids[key] = pfr_id
+                self.by_pfr_id[pfr_id] = key
+                return key
+        return self._add(name, pfr_id)
+
+    def keys_for(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Key of every row's player (from 'Player' and, if present, PfrId),
+        adding players that are not in the index yet.
+        """
+        names = df['Player'].astype(object).where(df['Player'].notna(), '').tolist()
+        if PFR_ID_COLUMN in df:
+            pfr_ids = df[PFR_ID_COLUMN].astype(object).where(df[PFR_ID_COLUMN].notna(), None).tolist()
+        else:
+            pfr_ids = [None] * len(names)
+
+        keys = np.empty(len(names), dtype=np.int32)
+        taken = set()
+        with self.lock:
+            for i, (name, pfr_id) in enumerate(zip(names, pfr_ids)):
+                keys[i] = self._resolve(name, pfr_id or None, taken)
+                taken.add(int(keys[i]))
+        return keys
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            KEY_COLUMN: np.arange(len(self.names), dtype=np.int32),
+            'Player': self.names,
+            PFR_ID_COLUMN: pd.array(self.pfr_ids, dtype='string'),
+        })
+
+    def save(self, path=None):
+        path = path or self.path
+        tmp = path + '.tmp'
+        self.to_frame().to_csv(tmp, index=False)
+        os.replace(tmp, path)
+
+
+def build_index(data_dir='data', path=INDEX_FILE) -> PlayerIndex:
+    """
+    Index every player in the per-position CSVs, oldest season first, so
+    keys come out the same on every machine.
+    """
+    index = PlayerIndex(path=None)
+    index.path = path
+    pattern = re.compile(r'(\d{4})(playerstats|rookiestats)_\w+\.csv$')
+    files = [f for f in glob.glob(os.path.join(data_dir, '*_*.csv')) if pattern.search(os.path.basename(f))]
+    for csv in sorted(files):
+        index.keys_for(pd.read_csv(csv))
+    return index
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def default_index() -> PlayerIndex:
+    """
+    The shared index in data/player_ids.csv, loaded once per process.
+    """
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = PlayerIndex()
+        return _default_index
+
+
+def add_player_keys(df: pd.DataFrame, index=None) -> pd.DataFrame:
+    if index is None:
+        index = default_index()
+    return df.assign(**{KEY_COLUMN: index.keys_for(df)})
+
+
+def merge_players(left: pd.DataFrame, right: pd.DataFrame, how='inner', suffixes=('', '_y'), index=None):
+    """
+    Drop-in for left.merge(right, on='Player', ...) that joins on integer
+    player keys. Players who share a name stay apart when the data has PFR
+    ids, and spelling variants of one name are matched.
+    """
+    if how not in ('inner', 'left'):
+        raise ValueError(f"merge_players supports how='inner' or 'left', not {how!r}")
+    if index is None:
+        index = default_index()
+    if KEY_COLUMN not in left:
+        left = add_player_keys(left, index)
+    if KEY_COLUMN not in right:
+        right = add_player_keys(right, index)
+    # The left side's name and id describe the row
+    right = right.drop(columns=[c for c in ('Player', PFR_ID_COLUMN) if c in right])
+    return left.merge(right, on=KEY_COLUMN, how=how, suffixes=suffixes)
@@ -2,87 +2,80 @@ import pandas as pd
 import argparse
 import os
 import sys
+from datastore import RENAME_MAPPING, write_partition
+from instrument import traced
 
-# Command-line argument parsing
-parser = argparse.ArgumentParser(description="Preprocess fantasy football stats by year")
-parser.add_argument("year", type=int, help="Season year to process")
-
-args = parser.parse_args()
-
-year = args.year
-
-fantasy_csv = os.path.join('data', f'{year}playerstats.csv')
-
-if not os.path.exists(fantasy_csv):
-    print(f"Error: Input file not found at '{fantasy_csv}'")
-    print("Please make sure that you have scraped the data before preprocessing it")
-    sys.exit(1)
-
-fantasy_df = pd.read_csv(fantasy_csv)
-
-# Keeping for backwards compatibility
-rename_mapping = {
-    'Tm': 'Team',
-    'Games_G': 'GamesPlayed',
-    'Games_GS': 'GamesStarted',
-    'Passing_Cmp': 'PassCmp',
-    'Passing_Att': 'PassAtt',
-    'Passing_Yds': 'PassYds',
-    'Passing_TD': 'PassTD',
-    'Passing_Int': 'PassInt',
-    'Rushing_Att': 'RushAtt',
-    'Rushing_Yds': 'RushYds',
-    'Rushing_Y/A': 'RushYdsPerAtt',
-    'Rushing_TD': 'RushTD',
-    'Receiving_Tgt': 'Targets',
-    'Receiving_Rec': 'Receptions',
-    'Receiving_Yds': 'RecYds',
-    'Receiving_Y/R': 'RecYdsPerReception',
-    'Receiving_TD': 'RecTD',
-    'Fumbles_Fmb': 'Fumbles',
-    'Fumbles_FL': 'FumblesLost',
-    'Scoring_TD': 'TotalTD',
-    'Scoring_2PM': 'TwoPtConvMade',
-    'Scoring_2PP': 'TwoPtConvPassing',
-    'Fantasy_FantPt': 'FantasyPts',
-    'Fantasy_PPR': 'FantasyPtsPPR',
-    'Fantasy_DKPt': 'FantasyPtsDraftKings',
-    'Fantasy_FDPt': 'FantasyPtsFanDuel',
-    'Fantasy_VBD': 'VBD',
-    'Fantasy_PosRank': 'PosRank',
-    'Fantasy_OvRank': 'OverallRank',
-}
-
-fantasy_df.rename(columns=rename_mapping, inplace=True)
-
-
-# # One hot encode the 'Team' column
-# fantasy_df = pd.get_dummies(fantasy_df, columns=['Team'], prefix='Team', drop_first=True)
-
-# Replace NAN in FantasyPts
-fantasy_df['FantasyPts'] = fantasy_df['FantasyPts'].fillna(0)
-# Replace NAN in FantasyPtrPPR
-fantasy_df['FantasyPtsPPR'] = fantasy_df['FantasyPtsPPR'].fillna(0)
-# Replace NAN in FantasyPtsDraftKings
-fantasy_df['FantasyPtsDraftKings'] = fantasy_df['FantasyPtsDraftKings'].fillna(0)
-# Replace NAN in FantasyPtsFanDuel
-fantasy_df['FantasyPtsFanDuel'] = fantasy_df['FantasyPtsFanDuel'].fillna(0)
-
-
-# Split data frame into 4 sub data frames based on position
-dfs = {}
-for pos, subdf in fantasy_df.groupby('FantPos'):
-    # Considering FBs and RBs as the same position
-    if pos in ['RB', 'FB']:
-        dfs.setdefault('RB_FB', []).append(subdf)
-    else:
-        dfs[pos] = subdf.copy()
-dfs['RB_FB'] = pd.concat(dfs['RB_FB'], ignore_index=True)
-
-
-# Convert data frames to csvs
-for pos, subdf in dfs.items():
-    filepath = os.path.join('data', f'{year}playerstats_{pos}.csv')
-    subdf.to_csv(filepath, index=False)
-    print(f"Data preprocessing complete. Processed data saved to '{filepath}'.")
-    
+FANTASY_POINT_COLUMNS = ['FantasyPts', 'FantasyPtsPPR', 'FantasyPtsDraftKings', 'FantasyPtsFanDuel']
+
+
+def split_by_position(df, pos_column):
+    # Split data frame into 4 sub data frames based on position
+    dfs = {}
+    for pos, subdf in df.groupby(pos_column):
+        # Considering FBs and RBs as the same position
+        if pos in ['RB', 'FB']:
+            dfs.setdefault('RB_FB', []).append(subdf)
+        else:
+            dfs[pos] = subdf.copy()
+    dfs['RB_FB'] = pd.concat(dfs['RB_FB'], ignore_index=True)
+    return dfs
+
+
+@traced()
+def preprocess_season(fantasy_df):
+    # Keeping for backwards compatibility
+    fantasy_df = fantasy_df.rename(columns=RENAME_MAPPING)
+
+
+    # # One hot encode the 'Team' column
+    # fantasy_df = pd.get_dummies(fantasy_df, columns=['Team'], prefix='Team', drop_first=True)
+
+    # Replace NAN in all fantasy point columns
+    fantasy_df = fantasy_df.fillna({col: 0 for col in FANTASY_POINT_COLUMNS})
+
+    return split_by_position(fantasy_df, 'FantPos')
+
+
+@traced()
+def write_outputs(kind, year, dfs):
+    # Convert data frames to csvs
+    file_kind = 'playerstats' if kind == 'players' else 'rookiestats'
+    filepaths = []
+    for pos, subdf in dfs.items():
+        filepath = os.path.join('data', f'{year}{file_kind}_{pos}.csv')
+        subdf.to_csv(filepath, index=False)
+        print(f"Data preprocessing complete. Processed data saved to '{filepath}'.")
+        filepaths.append(filepath)
+        filepaths.append(write_partition(kind, year, pos, subdf))
+    return filepaths
+
+
+def input_path(kind, year):
+    file_kind = 'playerstats' if kind == 'players' else 'rookiestats'
+    return os.path.join('data', f'{year}{file_kind}.csv')
+
+
+def check_input(path):
+    if not os.path.exists(path):
+        print(f"Error: Input file not found at '{path}'")
+        print("Please make sure that you have scraped the data before preprocessing it")
+        sys.exit(1)
+
+
+@traced()
+def main():
+    # Command-line argument parsing
+    parser = argparse.ArgumentParser(description="Preprocess fantasy football stats by year")
+    parser.add_argument("year", type=int, help="Season year to process")
+
+    args = parser.parse_args()
+
+    year = args.year
+
+    fantasy_csv = input_path('players', year)
+    check_input(fantasy_csv)
+
+    write_outputs('players', year, preprocess_season(pd.read_csv(fantasy_csv)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import hashlib
+import json
+import os
+import pandas as pd
+import datastore
+from instrument import traced
+from preprocess_data import preprocess_season, write_outputs, input_path
+from preprocess_rookie_data import preprocess_rookie_class
+
+MANIFEST_FILE = os.path.join('data', '.preprocess_manifest.json')
+KINDS = ['players', 'rookies']
+
+# Bump when preprocessing logic changes in a way the schema fingerprint
+# below cannot see, to force every season to be rebuilt.
+PREPROCESS_VERSION = 1
+
+
+def schema_fingerprint() -> str:
+    """
+    Hash of everything besides the input file that shapes the outputs: the
+    column renames and the store's column types. A schema tweak changes it,
+    which invalidates every season.
+    """
+    config = {
+        'version': PREPROCESS_VERSION,
+        'rename': datastore.RENAME_MAPPING,
+        'string': sorted(datastore.STRING_COLUMNS),
+        'category': sorted(datastore.CATEGORY_COLUMNS),
+        'exact': sorted(datastore.EXACT_COLUMNS),
+        'int': sorted(datastore.INT_COLUMNS),
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+def file_fingerprint(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path=MANIFEST_FILE) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict, path=MANIFEST_FILE):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+@traced()
+def preprocess_job(kind: str, year: int) -> list:
+    # Runs in a worker process
+    df = pd.read_csv(input_path(kind, year))
+    if kind == 'players':
+        dfs = preprocess_season(df)
+    else:
+        dfs = preprocess_rookie_class(df)
+    return write_outputs(kind, year, dfs)
+
+
+def is_up_to_date(entry, fingerprint: str) -> bool:
+    return (
+        entry is not None
+        and entry['fingerprint'] == fingerprint
+        and all(os.path.exists(path) for path in entry['outputs'])
+    )
+
+
+@traced()
+def run(years, kinds=KINDS, workers=None, force=False, manifest_file=MANIFEST_FILE):
+    """
+    Preprocess every requested (kind, season) in one process pool.
+
+    Each input file is fingerprinted together with the schema, and seasons
+    whose fingerprint matches the last successful run (and whose outputs
+    still exist) are skipped. Returns the list of (kind, year) jobs rebuilt.
+    """
+    manifest = load_manifest(manifest_file)
+    schema = schema_fingerprint()
+
+    jobs = {}
+    for kind in kinds:
+        for year in years:
+            path = input_path(kind, year)
+            if not os.path.exists(path):
+                print(f"Skipping {kind} {year}, no input file at '{path}'")
+                continue
+            fingerprint = f'{file_fingerprint(path)}:{schema}'
+            key = f'{kind}:{year}'
+            if not force and is_up_to_date(manifest.get(key), fingerprint):
+                print(f"Skipping {kind} {year}, inputs unchanged")
+                continue
+            jobs[(kind, year)] = fingerprint
+
+    if not jobs:
+        return []
+
+    rebuilt = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(preprocess_job, kind, year): (kind, year) for kind, year in jobs}
+        for future in as_completed(futures):
+            kind, year = futures[future]
+            try:
+                outputs = future.result()
+            except Exception as e:
+                print(f"Error preprocessing {kind} {year}: {e}")
+                continue
+            manifest[f'{kind}:{year}'] = {'fingerprint': jobs[(kind, year)], 'outputs': outputs}
+            save_manifest(manifest, manifest_file)
+            rebuilt.append((kind, year))
+
+    return rebuilt
@@ -1,37 +1,27 @@
 import pandas as pd
 import argparse
-import os
-import sys
+from instrument import traced
+from preprocess_data import split_by_position, write_outputs, input_path, check_input
 
-# Command-line argument parsing
-parser = argparse.ArgumentParser(description="Preprocess fantasy football rookie stats by year")
-parser.add_argument("--year", type=int, required=True, help="Season year to process")
 
-args = parser.parse_args()
+@traced()
+def preprocess_rookie_class(df):
+    return split_by_position(df, 'Pos')
 
-year = args.year
-csv = os.path.join('data', f'{year}rookiestats.csv')
 
-if not os.path.exists(csv):
-    print(f"Error: Input file not found at '{csv}'")
-    print("Please make sure that you have scraped the data before preprocessing it")
-    sys.exit(1)
+@traced()
+def main():
+    # Command-line argument parsing
+    parser = argparse.ArgumentParser(description="Preprocess fantasy football rookie stats by year")
+    parser.add_argument("--year", type=int, required=True, help="Season year to process")
 
-df = pd.read_csv(csv)
-
-# Split data frame into 4 sub data frames based on position
-dfs = {}
-for pos, subdf in df.groupby('Pos'):
-    if pos in ['RB', 'FB']:
-        dfs.setdefault('RB_FB', []).append(subdf)
-    else:
-        dfs[pos] = subdf.copy()
-dfs['RB_FB'] = pd.concat(dfs['RB_FB'], ignore_index=True)
-
-for pos, subdf in dfs.items():
-    filepath = os.path.join('data', f'{year}rookiestats_{pos}.csv')
-    subdf.to_csv(filepath, index=False)
-    print(f"Data preprocessing complete. Processed data saved to '{filepath}'.")
+    args = parser.parse_args()
 
+    year = args.year
+    csv = input_path('rookies', year)
+    check_input(csv)
 
+    write_outputs('rookies', year, preprocess_rookie_class(pd.read_csv(csv)))
 
+if __name__ == '__main__':
+    main()
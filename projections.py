@@ -0,0 +1,247 @@
+from contextlib import contextmanager
+from enum import Enum, auto
+import os
+import time
+import numpy as np
+import pandas as pd
+from features import feature_block
+from instrument import span, traced
+from model_artifact import LinearModel, artifact_path, is_current, load_model
+
+
+class Position(Enum):
+    QB = auto()
+    RB = auto()
+    WR = auto()
+    TE = auto()
+
+
+# Model name -> (data kind, position file suffix, Position it projects).
+# The model name is also its FEATURE_SPECS key and models/{name}_model.joblib.
+MODELS = {
+    'qb': ('players', 'QB', Position.QB),
+    'rookie_qb': ('rookies', 'QB', Position.QB),
+    'rb_fb': ('players', 'RB_FB', Position.RB),
+    'rookie_rb_fb': ('rookies', 'RB_FB', Position.RB),
+    'wr': ('players', 'WR', Position.WR),
+    'rookie_wr': ('rookies', 'WR', Position.WR),
+    'te': ('players', 'TE', Position.TE),
+    'rookie_te': ('rookies', 'TE', Position.TE),
+}
+
+BASELINE_RANKS = {
+    Position.QB: 12,  # Baseline is the 12th best QB
+    Position.RB: 24,  # Baseline is the 24th best RB
+    Position.WR: 30,  # Baseline is the 30th best WR
+    Position.TE: 12,  # Baseline is the 12th best TE
+}
+
+
+@contextmanager
+def timed(timings: dict, stage: str):
+    # Also a span in the pipeline trace, when tracing is on
+    start = time.perf_counter()
+    with span(stage):
+        yield
+    timings[stage] = timings.get(stage, 0) + time.perf_counter() - start
+
+
+def data_path(name: str, year: int) -> str:
+    # Veterans are projected from last season's stats, rookies from their
+    # college stats in the draft class of the projected year.
+    kind, pos, _ = MODELS[name]
+    if kind == 'players':
+        return os.path.join('data', f"{year - 1}playerstats_{pos}.csv")
+    return os.path.join('data', f"{year}rookiestats_{pos}.csv")
+
+
+def model_path(name: str, models_dir='models', artifact='model') -> str:
+    # Prefer the compact artifact written by 'fbml.py export-models', which
+    # loads with NumPy alone, over the joblib package it was exported from,
+    # as long as that package hasn't changed since the export.
+    # artifact='stats_model' is the model's stat line counterpart.
+    path = os.path.join(models_dir, f"{name}_{artifact}.joblib")
+    fbm = artifact_path(path)
+    return fbm if os.path.exists(fbm) and is_current(fbm, path) else path
+
+
+def load_data(year: int, names=MODELS, use_store=False) -> dict:
+    dfs = {}
+    for name in names:
+        if use_store:
+            from datastore import read_position
+
+            kind, pos, _ = MODELS[name]
+            data_year = year - 1 if kind == 'players' else year
+            dfs[name] = read_position(kind, data_year, pos)
+        else:
+            dfs[name] = pd.read_csv(data_path(name, year))
+    return dfs
+
+
+def load_models(names=MODELS, models_dir='models', artifact='model') -> dict:
+    return {name: load_model(model_path(name, models_dir, artifact)) for name in names}
+
+
+def check_files(year: int, names=MODELS, models_dir='models', use_store=False, artifact='model'):
+    paths = [model_path(name, models_dir, artifact) for name in names]
+    if not use_store:
+        paths += [data_path(name, year) for name in names]
+    missing_files = [path for path in paths if not os.path.exists(path)]
+
+    if missing_files:
+        print("Error: The following required files could not be found:")
+        for path in missing_files:
+            print(f"  - {path}")
+
+        raise FileNotFoundError("Missing required data or model files. Please check the paths.")
+
+
+@traced()
+def generate_projections(model_package, df):
+    model = model_package['model']
+    scaler = model_package['scaler']
+    features = model_package['features']
+
+    data = df[features]
+    data_scaled = scaler.transform(data)
+
+    preds = model.predict(data_scaled)
+
+    projections = pd.DataFrame({
+        'Player': df['Player'],
+        'Projected_Pts': preds
+    }, index=df.index)
+
+    return projections
+
+
+def model_blocks(dfs: dict, models: dict) -> dict:
+    # Each model's feature matrix, in the order of its features
+    blocks = {}
+    for name, model in models.items():
+        outputs, values = feature_block(dfs[name], name)
+        blocks[name] = values[:, [outputs.index(f) for f in model.features]]
+    return blocks
+
+
+def predict_all(blocks: dict, models: dict) -> dict:
+    """
+    Run every model in one vectorized pass.
+
+    Each linear model's feature matrix is laid out in its own block of
+    columns of one wide matrix, next to a one-hot column for its intercept.
+    All model weights are stacked into a single weight matrix (a vector for
+    single output models), so every player's predictions are a single
+    matrix product. The linear models must share their number of outputs.
+    Models that cannot be folded into weights are run through their own
+    predict(). Returns {name: predictions}.
+    """
+    linear = [name for name in models if isinstance(models[name], LinearModel)]
+    widths = [len(models[name].features) + 1 for name in linear]
+    offsets = np.concatenate([[0], np.cumsum(widths)]).astype(int)
+    rows = np.concatenate([[0], np.cumsum([len(blocks[name]) for name in linear])]).astype(int)
+    n_outputs = {np.atleast_2d(models[name].weights).shape[0] for name in linear} or {1}
+    if len(n_outputs) > 1:
+        raise ValueError(f"Linear models with different numbers of outputs cannot be stacked: {sorted(n_outputs)}")
+
+    X = np.zeros((rows[-1], offsets[-1]))
+    weights = np.zeros((offsets[-1], n_outputs.pop()))
+    for i, name in enumerate(linear):
+        features = models[name].features
+        X[rows[i]:rows[i + 1], offsets[i]:offsets[i] + len(features)] = blocks[name]
+        X[rows[i]:rows[i + 1], offsets[i + 1] - 1] = 1.0
+        weights[offsets[i]:offsets[i] + len(features)] = np.atleast_2d(models[name].weights).T
+        weights[offsets[i + 1] - 1] = models[name].intercept
+    if weights.shape[1] == 1:
+        weights = weights[:, 0]
+
+    linear_preds = X @ weights
+    preds = {name: linear_preds[rows[i]:rows[i + 1]] for i, name in enumerate(linear)}
+    for name in models:
+        if name not in preds:
+            preds[name] = models[name].predict(blocks[name])
+    return preds
+
+
+@traced()
+def project_all(dfs: dict, models: dict) -> dict:
+    """
+    Project every player with every model (see predict_all).
+    Returns {name: projections frame}.
+    """
+    preds = predict_all(model_blocks(dfs, models), models)
+    return {
+        name: pd.DataFrame({
+            'Player': dfs[name]['Player'],
+            'Projected_Pts': preds[name],
+        }, index=dfs[name].index)
+        for name in models
+    }
+
+
+@traced()
+def compute_vbd(pos: Position, df):
+    df.sort_values(by='Projected_Pts', ascending=False, inplace=True)
+    df.reset_index(drop=True, inplace=True)
+
+    baseline_rank = BASELINE_RANKS[pos]
+
+    if baseline_rank > len(df):
+        baseline_rank = len(df)
+
+    baseline_pts = df.loc[baseline_rank - 1]['Projected_Pts']
+
+    df['VBD'] = df['Projected_Pts'] - baseline_pts
+
+
+def label_projections(all_projections: dict) -> dict:
+    # Tag every model's rows with the position and model they came from
+    for name, df in all_projections.items():
+        df['Pos'] = MODELS[name][2].name
+        df['Model'] = name
+    return all_projections
+
+
+def rank_projections(all_projections: dict) -> pd.DataFrame:
+    positional_projections = {}
+    for pos in Position:
+        frames = [all_projections[name] for name, (_, _, model_pos) in MODELS.items()
+                  if model_pos == pos and name in all_projections]
+        positional_projections[pos] = pd.concat(frames, ignore_index=True)
+
+    for pos, df in positional_projections.items():
+        compute_vbd(pos, df)
+
+    final_projections = pd.concat(positional_projections, ignore_index=True)
+    final_projections.sort_values(by='VBD', ascending=False, inplace=True)
+    final_projections.reset_index(drop=True, inplace=True)
+    return final_projections
+
+
+def build_projections(year: int, models_dir='models', use_store=False, timings=None):
+    """
+    Load every data file and model package for `year` and return the ranked
+    projections. Per-stage wall times are added to `timings` if given.
+    """
+    timings = {} if timings is None else timings
+
+    check_files(year, models_dir=models_dir, use_store=use_store)
+    with timed(timings, 'load data'):
+        dfs = load_data(year, use_store=use_store)
+    with timed(timings, 'load models'):
+        models = load_models(models_dir=models_dir)
+    with timed(timings, 'features + predict'):
+        all_projections = label_projections(project_all(dfs, models))
+    with timed(timings, 'vbd + rank'):
+        final_projections = rank_projections(all_projections)
+    return final_projections
+
+
+def save_projections(year: int, final_projections, output_dir='projections') -> str:
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, f'{year}_projections.csv')
+    final_projections.to_csv(filepath)
+
+    print(f"{year} projections has been created.")
+    return filepath
@@ -0,0 +1,65 @@
+import json
+import numpy as np
+
+# Component stats projected for every player, as season totals. Each is
+# the playerstats column it is trained on.
+STATS = [
+    'PassYds', 'PassTD', 'PassInt',
+    'RushYds', 'RushTD',
+    'Receptions', 'RecYds', 'RecTD',
+    'FumblesLost', 'TwoPtConvMade', 'TwoPtConvPassing',
+]
+
+STANDARD = {
+    'PassYds': 0.04, 'PassTD': 4, 'PassInt': -2,
+    'RushYds': 0.1, 'RushTD': 6,
+    'Receptions': 0, 'RecYds': 0.1, 'RecTD': 6,
+    'FumblesLost': -2, 'TwoPtConvMade': 2, 'TwoPtConvPassing': 2,
+}
+
+# Points per unit of each stat. Scoring has to be linear in the stats, so
+# yardage bonuses (e.g. DraftKings' +3 at 300 passing yards) are left out.
+# 'standard' and 'ppr' reproduce PFR's FantasyPts and FantasyPtsPPR.
+SCORING = {
+    'standard': STANDARD,
+    'half_ppr': dict(STANDARD, Receptions=0.5),
+    'ppr': dict(STANDARD, Receptions=1),
+    'draftkings': dict(STANDARD, Receptions=1, PassInt=-1, FumblesLost=-1),
+    'fanduel': dict(STANDARD, Receptions=0.5, PassInt=-1),
+}
+
+
+def scoring_matrix(rules: dict) -> np.ndarray:
+    """
+    Matrix of shape (stats, rule sets) with the points per unit of each of
+    STATS under each rule set, so stat_lines @ matrix scores every format.
+    Stats a rule set leaves out score 0.
+    """
+    matrix = np.zeros((len(STATS), len(rules)))
+    for j, (name, points) in enumerate(rules.items()):
+        unknown = [stat for stat in points if stat not in STATS]
+        if unknown:
+            raise ValueError(f"Unknown stats in scoring rules '{name}': {unknown}. Expected some of {STATS}")
+        for stat, value in points.items():
+            matrix[STATS.index(stat), j] = value
+    return matrix
+
+
+def load_rules(path: str) -> dict:
+    """
+    Read scoring rule sets from a JSON file of {name: {stat: points}}. A
+    rule set can start from a built-in one with "base": "ppr".
+    """
+    with open(path) as f:
+        rules = json.load(f)
+    if not isinstance(rules, dict):
+        raise ValueError(f"'{path}' should hold a JSON object of {{name: {{stat: points}}}}")
+
+    loaded = {}
+    for name, points in rules.items():
+        points = dict(points)
+        base = points.pop('base', None)
+        if base is not None and base not in SCORING:
+            raise ValueError(f"Unknown base scoring '{base}' in '{name}', expected one of {list(SCORING)}")
+        loaded[name] = dict(SCORING.get(base, {}), **points)
+    return loaded
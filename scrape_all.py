@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+import json
+import os
+import threading
+from fetcher import Fetcher, DEFAULT_RATE
+from http_cache import HttpCache
+from instrument import traced
+from scrape_data import PFR_RATE, SEASON_TABLES, season_table_url, parse_season_table, merge_season_tables, save_season
+from scrape_rookie_data import scrape_rookie_class
+
+PROGRESS_FILE = os.path.join('data', '.scrape_progress.json')
+KINDS = ['players', 'rookies']
+
+
+class Progress:
+    """
+    Remembers which (kind, year) jobs have been written to data/, so a crashed
+    run can be resumed without redoing finished seasons. Pages fetched by an
+    unfinished job are still in the HTTP cache, so those are cheap to redo.
+    """
+
+    def __init__(self, path=PROGRESS_FILE, resume=False):
+        self.path = path
+        self.lock = threading.Lock()
+        self.completed = set()
+        if resume and os.path.exists(path):
+            with open(path) as f:
+                self.completed = set(json.load(f)['completed'])
+
+    def is_done(self, kind, year) -> bool:
+        return f'{kind}:{year}' in self.completed
+
+    def mark_done(self, kind, year):
+        with self.lock:
+            self.completed.add(f'{kind}:{year}')
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump({'completed': sorted(self.completed)}, f)
+            os.replace(tmp, self.path)
+
+
+@traced()
+def scrape_player_season(year, fetcher):
+    # Queue all four tables at once so they share the fetcher's pool with
+    # every other season being scraped.
+    futures = {
+        table: fetcher.submit(partial(parse_season_table, table), season_table_url(year, table))
+        for table in SEASON_TABLES
+    }
+    tables = {table: future.result() for table, future in futures.items()}
+    return save_season(year, merge_season_tables(year, tables))
+
+
+@traced()
+def scrape_all(years, kinds=KINDS, fetcher=None, resume=False, progress_file=PROGRESS_FILE, store=None):
+    """
+    Scrape every requested (kind, season) pair concurrently. All page fetches
+    go through one shared Fetcher, so the run is bounded by its per-host rate
+    limits rather than by serial latency. Rookie classes read college
+    careers already in `store` (a CollegeStore) from it. Returns the list of
+    failed jobs.
+    """
+    if fetcher is None:
+        fetcher = make_fetcher()
+    progress = Progress(progress_file, resume)
+
+    jobs = []
+    for kind in kinds:
+        for year in years:
+            if progress.is_done(kind, year):
+                print(f"Skipping {kind} {year}, already scraped")
+            else:
+                jobs.append((kind, year))
+
+    scrapers = {
+        'players': scrape_player_season,
+        'rookies': partial(scrape_rookie_class, store=store),
+    }
+
+    failed = []
+    if not jobs:
+        return failed
+
+    # These threads only coordinate; the actual fetching and parsing runs on
+    # the fetcher's bounded pool.
+    try:
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            futures = {pool.submit(scrapers[kind], year, fetcher): (kind, year) for kind, year in jobs}
+            for future in as_completed(futures):
+                kind, year = futures[future]
+                try:
+                    future.result()
+                    progress.mark_done(kind, year)
+                except Exception as e:
+                    print(f"Error scraping {kind} {year}: {e}")
+                    failed.append((kind, year))
+    finally:
+        fetcher.close()
+    return failed
+
+
+def make_fetcher(workers=4, rate=DEFAULT_RATE, pfr_rate=PFR_RATE, use_cache=True):
+    return Fetcher(
+        max_workers=workers,
+        rate=rate,
+        host_rates={'www.pro-football-reference.com': pfr_rate},
+        cache=HttpCache() if use_cache else None,
+    )
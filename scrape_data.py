@@ -1,105 +1,116 @@
 from urllib.request import urlopen
-from bs4 import BeautifulSoup
 import pandas as pd
 import os
 import argparse
-import time
+from fetcher import Fetcher
+from http_cache import HttpCache
+from instrument import traced
+from pfr_parser import read_table, strip_award_markers
+from player_ids import PFR_ID_COLUMN, KEY_COLUMN, merge_players
 
-def scrape_pfr_table(url: str) -> pd.DataFrame:
+# Pro-Football-Reference pages are fetched at most once a second
+PFR_RATE = 1.0
+
+def scrape_pfr_table(url: str, fetcher=None) -> pd.DataFrame:
     """
-    Scrapes a table from a Pro-Football-Reference URL using pandas.
+    Scrapes the first table from a Pro-Football-Reference URL.
     It correctly handles multi-level headers by joining them with an underscore
     to create prefixed column names (e.g., 'Passing_Yds').
     """
     try:
-        # Use pandas to read the first table found on the page.
-        # This is the standard and most robust method.
-        df = pd.read_html(url)[0]
-        
-        # --- THIS IS THE FIX FOR MULTI-LEVEL HEADERS ---
-        # Check if the columns are a MultiIndex (i.e., have multiple header rows)
-        if isinstance(df.columns, pd.MultiIndex):
-            # Join the levels of the MultiIndex to create single, prefixed column names.
-            # If a header level is 'Unnamed', we discard it to avoid prefixes like 'Unnamed_0_level_0_Rk'.
-            new_cols = []
-            for col in df.columns.values:
-                if 'Unnamed' in col[0]:
-                    # If the top-level header is 'Unnamed', just use the second-level header
-                    new_cols.append(col[1])
-                else:
-                    # Otherwise, join the levels with an underscore
-                    new_cols.append('_'.join(col).strip())
-            df.columns = new_cols
-        
-        # Remove the intermittent header rows that PFR includes in the table body
-        df = df[df['Rk'] != 'Rk'].reset_index(drop=True)
-        
-        for i, player in enumerate(df['Player']):
-            if not player:
-                continue
-            # Check if player name ends with +
-            if player.endswith('+'):
-                player = player[:-1]
-                df.at[i, 'FirstTeamAllPro'] = 1
-            
-            # Chec if player name ends with *
-            if player.endswith('*'):
-                player = player[:-1]
-                df.at[i, 'SelectedToProBowl'] = 1
-
-            df.at[i, 'Player'] = player
-
-        df = df.drop_duplicates(subset='Player', keep='first')
-            
-        return df
+        if fetcher is None:
+            html = urlopen(url).read()
+        else:
+            html = fetcher.fetch(url)
+        return parse_pfr_table(url, html)
     except Exception as e:
         print(f"Error scraping or processing URL {url}: {e}")
         return pd.DataFrame()
 
-def main():
-    parser = argparse.ArgumentParser(description="Scrape player stats by year")
-    parser.add_argument("year", type=int, help="Season year to scrape")
+@traced()
+def parse_pfr_table(url: str, html: bytes) -> pd.DataFrame:
+    # Stream-parse just the first stats table. Column names are prefixed with
+    # their over-header (e.g. 'Passing_Yds') and the repeated header rows PFR
+    # puts in the table body are skipped.
+    df = read_table(html)
 
-    args = parser.parse_args()
+    # Move the award markers on player names into flag columns
+    df = strip_award_markers(df)
 
-    year = args.year
+    # PFR repeats a player's row in some tables. With player ids, only true
+    # repeats are dropped rather than every player sharing a name.
+    df = df.drop_duplicates(subset=PFR_ID_COLUMN if PFR_ID_COLUMN in df else 'Player', keep='first')
 
-    fantasy_url = "https://www.pro-football-reference.com/years/{}/fantasy.htm".format(year)
-    adv_rec_url = f"https://www.pro-football-reference.com/years/{year}/receiving_advanced.htm"
-    adv_rush_url = f"https://www.pro-football-reference.com/years/{year}/rushing_advanced.htm"
-    adv_pass_url = f"https://www.pro-football-reference.com/years/{year}/passing_advanced.htm"
+    return df
 
-    print("1/4: Scraping Fantasy stats...")
-    fantasy_df = scrape_pfr_table(fantasy_url)
-    time.sleep(1)
+# (file name, columns already present in the fantasy table)
+SEASON_TABLES = {
+    'fantasy': ('fantasy', []),
+    'adv_pass': ('passing_advanced', ['Rk', 'Team', 'Age', 'Pos', 'G', 'GS', 'Awards']),
+    'adv_rush': ('rushing_advanced', ['Rk', 'Team', 'Age', 'Pos', 'G', 'GS', 'Awards']),
+    'adv_rec': ('receiving_advanced', ['Rk', 'Team', 'Age', 'Pos', 'G', 'GS']),
+}
 
-    print("2/4: Scraping Advanced Receiving stats...")
-    adv_rec_df = scrape_pfr_table(adv_rec_url)
-    adv_rec_df = adv_rec_df.drop(columns=['Rk', 'Team', 'Age', 'Pos', 'G', 'GS'])
-    time.sleep(1)
 
-    print("3/4: Scraping Advanced Rushing stats...")
-    adv_rush_df = scrape_pfr_table(adv_rush_url)
-    adv_rush_df = adv_rush_df.drop(columns=['Rk', 'Team', 'Age', 'Pos', 'G', 'GS', 'Awards'])
-    time.sleep(1)
+def season_table_url(year: int, table: str) -> str:
+    page = SEASON_TABLES[table][0]
+    return f"https://www.pro-football-reference.com/years/{year}/{page}.htm"
 
-    print("4/4: Scraping Advanced Passing stats...")
-    adv_pass_df = scrape_pfr_table(adv_pass_url)
-    adv_pass_df = adv_pass_df.drop(columns=['Rk', 'Team', 'Age', 'Pos', 'G', 'GS', 'Awards'])
 
-    print("Merging all dataframes...")
-    final_df = fantasy_df
-    final_df = pd.merge(final_df, adv_pass_df, on='Player', how='left', suffixes=('', '_pass'))
-    final_df = pd.merge(final_df, adv_rush_df, on='Player', how='left', suffixes=('', '_rush'))
-    final_df = pd.merge(final_df, adv_rec_df, on='Player', how='left', suffixes=('', '_rec'))
+@traced()
+def scrape_season_table(year: int, table: str, fetcher=None) -> pd.DataFrame:
+    df = scrape_pfr_table(season_table_url(year, table), fetcher)
+    return df.drop(columns=SEASON_TABLES[table][1])
+
+
+def parse_season_table(table: str, url: str, html: bytes) -> pd.DataFrame:
+    df = parse_pfr_table(url, html)
+    return df.drop(columns=SEASON_TABLES[table][1])
+
+
+@traced()
+def merge_season_tables(year: int, tables: dict) -> pd.DataFrame:
+    # Join on integer player keys rather than names, then drop them since
+    # they are only meaningful next to the index they came from
+    final_df = tables['fantasy']
+    final_df = merge_players(final_df, tables['adv_pass'], how='left', suffixes=('', '_pass'))
+    final_df = merge_players(final_df, tables['adv_rush'], how='left', suffixes=('', '_rush'))
+    final_df = merge_players(final_df, tables['adv_rec'], how='left', suffixes=('', '_rec'))
+    final_df = final_df.drop(columns=KEY_COLUMN)
 
     final_df['Year'] = year
+    return final_df
+
 
+@traced()
+def save_season(year: int, final_df: pd.DataFrame) -> str:
     os.makedirs('data', exist_ok=True)
     filepath = os.path.join('data', '{}playerstats.csv'.format(year))
 
     final_df.to_csv(filepath, index=False)
     print(f"Player data for the year {year} has been created and saved to: {filepath}")
+    return filepath
+
+
+@traced()
+def main():
+    parser = argparse.ArgumentParser(description="Scrape player stats by year")
+    parser.add_argument("year", type=int, help="Season year to scrape")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-download pages instead of using the HTTP cache")
+
+    args = parser.parse_args()
+
+    year = args.year
+    cache = None if args.no_cache else HttpCache()
+    fetcher = Fetcher(rate=PFR_RATE, cache=cache)
+
+    tables = {}
+    for i, table in enumerate(SEASON_TABLES, start=1):
+        print(f"{i}/{len(SEASON_TABLES)}: Scraping {table} stats...")
+        tables[table] = scrape_season_table(year, table, fetcher)
+
+    print("Merging all dataframes...")
+    save_season(year, merge_season_tables(year, tables))
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -2,9 +2,14 @@ from urllib.request import urlopen
 from bs4 import BeautifulSoup
 import pandas as pd
 import argparse
-import time
 from enum import Enum
 import os
+from college_store import CollegeStore
+from fetcher import Fetcher, DEFAULT_RATE
+from http_cache import HttpCache
+from instrument import count, traced
+from pfr_parser import find_rows
+from player_ids import PFR_ID_COLUMN
 
 
 class Position(Enum):
@@ -14,140 +19,194 @@ class Position(Enum):
     WR = "receiving"
     TE = "receiving"
 
-def extract_college_position_stats(soup, url, college_career_stats, pos):
-    # Extract passing stats
-    pos = pos.value
-    found_stats = True
-    table = soup.find('table', id=pos+'_standard')
-    if not table:
-        # print(f"Could not find", pos + f"_standard table at {url}")
-        found_stats = False
-    else:    
-        tfoot = table.find('tfoot')
-        if not tfoot:
-            # print(f"Could not find tfoot in", pos + f"_standard table at {url}")
-            found_stats = False
-        else: 
-            career_row = None
-            career_row_id = f"{table.get('id', pos+'_standard')}.Career"
-            career_row = tfoot.find('tr', id=career_row_id)
-
-            if not career_row:
-                print("Manual search for", pos, "career row")
-                for row_in_footer in tfoot.find_all('tr'):
-                    first_header_cell = row_in_footer.find('th')
-                    if first_header_cell and 'Career' in first_header_cell.get_text(strip=True):
-                        career_row = row_in_footer
-                        break
-            
-            if not career_row:
-                # print(f"Could not find", pos + f"_table Career row in table footer at {url}")
-                found_stats = False
-    
-    if(found_stats is True):
-        # Extract all data-stat attributes from the pos career row
-        non_data_labels = ["year_id", "pos" , "awards"]
-        for cell in career_row.find_all(['th', 'td']):
-            if cell.has_attr('data-stat'):
-                stat_label = cell['data-stat']
-                stat_value = cell.get_text(strip = True)
-
-                # Skip all non data labels
-                if stat_label in non_data_labels: 
-                    continue
-                
-                # Attempt to cast stat_value to a float
-                try:
-                    stat_value = float(stat_value)
-                except ValueError:
-                    print("ValueError in extract_college_position_stats() when trying to cast attribute", stat_label, "with value", stat_value, "to a float. Setting value to pd.NA")
-                    stat_value = pd.NA
-                
-                column_name = f"Coll_{stat_label}"
-                college_career_stats[column_name] = stat_value
-
-
-def extract_college_career_stats(url):
-    if not url or not isinstance(url, str) or not url.startswith('http'):
-        print(f"Invalid or missing URL: {url}")
-        return {}
-    
-    print(f"Fetching college data from: {url}")
-    college_career_stats = {}
-    html = urlopen(url)
-    soup = BeautifulSoup(html, features="lxml")
-
-    extract_college_position_stats(soup, url, college_career_stats, Position.QB)
-    extract_college_position_stats(soup, url, college_career_stats, Position.RB)
-    extract_college_position_stats(soup, url, college_career_stats, Position.WR)
-     
-    return college_career_stats
-
-
-
-
-parser = argparse.ArgumentParser(description="Scrape rookie stats by year")
-parser.add_argument("year", type=int, help="Season year to scrape")
+def career_table_id(pos):
+    return pos.value + '_standard'
 
-args = parser.parse_args()
 
-year = args.year
+def extract_college_position_stats(career_rows, url, college_career_stats, pos):
+    table_id = career_table_id(pos)
+    career_row = career_rows.get(table_id)
+    if career_row is None:
+        # print(f"Could not find", table_id, f"Career row at {url}")
+        return
 
-url = f"https://www.pro-football-reference.com/years/{year}/draft.htm"
-html = urlopen(url)
-soup = BeautifulSoup(html, features="lxml")
+    # Extract all data-stat attributes from the pos career row
+    non_data_labels = ["year_id", "pos" , "awards"]
+    for stat_label, stat_value in career_row.items():
+        # Skip all non data labels
+        if stat_label in non_data_labels: 
+            continue
+        
+        # Attempt to cast stat_value to a float
+        try:
+            stat_value = float(stat_value)
+        except ValueError:
+            print("ValueError in extract_college_position_stats() when trying to cast attribute", stat_label, "with value", stat_value, "to a float. Setting value to pd.NA")
+            stat_value = pd.NA
+        
+        column_name = f"Coll_{stat_label}"
+        college_career_stats[column_name] = stat_value
 
-headers = [th.getText() for th in soup.findAll("tr")[1].findAll("th")]
-headers = headers[1:]
 
-rows = soup.findAll("tr", class_ = lambda table_rows: table_rows != "thead")
-player_stats = []
-for i in range(len(rows)):
-    td_elements = rows[i].findAll("td")
+COLLEGE_POSITIONS = [Position.QB, Position.RB, Position.WR]
 
-    current_row_values = []
-    for j, td_tag in enumerate(td_elements):
-        # Extract out the URL to get college stats
-        if j == len(td_elements) - 1:
-            anchor_tag = td_tag.find('a')
-            if anchor_tag and anchor_tag.has_attr('href'):
-                href_value = anchor_tag['href']
-                current_row_values.append(href_value)
-        else:
-            current_row_values.append(td_tag.getText())
-    
-    player_stats.append(current_row_values)
 
+@traced()
+def parse_college_career_stats(url, html):
+    college_career_stats = {}
+    # Only the Career footer rows are needed, so pull just those rows out of
+    # the page in one streaming pass instead of building a full soup.
+    targets = {career_table_id(pos): f"{career_table_id(pos)}.Career" for pos in COLLEGE_POSITIONS}
+    career_rows = find_rows(html, targets)
 
-stats = pd.DataFrame(player_stats, columns = headers)
-stats.rename(columns={"": "Link"}, inplace=True)
-
-# Only keep rookies in fantasy positions
-fantasy_positions = ['QB', 'WR', 'TE', 'RB', 'FB']
-stats = stats[stats['Pos'].isin(fantasy_positions)]
-
-# Remove all rookies with no college stats
-is_string = stats['Link'].apply(lambda x: isinstance(x, str))
-starts_with_http = stats['Link'].str.startswith('http', na=False)
-stats = stats[is_string & starts_with_http]
-
-# extract_college_career_stats("http://www.sports-reference.com/cfb/players/caleb-williams-3.html")
-for index, player_data_row in stats.iterrows():
-    college_career_stats = extract_college_career_stats(player_data_row["Link"])
-    for column_name, column_val in college_career_stats.items():
-        # if column_name not in stats:
-        #     stats[column_name] = pd.NA
-        stats.loc[index, column_name] = column_val
-    
-    time.sleep(10)
+    for pos in COLLEGE_POSITIONS:
+        extract_college_position_stats(career_rows, url, college_career_stats, pos)
+     
+    return college_career_stats
 
-os.makedirs('data', exist_ok=True)
-filepath = os.path.join('data', f"{year}rookiestats.csv")
-stats.to_csv(filepath)
 
-print(f"Rookie data for the year {year} has been created.")
+@traced()
+def extract_college_career_stats(url, fetcher=None, store=None):
+    if not url or not isinstance(url, str) or not url.startswith('http'):
+        print(f"Invalid or missing URL: {url}")
+        return {}
 
+    if store is not None:
+        college_career_stats = store.get(url)
+        if college_career_stats is not None:
+            return college_career_stats
 
+    print(f"Fetching college data from: {url}")
+    if fetcher is None:
+        html = urlopen(url).read()
+    else:
+        html = fetcher.fetch(url)
+
+    college_career_stats = parse_college_career_stats(url, html)
+    if store is not None:
+        store.put(url, college_career_stats)
+    return college_career_stats
 
 
+@traced()
+def college_career_records(links, fetcher, store=None):
+    """
+    {link: college career stats} for every link. Links already in the store
+    are read from it; the rest are fetched concurrently, parsed and stored.
+    Links that fail to fetch or parse are left out.
+    """
+    links = list(dict.fromkeys(links))
+    records = store.get_many(links) if store is not None else {}
+    if records:
+        print(f"Read college data for {len(records)}/{len(links)} players from the store")
+        count('store_hits', len(records))
+
+    # The fetcher's per-host token bucket keeps the same politeness as the
+    # old sleep(10) between pages, but page downloads and parsing overlap
+    # across workers.
+    missing = [link for link in links if link not in records]
+    for i, (link, college_career_stats) in enumerate(fetcher.map(parse_college_career_stats, missing), start=1):
+        if isinstance(college_career_stats, Exception):
+            print(f"Error fetching college data from {link}: {college_career_stats}")
+            continue
+
+        print(f"{i}/{len(missing)}: Fetched college data from: {link}")
+        records[link] = college_career_stats
+        if store is not None:
+            store.put(link, college_career_stats)
+    return records
+
+
+def draft_url(year: int) -> str:
+    return f"https://www.pro-football-reference.com/years/{year}/draft.htm"
+
+
+@traced()
+def scrape_draft_class(year, fetcher):
+    html = fetcher.fetch(draft_url(year))
+    soup = BeautifulSoup(html, features="lxml")
 
+    headers = [th.getText() for th in soup.findAll("tr")[1].findAll("th")]
+    headers = headers[1:]
+
+    rows = soup.findAll("tr", class_ = lambda table_rows: table_rows != "thead")
+    player_stats = []
+    player_ids = []
+    for i in range(len(rows)):
+        td_elements = rows[i].findAll("td")
+        player_ids.append(next((td.get("data-append-csv") for td in td_elements if td.get("data-stat") == "player"), None))
+
+        current_row_values = []
+        for j, td_tag in enumerate(td_elements):
+            # Extract out the URL to get college stats
+            if j == len(td_elements) - 1:
+                anchor_tag = td_tag.find('a')
+                if anchor_tag and anchor_tag.has_attr('href'):
+                    href_value = anchor_tag['href']
+                    current_row_values.append(href_value)
+            else:
+                current_row_values.append(td_tag.getText())
+        
+        player_stats.append(current_row_values)
+
+
+    stats = pd.DataFrame(player_stats, columns = headers)
+    stats.rename(columns={"": "Link"}, inplace=True)
+    if any(player_ids):
+        stats.insert(stats.columns.get_loc("Player") + 1, PFR_ID_COLUMN, player_ids)
+
+    # Only keep rookies in fantasy positions
+    fantasy_positions = ['QB', 'WR', 'TE', 'RB', 'FB']
+    stats = stats[stats['Pos'].isin(fantasy_positions)]
+
+    # Remove all rookies with no college stats
+    is_string = stats['Link'].apply(lambda x: isinstance(x, str))
+    starts_with_http = stats['Link'].str.startswith('http', na=False)
+    return stats[is_string & starts_with_http]
+
+
+@traced()
+def add_college_stats(stats, fetcher, store=None):
+    # extract_college_career_stats("http://www.sports-reference.com/cfb/players/caleb-williams-3.html")
+    records = college_career_records(stats['Link'], fetcher, store)
+
+    # Build every Coll_* column at once rather than growing the frame a cell
+    # at a time; rookies without a record get NaN
+    college = pd.DataFrame.from_records([records.get(link, {}) for link in stats['Link']], index=stats.index)
+    return pd.concat([stats, college], axis=1)
+
+
+@traced()
+def save_rookie_class(year, stats):
+    os.makedirs('data', exist_ok=True)
+    filepath = os.path.join('data', f"{year}rookiestats.csv")
+    stats.to_csv(filepath)
+
+    print(f"Rookie data for the year {year} has been created.")
+    return filepath
+
+
+def scrape_rookie_class(year, fetcher, store=None):
+    stats = scrape_draft_class(year, fetcher)
+    stats = add_college_stats(stats, fetcher, store)
+    return save_rookie_class(year, stats)
+
+
+@traced()
+def main():
+    parser = argparse.ArgumentParser(description="Scrape rookie stats by year")
+    parser.add_argument("year", type=int, help="Season year to scrape")
+    parser.add_argument("--workers", type=int, default=4, help="Number of concurrent fetch/parse workers")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Max requests per second to each host")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always re-download pages instead of using the HTTP cache and college career store")
+
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else HttpCache()
+    store = None if args.no_cache else CollegeStore()
+    fetcher = Fetcher(max_workers=args.workers, rate=args.rate, cache=cache)
+    scrape_rookie_class(args.year, fetcher, store)
+
+if __name__ == '__main__':
+    main()
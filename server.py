@@ -0,0 +1,359 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote
+import json
+import os
+import threading
+import time
+import numpy as np
+from draft import DraftBoard, LeagueSettings
+from features import feature_block
+from projections import MODELS, check_files, data_path, model_path, load_data, load_models, label_projections, project_all, rank_projections
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8025
+# Seconds between keep-alive comments on an idle /draft/events stream
+EVENTS_KEEPALIVE = 15
+
+
+class ProjectionService:
+    """
+    Keeps every model, data file and the ranked projections for one season
+    in memory.
+
+    Before answering, the service stats its model and data files. If any of
+    them changed, only those are reloaded, the rankings are rebuilt and the
+    response cache is cleared. Otherwise requests are served from memory,
+    and repeated GETs are served straight from the response cache.
+
+    It also runs one live draft (see draft.DraftBoard) over the rankings.
+    """
+
+    def __init__(self, year: int, models_dir='models', use_store=False, settings=None):
+        self.year = year
+        self.models_dir = models_dir
+        self.use_store = use_store
+        self.lock = threading.Lock()
+        self.mtimes = {}
+        self.missing = set()
+        self.dfs = {}
+        self.models = {}
+        self.rows = {}
+        self.responses = {}
+        self.version = 0
+        self.settings = settings
+        self.draft = None
+        check_files(year, models_dir=models_dir, use_store=use_store)
+        self.refresh()
+
+    def source_paths(self, name: str) -> tuple:
+        if self.use_store:
+            from datastore import partition_dir
+
+            kind, pos, _ = MODELS[name]
+            data_year = self.year - 1 if kind == 'players' else self.year
+            data_file = os.path.join(partition_dir(kind, data_year, pos), 'part-0.parquet')
+        else:
+            data_file = data_path(name, self.year)
+        return model_path(name, self.models_dir), data_file
+
+    def refresh(self):
+        """
+        Reload whatever changed on disk since the last call.
+        """
+        with self.lock:
+            stale_models, stale_data = [], []
+            for name in MODELS:
+                model_file, data_file = self.source_paths(name)
+                try:
+                    mtimes = (os.stat(model_file).st_mtime_ns, os.stat(data_file).st_mtime_ns)
+                except FileNotFoundError as e:
+                    if name not in self.mtimes:
+                        raise
+                    # Mid-replacement or deleted: keep serving what is loaded
+                    if name not in self.missing:
+                        print(f"Keeping the loaded {name} model and data, '{e.filename}' is missing")
+                        self.missing.add(name)
+                    continue
+                self.missing.discard(name)
+                previous = self.mtimes.get(name)
+                if previous is None or previous[0] != mtimes[0]:
+                    stale_models.append(name)
+                if previous is None or previous[1] != mtimes[1]:
+                    stale_data.append(name)
+                self.mtimes[name] = mtimes
+
+            if not stale_models and not stale_data:
+                return
+
+            if stale_models:
+                self.models.update(load_models(stale_models, self.models_dir))
+            if stale_data:
+                self.dfs.update(load_data(self.year, stale_data, self.use_store))
+            for name in set(stale_models) | set(stale_data):
+                features = self.models[name].features
+                outputs, values = feature_block(self.dfs[name], name)
+                self.rows[name] = {'values': values[:, [outputs.index(f) for f in features]]}
+            self.rank()
+            self.responses = {}
+            self.version += 1
+            print(f"Loaded models {stale_models} and data {stale_data} (version {self.version})")
+
+    def rank(self):
+        all_projections = label_projections(project_all(self.dfs, self.models))
+        for df in all_projections.values():
+            # Each row's position in its model's feature rows, so players who
+            # share a name keep their own features
+            df['Row'] = np.arange(len(df))
+        ranked = rank_projections(all_projections)
+        self.ranked_rows = ranked.pop('Row').to_numpy()
+        ranked.insert(0, 'Rank', np.arange(1, len(ranked) + 1))
+        self.ranked = ranked
+        # Projected_Pts - VBD is the same for every player at a position
+        baselines = (ranked['Projected_Pts'] - ranked['VBD']).groupby(ranked['Pos']).first()
+        self.baselines = baselines.to_dict()
+        self.ranked_records = ranked.to_dict('records')
+        if self.draft is None:
+            self.draft = DraftBoard(ranked, self.settings)
+        else:
+            # Keeps the picks made so far
+            self.draft.load(ranked)
+
+    # --- Queries ---
+
+    def ranked_projections(self, pos=None, limit=None, offset=0) -> list:
+        records = self.ranked_records
+        if pos is not None:
+            records = [r for r in records if r['Pos'] == pos.upper()]
+        end = None if limit is None else offset + limit
+        return records[offset:end]
+
+    def player(self, name: str) -> list:
+        """
+        Every ranked row for `name` (case insensitive), with the features the
+        player's model used.
+        """
+        name = name.lower()
+        matches = []
+        for record, row in zip(self.ranked_records, self.ranked_rows):
+            if record['Player'].lower() != name:
+                continue
+            rows = self.rows[record['Model']]
+            features = self.models[record['Model']].features
+            matches.append(dict(record, Features=dict(zip(features, rows['values'][row].tolist()))))
+        return matches
+
+    def what_if(self, name: str, stats: dict, model_name=None, rank=None) -> dict:
+        """
+        Re-project a player with some of their per-game features replaced.
+        VBD is measured against the current baseline at their position.
+        Players who share a name are told apart by model or overall rank.
+        """
+        if not isinstance(name, str):
+            raise ValueError("Expected 'player' to be a name")
+        if not isinstance(stats, dict):
+            raise ValueError("Expected 'stats' to be an object of feature values")
+        matches = [r for r in self.player(name)
+                   if (model_name is None or r['Model'] == model_name) and (rank is None or r['Rank'] == int(rank))]
+        if not matches:
+            raise KeyError(f"No player named '{name}'")
+        if len(matches) > 1:
+            raise ValueError(f"'{name}' matches several players, pass 'model' or 'rank' to pick one")
+        record = matches[0]
+        model = self.models[record['Model']]
+
+        unknown = [stat for stat in stats if stat not in model.features]
+        if unknown:
+            raise ValueError(f"Unknown features for the {record['Model']} model: {unknown}. "
+                             f"Expected some of {model.features}")
+
+        features = dict(record['Features'])
+        features.update({stat: float(value) for stat, value in stats.items()})
+        projected = float(model.predict([features[f] for f in model.features]))
+        return {
+            'Player': record['Player'],
+            'Pos': record['Pos'],
+            'Model': record['Model'],
+            'Features': features,
+            'Projected_Pts': projected,
+            'VBD': projected - self.baselines[record['Pos']],
+            'Previous_Pts': record['Projected_Pts'],
+        }
+
+    def draft_action(self, action: str, request: dict) -> dict:
+        """
+        pick/undo a player (by 'id', or 'player' and optionally 'model'),
+        reset the draft, or change the league 'settings'.
+        """
+        draft = self.draft
+        if action in ('pick', 'undo') and ('id' in request or 'player' in request):
+            i = int(request['id']) if 'id' in request else draft.find(request['player'], request.get('model'))
+            draft.pick(i) if action == 'pick' else draft.undo(i)
+        elif action == 'undo':
+            draft.undo()
+        elif action == 'pick':
+            raise ValueError("Expected an 'id' or 'player' to pick")
+        elif action == 'reset':
+            draft.reset()
+        elif action == 'settings':
+            draft.configure(LeagueSettings.from_dict(request))
+        else:
+            raise KeyError(f"Unknown draft action '{action}'")
+        return draft.state()
+
+
+class ProjectionHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health
+    GET  /projections?pos=WR&limit=50&offset=0
+    GET  /players/<name>
+    POST /whatif  {"player": "...", "stats": {"RecYdsPerGame": 90}, "model": optional, "rank": optional}
+
+    GET  /draft?pos=RB&limit=50   live baselines, picks and board
+    GET  /draft/events            server-sent events with the draft state
+    POST /draft/pick  {"id": 3} or {"player": "...", "model": optional}
+    POST /draft/undo  the same, or {} for the last pick
+    POST /draft/reset
+    POST /draft/settings  {"teams": 10, "starters": {"QB": 2}, "scoring": {"TE": 1.5}}
+    """
+
+    service = None
+
+    def send_json(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status: int, message: str):
+        self.send_json(status, json.dumps({'error': message}).encode())
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
+
+    def send_events(self):
+        """
+        Stream the draft state on every change. The first event, and any
+        after the player pool changed, also carry the players.
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+
+        draft = self.service.draft
+        version, pool = -1, None
+        try:
+            while True:
+                if not draft.wait(version, EVENTS_KEEPALIVE):
+                    self.wfile.write(b': keep-alive\n\n')
+                    self.wfile.flush()
+                    continue
+                state = draft.state(players=draft.pool != pool)
+                version, pool = state['version'], state['pool']
+                self.wfile.write(f"event: draft\ndata: {json.dumps(state)}\n\n".encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_GET(self):
+        service = self.service
+        service.refresh()
+
+        if self.path.startswith('/draft/events'):
+            self.send_events()
+            return
+
+        version = service.version
+        cached = service.responses.get(self.path)
+        if cached is not None:
+            self.send_json(200, cached)
+            return
+
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            if url.path == '/health':
+                result = {'year': service.year, 'version': service.version, 'players': len(service.ranked_records)}
+            elif url.path == '/projections':
+                limit = int(query['limit']) if 'limit' in query else None
+                result = service.ranked_projections(query.get('pos'), limit, int(query.get('offset', 0)))
+            elif url.path == '/draft':
+                limit = int(query['limit']) if 'limit' in query else None
+                result = dict(service.draft.state(), board=service.draft.board(query.get('pos'), limit))
+            elif url.path.startswith('/players/'):
+                result = service.player(unquote(url.path[len('/players/'):]))
+                if not result:
+                    self.send_error_json(404, f"No player named '{unquote(url.path[len('/players/'):])}'")
+                    return
+            else:
+                self.send_error_json(404, f"Unknown endpoint '{url.path}'")
+                return
+        except ValueError as e:
+            self.send_error_json(400, str(e))
+            return
+
+        body = json.dumps(result).encode()
+        if url.path not in ('/health', '/draft'):
+            with service.lock:
+                # A refresh since this request started may have built the
+                # body from data it has since replaced
+                if service.version == version:
+                    service.responses[self.path] = body
+        self.send_json(200, body)
+
+    def do_POST(self):
+        service = self.service
+        service.refresh()
+
+        path = urlparse(self.path).path
+        if path != '/whatif' and not path.startswith('/draft/'):
+            self.send_error_json(404, f"Unknown endpoint '{self.path}'")
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length)) if length else {}
+            if not isinstance(request, dict):
+                raise ValueError("Expected a JSON object")
+            if path.startswith('/draft/'):
+                result = service.draft_action(path[len('/draft/'):], request)
+            elif 'player' not in request:
+                raise ValueError("Expected a JSON object with a 'player' field")
+            else:
+                result = service.what_if(request['player'], request.get('stats', {}), request.get('model'),
+                                         request.get('rank'))
+        except KeyError as e:
+            self.send_error_json(404, e.args[0])
+            return
+        except (ValueError, TypeError) as e:
+            self.send_error_json(400, str(e))
+            return
+        self.send_json(200, json.dumps(result).encode())
+
+    def log_message(self, format, *args):
+        if self.service.verbose:
+            super().log_message(format, *args)
+
+
+def serve(year: int, host=DEFAULT_HOST, port=DEFAULT_PORT, models_dir='models', use_store=False, verbose=False,
+          settings=None):
+    start = time.perf_counter()
+    service = ProjectionService(year, models_dir, use_store, settings)
+    service.verbose = verbose
+    print(f"Loaded {len(service.ranked_records)} projections in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    handler = type('Handler', (ProjectionHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving {year} projections on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
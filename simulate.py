@@ -0,0 +1,162 @@
+import os
+import numpy as np
+import pandas as pd
+from features import FEATURE_SPECS
+from projections import MODELS, BASELINE_RANKS, Position, timed, check_files, load_data, load_models, project_all
+from train import load_training_data
+
+METHODS = ['residual', 'bootstrap']
+PERCENTILES = [10, 50, 90]
+
+
+def refit_estimator(name: str, models_dir='models'):
+    # The saved model's estimator, unfitted, with the same hyperparameters.
+    # Packages pickled by an older sklearn can lack newer parameters, which
+    # breaks sklearn.base.clone, so those keep their defaults.
+    import joblib
+
+    model = joblib.load(os.path.join(models_dir, f'{name}_model.joblib'))['model']
+    estimator = type(model)()
+    return estimator.set_params(**{key: getattr(model, key) for key in estimator.get_params(deep=False)
+                                   if hasattr(model, key)})
+
+
+def model_residuals(models: dict, years, models_dir='models') -> dict:
+    """
+    Out-of-sample residuals (actual - predicted) of each model, walked
+    forward through `years` like backtest: every sample season with earlier
+    ones is predicted by the model's features and estimator refit on all the
+    seasons before it. The saved models were fit on these seasons, so their
+    own residuals would understate the error on a new one.
+    """
+    from sklearn.preprocessing import StandardScaler
+    # backtest imports this module's batched_ranks
+    from backtest import walk_forward
+
+    years = sorted(years)
+    data = load_training_data(list(models), years)
+    residuals = {}
+    for name, model in models.items():
+        columns = [output for output, _, _ in FEATURE_SPECS[name]]
+        index = [columns.index(f) for f in model.features]
+        errors = []
+        for train_years, test_year in walk_forward(name, years):
+            X = np.vstack([data[name][year][0] for year in train_years])[:, index]
+            y = np.concatenate([data[name][year][1] for year in train_years])
+            scaler = StandardScaler().fit(X)
+            estimator = refit_estimator(name, models_dir).fit(scaler.transform(X), y)
+            X_test, y_test, _ = data[name][test_year]
+            errors.append(y_test - estimator.predict(scaler.transform(X_test[:, index])))
+        if not errors:
+            raise ValueError(f"{name} needs at least two seasons of samples in {years} to measure its error")
+        residuals[name] = np.concatenate(errors)
+    return residuals
+
+
+def draw_noise(rng, residuals, size: tuple, method='residual'):
+    """
+    Noise for `size` = (draws, players) from one model's residuals: normal
+    with their standard error, or resampled from them directly.
+    """
+    if method == 'bootstrap':
+        return rng.choice(residuals, size=size).astype(np.float32)
+    if method == 'residual':
+        sigma = np.sqrt(np.mean(residuals ** 2))
+        return rng.normal(0.0, sigma, size=size).astype(np.float32)
+    raise ValueError(f"Unknown simulation method '{method}', expected one of {METHODS}")
+
+
+def batched_vbd(points, positions: np.ndarray):
+    """
+    VBD of every player in every draw. points is (draws, players) and each
+    position's baseline is its BASELINE_RANKS-th best player within the same
+    draw, found for all draws at once with np.partition.
+    """
+    vbd = np.empty_like(points)
+    for pos in Position:
+        columns = np.flatnonzero(positions == pos.name)
+        if len(columns) == 0:
+            continue
+        k = min(BASELINE_RANKS[pos], len(columns))
+        block = points[:, columns]
+        baseline = np.partition(block, len(columns) - k, axis=1)[:, len(columns) - k]
+        vbd[:, columns] = block - baseline[:, None]
+    return vbd
+
+
+def batched_ranks(values):
+    """
+    1-based rank of every column within each row, highest value first.
+    """
+    order = np.argsort(-values, axis=1, kind='stable')
+    ranks = np.empty(values.shape, dtype=np.int32)
+    rows = np.arange(values.shape[0])[:, None]
+    ranks[rows, order] = np.arange(1, values.shape[1] + 1, dtype=np.int32)
+    return ranks
+
+
+def simulate(year: int, draws=5000, method='residual', seed=None, years=None, models_dir='models',
+             use_store=False, timings=None) -> pd.DataFrame:
+    """
+    Simulate `draws` seasons for every player in the projection pool and
+    summarize each player's points, VBD and overall rank across them.
+    """
+    timings = {} if timings is None else timings
+    years = range(2020, year) if years is None else years
+
+    check_files(year, models_dir=models_dir, use_store=use_store)
+    with timed(timings, 'load'):
+        dfs = load_data(year, use_store=use_store)
+        models = load_models(models_dir=models_dir)
+    with timed(timings, 'residuals'):
+        residuals = model_residuals(models, years, models_dir)
+    with timed(timings, 'project'):
+        all_projections = project_all(dfs, models)
+
+    with timed(timings, 'draw'):
+        rng = np.random.default_rng(seed)
+        points, frames = [], []
+        for name, df in all_projections.items():
+            base = df['Projected_Pts'].to_numpy(dtype=np.float32)
+            points.append(base + draw_noise(rng, residuals[name], (draws, len(base)), method))
+            frames.append(df.assign(Pos=MODELS[name][2].name, Model=name))
+        points = np.hstack(points)
+        pool = pd.concat(frames, ignore_index=True)
+        positions = pool['Pos'].to_numpy()
+
+    with timed(timings, 'vbd + ranks'):
+        vbd = batched_vbd(points, positions)
+        ranks = batched_ranks(vbd)
+        point_vbd = batched_vbd(pool['Projected_Pts'].to_numpy()[None, :], positions)[0]
+
+    with timed(timings, 'summarize'):
+        floor, median, ceiling = np.percentile(points, PERCENTILES, axis=0)
+        summary = pd.DataFrame({
+            'Player': pool['Player'],
+            'Pos': pool['Pos'],
+            'Model': pool['Model'],
+            'Projected_Pts': pool['Projected_Pts'],
+            'VBD': point_vbd,
+            'Mean_Pts': points.mean(axis=0),
+            'Floor_Pts': floor,
+            'Median_Pts': median,
+            'Ceiling_Pts': ceiling,
+            'Std_Pts': points.std(axis=0),
+            'Mean_VBD': vbd.mean(axis=0),
+            'P_Beats_Baseline': (vbd > 0).mean(axis=0),
+            'Median_Rank': np.median(ranks, axis=0),
+            'Best_Rank_P10': np.percentile(ranks, 10, axis=0),
+            'Worst_Rank_P90': np.percentile(ranks, 90, axis=0),
+        })
+        summary.sort_values(by='Mean_VBD', ascending=False, inplace=True)
+        summary.reset_index(drop=True, inplace=True)
+    return summary
+
+
+def save_simulation(year: int, summary, output_dir='projections') -> str:
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, f'{year}_simulation.csv')
+    summary.to_csv(filepath)
+
+    print(f"{year} simulation has been created.")
+    return filepath
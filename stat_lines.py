@@ -0,0 +1,119 @@
+import os
+import numpy as np
+import pandas as pd
+from features import FEATURE_SPECS, feature_block
+from projections import MODELS, BASELINE_RANKS, Position, timed, check_files, load_data, load_models, model_blocks, predict_all
+from scoring import STATS, SCORING, scoring_matrix
+from train import TARGETS, sample_frame, sample_years, fit, save_package
+
+ARTIFACT = 'stats_model'
+
+
+# --- Training ---
+
+def stat_targets(name: str, df: pd.DataFrame) -> np.ndarray:
+    # The projected season's STATS, 0 where PFR left them blank (or, for
+    # rookies, where they did not play)
+    columns = STATS if TARGETS[name] == 'rookie_season' else [f'{stat}_next' for stat in STATS]
+    return df[columns].fillna(0).to_numpy(dtype=np.float64)
+
+
+def stat_samples(name: str, years, features) -> tuple:
+    """
+    Every season's rows for a model's stat line model: (X, Y) with the
+    model's features and a column per stat.
+    """
+    columns = [output for output, _, _ in FEATURE_SPECS[name]]
+    index = [columns.index(f) for f in features]
+    frames = {}
+    Xs, Ys = [], []
+    for year in sample_years(name, years):
+        df = sample_frame(name, year, frames)
+        _, X = feature_block(df, name)
+        Xs.append(X[:, index])
+        Ys.append(stat_targets(name, df))
+    return np.vstack(Xs), np.vstack(Ys)
+
+
+def train_stat_models(names=MODELS, years=range(2020, 2025), estimator='linear', models_dir='models', save=True):
+    """
+    Fit one multi-output model per position model, on the same features as
+    its points model, predicting next season's STATS. Saved as
+    models/{name}_stats_model.joblib and .fbm.
+    """
+    for name in names:
+        features = load_models([name], models_dir)[name].features
+        X, Y = stat_samples(name, sorted(years), features)
+        scaler, model = fit(estimator, pd.DataFrame(X, columns=features), Y)
+        print(f"{name}: {len(X)} rows, {len(STATS)} stats from {features}")
+        if save:
+            package = {'model': model, 'scaler': scaler, 'features': features, 'outputs': list(STATS)}
+            print(f"    saved to '{save_package(name, package, models_dir, ARTIFACT)}'")
+
+
+# --- Projection ---
+
+def project_stat_lines(dfs: dict, models: dict) -> pd.DataFrame:
+    """
+    Every player's projected STATS from the stat line models, in one matrix
+    product over all of them (see predict_all). A linear fit can go below
+    zero for stats a player barely records (a receiver's passing yards, a
+    backup's TDs), and no season total can, so those are clipped to 0.
+    """
+    preds = predict_all(model_blocks(dfs, models), models)
+    frames = []
+    for name in models:
+        lines = np.maximum(np.atleast_2d(preds[name]).reshape(len(dfs[name]), -1), 0.0)
+        frame = pd.DataFrame(lines, columns=STATS)
+        frame.insert(0, 'Player', dfs[name]['Player'].to_numpy())
+        frame.insert(1, 'Pos', MODELS[name][2].name)
+        frame.insert(2, 'Model', name)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def score_formats(stat_lines: pd.DataFrame, rules: dict) -> pd.DataFrame:
+    """
+    Points and VBD under every rule set at once: the stat block times the
+    scoring matrix, then one partition per position for all baselines.
+    Adds Pts_{format} and VBD_{format} columns.
+    """
+    points = stat_lines[STATS].to_numpy(dtype=np.float64) @ scoring_matrix(rules)
+    vbd = np.empty_like(points)
+    positions = stat_lines['Pos'].to_numpy()
+    for pos in Position:
+        rows = np.flatnonzero(positions == pos.name)
+        if len(rows) == 0:
+            continue
+        k = min(BASELINE_RANKS[pos], len(rows))
+        baselines = np.partition(points[rows], len(rows) - k, axis=0)[len(rows) - k]
+        vbd[rows] = points[rows] - baselines
+
+    columns = {}
+    for j, name in enumerate(rules):
+        columns[f'Pts_{name}'] = points[:, j]
+        columns[f'VBD_{name}'] = vbd[:, j]
+    return pd.concat([stat_lines, pd.DataFrame(columns, index=stat_lines.index)], axis=1)
+
+
+def build_formats(year: int, rules=SCORING, models_dir='models', use_store=False, timings=None) -> pd.DataFrame:
+    timings = {} if timings is None else timings
+    check_files(year, models_dir=models_dir, use_store=use_store, artifact=ARTIFACT)
+    with timed(timings, 'load'):
+        dfs = load_data(year, use_store=use_store)
+        models = load_models(models_dir=models_dir, artifact=ARTIFACT)
+    with timed(timings, 'project stat lines'):
+        stat_lines = project_stat_lines(dfs, models)
+    with timed(timings, f'score {len(rules)} formats'):
+        scored = score_formats(stat_lines, rules)
+    first = next(iter(rules))
+    return scored.sort_values(by=f'VBD_{first}', ascending=False, ignore_index=True)
+
+
+def save_formats(year: int, df, output_dir='projections') -> str:
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, f'{year}_formats.csv')
+    df.to_csv(filepath)
+
+    print(f"{year} stat lines and format projections have been created.")
+    return filepath
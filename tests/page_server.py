@@ -0,0 +1,105 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import hashlib
+import os
+import threading
+import time
+
+
+class PageServer:
+    """
+    Local stand-in for the scraped sites: serves saved pages from a directory
+    (a request for /a/b.html returns {root}/a/b.html) on 127.0.0.1, so the
+    fetcher can be exercised without touching the network.
+
+    Every response carries an ETag, and a matching If-None-Match gets a 304.
+    fail(path, ...) queues responses to send before the page itself, e.g. a
+    429 with Retry-After, or 'truncate' for a body cut off mid-read. Every
+    request is logged as (time.monotonic(), path, headers).
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.failures = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def fail(self, path: str, *responses):
+        """
+        Queue responses for path: an HTTP status, (status, headers) or
+        'truncate'.
+        """
+        with self.lock:
+            self.failures.setdefault(path, []).extend(responses)
+
+    def requests_for(self, path: str) -> list:
+        with self.lock:
+            return [r for r in self.requests if r[1] == path]
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def _handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stand_in.lock:
+                    stand_in.requests.append((time.monotonic(), self.path, dict(self.headers)))
+                    queued = stand_in.failures.get(self.path)
+                    response = queued.pop(0) if queued else None
+
+                path = os.path.join(stand_in.root, self.path.lstrip('/'))
+                if not os.path.isfile(path):
+                    self.send_error(404)
+                    return
+                with open(path, 'rb') as f:
+                    body = f.read()
+
+                if response == 'truncate':
+                    # Promise the whole page but hang up halfway through it
+                    self.send_response(200)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body[:len(body) // 2])
+                    self.close_connection = True
+                    return
+                if response is not None:
+                    status, headers = response if isinstance(response, tuple) else (response, {})
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,81 @@
+import os
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.preprocessing import StandardScaler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backtest import backtest_model, batched_min_ranks, model_configs, solve_batch, walk_forward  # noqa: E402
+from incremental import SufficientStats  # noqa: E402
+from train import evaluate, init_worker, load_training_data  # noqa: E402
+
+
+class SolveBatchTest(unittest.TestCase):
+
+    def test_matches_sklearn_refits_per_config(self):
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(60, 5)) * [1, 30, 0.05, 1, 0] + [0, 200, 1, 0, 4]
+        # A duplicated feature, so OLS on both has no unique solution, and
+        # a constant one StandardScaler leaves unscaled
+        X[:, 3] = X[:, 0]
+        y = X[:, :3] @ [3, 0.2, -20] + rng.normal(size=60)
+        masks = np.array([
+            [1, 1, 1, 1, 1],
+            [1, 0, 0, 1, 0],
+            [0, 1, 1, 0, 0],
+            [0, 0, 0, 0, 1],
+            [1, 1, 1, 1, 1],
+            [0, 1, 0, 0, 1],
+        ], dtype=bool)
+        alphas = np.array([0.0, 0.0, 0.0, 0.0, 1.0, 10.0])
+
+        weights, intercepts = solve_batch(SufficientStats.from_rows(X, y), masks, alphas)
+
+        for mask, alpha, w, b in zip(masks, alphas, weights, intercepts):
+            scaler = StandardScaler().fit(X[:, mask])
+            model = (Ridge(alpha=alpha) if alpha else LinearRegression()).fit(scaler.transform(X[:, mask]), y)
+            np.testing.assert_array_equal(w[~mask], 0.0)
+            np.testing.assert_allclose(X @ w + b, model.predict(scaler.transform(X[:, mask])), rtol=1e-7, atol=1e-7)
+
+
+class BatchedRanksTest(unittest.TestCase):
+
+    def test_matches_pandas_min_rank(self):
+        values = np.random.default_rng(1).integers(0, 6, size=(4, 30)).astype(np.float64)
+        expected = np.stack([pd.Series(row).rank(ascending=False, method='min').to_numpy() for row in values])
+        np.testing.assert_array_equal(batched_min_ranks(values), expected)
+
+
+class BacktestModelTest(unittest.TestCase):
+
+    def setUp(self):
+        # The samples and models are read relative to the working directory
+        self.cwd = os.getcwd()
+        os.chdir(ROOT)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def test_scores_match_sklearn_refits(self):
+        years = list(range(2020, 2025))
+        for name in ('qb', 'rookie_wr'):
+            data = load_training_data([name], years)
+            configs = model_configs(name, ['linear', 'ridge:10'], [1, None])
+            results = backtest_model(name, data, configs, years)
+            self.assertEqual(len(results), len(configs) * len(walk_forward(name, years)))
+
+            init_worker(data)
+            for row in results.itertuples():
+                test_year = walk_forward(name, years)[row.Index // len(configs)][1]
+                expected = evaluate((name, list(row.TrainYears), test_year, list(row.Features), row.Estimator))
+                for metric in ('rmse', 'mae', 'r2'):
+                    self.assertAlmostEqual(getattr(row, metric), expected[metric], places=8)
+                self.assertEqual(row.rank, expected['rank'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import sys
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import datastore  # noqa: E402
+from chunked import SPECS, ingest  # noqa: E402
+
+
+def weekly_rows(seed=0, players=12, weeks=6) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for season in (2023, 2024):
+        for p in range(players):
+            for week in rng.choice(np.arange(1, 19), size=weeks, replace=False):
+                row = {'player_id': f'00-00{p:05d}', 'player_display_name': f'Player {p}',
+                       'position': ['QB', 'RB', 'FB', 'WR', 'TE', 'K'][p % 6], 'season': season, 'week': week}
+                for column, _ in SPECS['weekly']['columns'].values():
+                    if column != 'week':
+                        row[column] = int(rng.integers(0, 30))
+                rows.append(row)
+    df = pd.DataFrame(rows).sample(frac=1, random_state=seed).reset_index(drop=True)
+    # A week counted twice (nunique must not double it) and a blank season
+    # early on, which used to make every later chunk's seasons floats
+    df = pd.concat([df.iloc[[0]], df], ignore_index=True)
+    df.loc[2, 'season'] = np.nan
+    # A season whose rows all lack a player
+    lost = df.iloc[:3].assign(season=2022, player_id=None)
+    return pd.concat([df, lost], ignore_index=True)
+
+
+def expected(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.dropna(subset=['player_id', 'season']).astype({'season': int})
+    groups = df.groupby(['player_id', 'season'])
+    out = pd.DataFrame({output: groups[column].agg(how) for output, (column, how) in SPECS['weekly']['columns'].items()})
+    out['Player'] = groups['player_display_name'].first()
+    out['FantPos'] = groups['position'].first()
+    return out
+
+
+class IngestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.df = weekly_rows()
+        self.path = os.path.join(self.tmp.name, 'weekly.csv')
+        self.df.to_csv(self.path, index=False)
+        self.output = os.path.join(self.tmp.name, 'out')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_matches_a_full_groupby_and_round_trips_the_store(self):
+        # Small slices and chunks, so rows of one player are spread over
+        # many map tasks and merged back together
+        written = ingest([self.path], 'weekly', 'weekly', workers=2, chunk_rows=7, split_bytes=1500,
+                         output_dir=self.output)
+
+        self.assertEqual(sorted(written), [2022, 2023, 2024])
+        self.assertEqual(written[2022], [])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.output, 'store', 'weekly'))),
+                         ['year=2023', 'year=2024'])
+        self.assertFalse(any(name.startswith('.') for name in os.listdir(self.output)))
+
+        want = expected(self.df)
+        columns = list(SPECS['weekly']['columns'])
+        for season in (2023, 2024):
+            csv = pd.concat([pd.read_csv(os.path.join(self.output, f'{season}weeklystats_{pos}.csv'),
+                                         dtype={'PlayerId': 'string'})
+                             for pos in datastore.POSITIONS], ignore_index=True)
+            stored = datastore.read('weekly', [season], root=os.path.join(self.output, 'store'))
+            season_want = want.xs(season, level='season')
+            # Kickers are not one of the positions
+            season_want = season_want[season_want['FantPos'] != 'K']
+
+            for got in (csv, stored):
+                self.assertFalse(got['PlayerId'].isna().any())
+                got = got.set_index('PlayerId').sort_index()
+                self.assertEqual(list(got.index), list(season_want.index))
+                np.testing.assert_allclose(got[columns].to_numpy(dtype=np.float64),
+                                           season_want[columns].to_numpy(dtype=np.float64))
+                self.assertEqual(list(got['Player']), list(season_want['Player']))
+            self.assertEqual(set(csv['FantPos']), {'QB', 'RB', 'FB', 'WR', 'TE'})
+
+    def test_unsplit_and_split_reads_agree(self):
+        split = ingest([self.path], workers=1, chunk_rows=5, split_bytes=800,
+                       output_dir=os.path.join(self.output, 'split'), store=False)
+        whole = ingest([self.path], workers=1, split_bytes=None,
+                       output_dir=os.path.join(self.output, 'whole'), store=False)
+
+        self.assertEqual([len(files) for files in split.values()], [len(files) for files in whole.values()])
+        for a, b in zip(sum(split.values(), []), sum(whole.values(), [])):
+            pd.testing.assert_frame_equal(pd.read_csv(a), pd.read_csv(b))
+
+
+if __name__ == '__main__':
+    unittest.main()
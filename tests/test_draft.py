@@ -0,0 +1,104 @@
+import os
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from draft import DraftBoard, FenwickTree, LeagueSettings  # noqa: E402
+
+
+def ranked_players(seed=0, players=120) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Player': [f'Player {i}' for i in range(players)],
+        'Pos': rng.choice(['QB', 'RB', 'WR', 'TE'], size=players),
+        'Model': 'test',
+        'Projected_Pts': rng.uniform(0, 300, size=players).round(3),
+    })
+
+
+def reference_board(players: pd.DataFrame, settings: LeagueSettings, drafted: set) -> list:
+    """
+    The live board recomputed from scratch with sorted lists: each
+    position's baseline is its k-th best available player, k being the
+    starter slots still open there.
+    """
+    points = players['Projected_Pts'] * players['Pos'].map(settings.scoring)
+    rows = []
+    for pos in ('QB', 'RB', 'WR', 'TE'):
+        ids = [i for i in players.index[players['Pos'] == pos]]
+        available = sorted((i for i in ids if i not in drafted), key=lambda i: -points[i])
+        if available:
+            filled = len(ids) - len(available)
+            k = max(1, settings.baseline_rank(pos) - filled)
+            baseline = points[available[min(k, len(available)) - 1]]
+        else:
+            baseline = 0.0
+        rows.extend((points[i] - baseline, i) for i in available)
+    return sorted(rows, key=lambda row: -row[0])
+
+
+class FenwickTreeTest(unittest.TestCase):
+
+    def test_matches_a_list_of_counts(self):
+        rng = np.random.default_rng(1)
+        counts = [1] * 37
+        tree = FenwickTree(len(counts))
+        for _ in range(200):
+            i = int(rng.integers(len(counts)))
+            delta = -1 if counts[i] else 1
+            counts[i] += delta
+            tree.add(i, delta)
+
+            self.assertEqual(tree.total, sum(counts))
+            j = int(rng.integers(len(counts) + 1))
+            self.assertEqual(tree.prefix(j), sum(counts[:j]))
+            taken = [p for p, count in enumerate(counts) if count]
+            for k in range(len(taken) + 2):
+                self.assertEqual(tree.find(k), taken[k - 1] if 1 <= k <= len(taken) else -1)
+
+
+class DraftBoardTest(unittest.TestCase):
+
+    def setUp(self):
+        self.players = ranked_players()
+        self.settings = LeagueSettings(teams=4, starters={'QB': 1, 'RB': 2, 'WR': 3, 'TE': 1}, scoring={'TE': 1.5})
+        self.board = DraftBoard(self.players, self.settings)
+
+    def assertMatchesReference(self, drafted):
+        want = reference_board(self.players, self.settings, drafted)
+        got = self.board.board()
+        self.assertEqual([row['Id'] for row in got], [i for _, i in want])
+        np.testing.assert_allclose([row['VBD'] for row in got], [vbd for vbd, _ in want])
+
+    def test_random_picks_and_undos_match_a_sorted_list_board(self):
+        rng = np.random.default_rng(2)
+        drafted = set()
+        self.assertMatchesReference(drafted)
+        # Enough picks to run some positions dry and back
+        for _ in range(150):
+            if drafted and rng.random() < 0.3:
+                i = int(rng.choice(sorted(drafted)))
+                self.board.undo(i)
+                drafted.remove(i)
+            else:
+                i = int(rng.choice(sorted(set(range(len(self.players))) - drafted)))
+                self.board.pick(i)
+                drafted.add(i)
+            self.assertMatchesReference(drafted)
+
+    def test_position_filter_and_limit(self):
+        self.board.pick(int(self.players.index[self.players['Pos'] == 'RB'][0]))
+        rows = self.board.board('rb', limit=5)
+        want = [row for row in self.board.board() if row['Pos'] == 'RB'][:5]
+        self.assertEqual(rows, want)
+
+    def test_unknown_position(self):
+        with self.assertRaises(ValueError):
+            self.board.board('K')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import atexit
+import os
+import sys
+import tempfile
+import time
+import unittest
+from urllib.error import HTTPError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fetcher import Fetcher  # noqa: E402
+from http_cache import HttpCache  # noqa: E402
+from page_server import PageServer  # noqa: E402
+
+PAGES = {f'cfb/players/player-{i}.html': f'<html><body><table id="passing">{i}</table></body></html>'
+         for i in range(6)}
+
+
+class FetcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        pages = os.path.join(self.tmp.name, 'pages')
+        for path, html in PAGES.items():
+            os.makedirs(os.path.dirname(os.path.join(pages, path)), exist_ok=True)
+            with open(os.path.join(pages, path), 'w') as f:
+                f.write(html)
+        self.server = PageServer(pages).__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        self.tmp.cleanup()
+
+    def url(self, i: int) -> str:
+        return f'{self.server.url}/cfb/players/player-{i}.html'
+
+    def test_rate_limit_holds_across_workers(self):
+        rate = 20
+        fetcher = Fetcher(max_workers=4, rate=rate, retries=0)
+        try:
+            results = dict(fetcher.map(lambda url, body: body.decode(), [self.url(i) for i in range(6)]))
+        finally:
+            fetcher.close()
+
+        self.assertEqual(results, {self.url(i): PAGES[f'cfb/players/player-{i}.html'] for i in range(6)})
+        times = sorted(t for t, _, _ in self.server.requests)
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        # One token per 1/rate seconds, whatever the number of workers
+        self.assertGreaterEqual(min(gaps), 0.8 / rate)
+
+    def test_retries_429_after_retry_after(self):
+        path = '/cfb/players/player-0.html'
+        self.server.fail(path, (429, {'Retry-After': '0.3'}))
+        fetcher = Fetcher(rate=100, retries=2, backoff=0.01)
+
+        body = fetcher.fetch(self.url(0))
+
+        self.assertEqual(body.decode(), PAGES['cfb/players/player-0.html'])
+        first, second = [t for t, _, _ in self.server.requests_for(path)]
+        self.assertGreaterEqual(second - first, 0.25)
+
+    def test_retries_503_with_backoff(self):
+        path = '/cfb/players/player-1.html'
+        self.server.fail(path, 503, 503)
+        fetcher = Fetcher(rate=100, retries=2, backoff=0.01)
+
+        self.assertEqual(fetcher.fetch(self.url(1)).decode(), PAGES['cfb/players/player-1.html'])
+        self.assertEqual(len(self.server.requests_for(path)), 3)
+
+    def test_gives_up_after_retries(self):
+        path = '/cfb/players/player-2.html'
+        self.server.fail(path, 503, 503, 503)
+        fetcher = Fetcher(rate=100, retries=2, backoff=0.01)
+
+        with self.assertRaises(HTTPError) as raised:
+            fetcher.fetch(self.url(2))
+        self.assertEqual(raised.exception.code, 503)
+
+    def test_retries_body_cut_off_mid_read(self):
+        path = '/cfb/players/player-3.html'
+        self.server.fail(path, 'truncate')
+        fetcher = Fetcher(rate=100, retries=2, backoff=0.01)
+
+        self.assertEqual(fetcher.fetch(self.url(3)).decode(), PAGES['cfb/players/player-3.html'])
+        self.assertEqual(len(self.server.requests_for(path)), 2)
+
+    def test_stale_page_revalidates_with_304(self):
+        path = '/cfb/players/player-4.html'
+        cache = HttpCache(root=os.path.join(self.tmp.name, 'cache'))
+        # The cache directory is gone by the time the interpreter exits
+        atexit.unregister(cache.save)
+        fetcher = Fetcher(rate=100, retries=0, cache=cache)
+        url = self.url(4)
+
+        self.assertEqual(fetcher.fetch(url).decode(), PAGES['cfb/players/player-4.html'])
+        # Fresh: served from the cache without a request
+        fetcher.fetch(url)
+        self.assertEqual(len(self.server.requests_for(path)), 1)
+
+        cache.entries[url]['fetched'] = 0
+        before = time.time()
+        self.assertEqual(fetcher.fetch(url).decode(), PAGES['cfb/players/player-4.html'])
+        requests = self.server.requests_for(path)
+        self.assertEqual(len(requests), 2)
+        self.assertIn('If-None-Match', requests[1][2])
+        self.assertGreaterEqual(cache.entries[url]['fetched'], before)
+
+    def test_page_evicted_before_its_304_is_fetched_again(self):
+        path = '/cfb/players/player-5.html'
+        cache = HttpCache(root=os.path.join(self.tmp.name, 'cache'))
+        atexit.unregister(cache.save)
+        fetcher = Fetcher(rate=100, retries=0, cache=cache)
+        url = self.url(5)
+        fetcher.fetch(url)
+        cache.entries[url]['fetched'] = 0
+
+        # Another worker's store evicts the page while it is being revalidated
+        conditional_headers = cache.conditional_headers
+
+        def evicted_meanwhile(entry):
+            with cache.lock:
+                cache._remove(url)
+            return conditional_headers(entry)
+
+        cache.conditional_headers = evicted_meanwhile
+        self.assertEqual(fetcher.fetch(url).decode(), PAGES['cfb/players/player-5.html'])
+        requests = self.server.requests_for(path)
+        self.assertEqual(len(requests), 3)
+        self.assertIn('If-None-Match', requests[1][2])
+        self.assertNotIn('If-None-Match', requests[2][2])
+        self.assertIn(url, cache.entries)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import atexit
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_cache import HttpCache  # noqa: E402
+
+
+class HttpCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'cache')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def cache(self, **kwargs) -> HttpCache:
+        cache = HttpCache(root=self.root, **kwargs)
+        # The cache directory is gone by the time the interpreter exits
+        atexit.unregister(cache.save)
+        return cache
+
+    def saved_urls(self) -> list:
+        if not os.path.exists(os.path.join(self.root, 'index.json')):
+            return []
+        with open(os.path.join(self.root, 'index.json')) as f:
+            return sorted(json.load(f))
+
+    def test_index_is_written_in_batches(self):
+        cache = self.cache(save_every=3)
+        for i in range(5):
+            cache.store(f'http://site/{i}', f'page {i}'.encode(), {})
+        self.assertEqual(self.saved_urls(), ['http://site/0', 'http://site/1', 'http://site/2'])
+        cache.save()
+        self.assertEqual(len(self.saved_urls()), 5)
+
+        reopened = self.cache()
+        self.assertEqual(reopened.lookup('http://site/4')[0], b'page 4')
+
+    def test_evicts_least_recently_used_and_keeps_shared_blobs(self):
+        cache = self.cache()
+        bodies = {f'http://site/{i}': os.urandom(2000) for i in range(4)}
+        for i, (url, body) in enumerate(bodies.items()):
+            cache.store(url, body, {})
+            cache.entries[url]['accessed'] = i
+        # A second URL for the oldest page's body
+        cache.store('http://mirror/0', bodies['http://site/0'], {})
+        cache.entries['http://mirror/0']['accessed'] = 10
+        blob_sizes = {e['digest']: e['size'] for e in cache.entries.values()}
+        self.assertEqual(cache.total_bytes, sum(blob_sizes.values()))
+        evicted_blob = cache.blob_path(cache.entries['http://site/2']['digest'])
+
+        # Room for three of the four blobs
+        cache.max_bytes = cache.total_bytes - 1
+        cache.store('http://site/1', bodies['http://site/1'], {})
+
+        # site/0 went first, but its blob is still used by the mirror, so
+        # site/2 had to go too
+        self.assertEqual(sorted(cache.entries), ['http://mirror/0', 'http://site/1', 'http://site/3'])
+        self.assertEqual(cache.lookup('http://mirror/0')[0], bodies['http://site/0'])
+        self.assertFalse(os.path.exists(evicted_blob))
+        self.assertEqual(cache.total_bytes, sum({e['digest']: e['size'] for e in cache.entries.values()}.values()))
+        self.assertLessEqual(cache.total_bytes, cache.max_bytes)
+
+    def test_revalidating_an_evicted_page_is_a_miss(self):
+        cache = self.cache()
+        cache.store('http://site/0', b'page', {'ETag': '"a"'})
+        self.assertTrue(cache.revalidated('http://site/0'))
+        cache.entries.clear()
+        self.assertFalse(cache.revalidated('http://site/0'))
+
+
+if __name__ == '__main__':
+    unittest.main()
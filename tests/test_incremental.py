@@ -0,0 +1,109 @@
+import os
+import sys
+import tempfile
+import unittest
+import numpy as np
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.preprocessing import StandardScaler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from features import FEATURE_SPECS  # noqa: E402
+from incremental import (SufficientStats, build_package, full_refit_difference, load_stats,  # noqa: E402
+                         save_stats, update_stats)
+from train import sample_years  # noqa: E402
+
+
+def seasons(seed=0, sizes=(40, 1, 75, 23)):
+    # Uneven seasons (one of a single row), features on very different
+    # scales and a constant one StandardScaler leaves unscaled
+    rng = np.random.default_rng(seed)
+    out = []
+    for n in sizes:
+        X = rng.normal(size=(n, 4)) * [1, 50, 0.01, 0] + [0, 300, 2, 7]
+        y = X @ [2, 0.1, -40, 1] + rng.normal(size=n)
+        out.append((X, y))
+    return out
+
+
+class SufficientStatsTest(unittest.TestCase):
+
+    def test_merged_seasons_match_the_stats_of_all_rows(self):
+        parts = seasons()
+        merged = SufficientStats(0, None, None)
+        for X, y in parts:
+            merged = merged.merge(SufficientStats.from_rows(X, y))
+        whole = SufficientStats.from_rows(np.vstack([X for X, _ in parts]), np.concatenate([y for _, y in parts]))
+
+        self.assertEqual(merged.n, whole.n)
+        np.testing.assert_allclose(merged.mean, whole.mean, rtol=1e-12)
+        np.testing.assert_allclose(merged.scatter, whole.scatter, rtol=1e-9, atol=1e-9)
+
+    def test_fit_matches_a_full_sklearn_refit(self):
+        parts = seasons(1)
+        X = np.vstack([X for X, _ in parts])
+        y = np.concatenate([y for _, y in parts])
+        merged = SufficientStats(0, None, None)
+        for part in parts:
+            merged = merged.merge(SufficientStats.from_rows(*part))
+
+        for index in ([0, 1, 2, 3], [1, 2], [3]):
+            for alpha in (0.0, 1.0, 10.0):
+                scaler = StandardScaler().fit(X[:, index])
+                model = (Ridge(alpha=alpha) if alpha else LinearRegression()).fit(scaler.transform(X[:, index]), y)
+
+                package = build_package([f'f{i}' for i in index], merged.n, merged.fit(index, alpha), alpha)
+                np.testing.assert_allclose(package['scaler'].scale_, scaler.scale_, rtol=1e-10)
+                expected = model.predict(scaler.transform(X[:, index]))
+                actual = package['model'].predict(package['scaler'].transform(X[:, index]))
+                np.testing.assert_allclose(actual, expected, rtol=1e-8, atol=1e-8)
+
+    def test_saved_stats_round_trip(self):
+        with tempfile.TemporaryDirectory() as stats_dir:
+            stats = {2020 + i: (f'fingerprint-{i}', SufficientStats.from_rows(X, y))
+                     for i, (X, y) in enumerate(seasons(2))}
+            save_stats('qb', stats, stats_dir)
+            loaded = load_stats('qb', stats_dir)
+
+        self.assertEqual(sorted(loaded), sorted(stats))
+        for year, (fingerprint, s) in stats.items():
+            self.assertEqual(loaded[year][0], fingerprint)
+            self.assertEqual(loaded[year][1].n, s.n)
+            np.testing.assert_array_equal(loaded[year][1].scatter, s.scatter)
+
+
+class RetrainTest(unittest.TestCase):
+
+    def setUp(self):
+        # sample_frame reads data/ relative to the working directory
+        self.cwd = os.getcwd()
+        os.chdir(ROOT)
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_adding_a_season_matches_a_full_refit(self):
+        years = range(2020, 2025)
+        train_years = sample_years('qb', years)
+        # Stats for all but the last season first, then the last one alone
+        update_stats('qb', years[:-1], self.tmp.name)
+        stats, added = update_stats('qb', years, self.tmp.name)
+        self.assertEqual(added, [train_years[-1]])
+        self.assertEqual(update_stats('qb', years, self.tmp.name)[1], [])
+
+        merged = SufficientStats(0, None, None)
+        for year in train_years:
+            merged = merged.merge(stats[year][1])
+        columns = [output for output, _, _ in FEATURE_SPECS['qb']]
+        features = ['PassYdsPerGame', 'PassTDsPerGame', 'RushYdsPerGame']
+        index = [columns.index(f) for f in features]
+        for estimator, alpha in (('linear', 0.0), ('ridge:1.0', 1.0)):
+            package = build_package(features, merged.n, merged.fit(index, alpha), alpha)
+            self.assertLess(full_refit_difference('qb', years, train_years, features, estimator, package), 1e-8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_artifact import artifact_path  # noqa: E402
+from projections import model_path  # noqa: E402
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+
+
+class ModelPathTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.joblib = os.path.join(self.tmp.name, 'qb_model.joblib')
+        shutil.copy(os.path.join(MODELS_DIR, 'qb_model.joblib'), self.joblib)
+        shutil.copy(os.path.join(MODELS_DIR, 'qb_model.fbm'), artifact_path(self.joblib))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_prefers_the_artifact_of_the_current_package(self):
+        self.assertEqual(model_path('qb', self.tmp.name), artifact_path(self.joblib))
+
+    def test_falls_back_to_a_package_changed_since_the_export(self):
+        with open(self.joblib, 'ab') as f:
+            f.write(b'\0')
+        self.assertEqual(model_path('qb', self.tmp.name), self.joblib)
+
+    def test_artifact_alone_is_used(self):
+        os.remove(self.joblib)
+        self.assertEqual(model_path('qb', self.tmp.name), artifact_path(self.joblib))
+
+
+if __name__ == '__main__':
+    unittest.main()
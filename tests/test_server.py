@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+import threading
+import unittest
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from server import ProjectionHandler, ProjectionService  # noqa: E402
+
+
+class ServerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # The service reads models/ and data/ relative to the working directory
+        cls.cwd = os.getcwd()
+        os.chdir(ROOT)
+        cls.service = ProjectionService(2025)
+        cls.service.verbose = False
+        handler = type('Handler', (ProjectionHandler,), {'service': cls.service})
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = 'http://127.0.0.1:%d' % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join()
+        os.chdir(cls.cwd)
+
+    def get(self, path: str):
+        with urlopen(self.url + path) as response:
+            return json.loads(response.read())
+
+    def test_caches_responses(self):
+        self.service.responses = {}
+        rows = self.get('/projections?pos=QB&limit=3')
+        self.assertEqual([row['Pos'] for row in rows], ['QB'] * 3)
+        self.assertIn('/projections?pos=QB&limit=3', self.service.responses)
+
+    def test_drops_a_response_built_across_a_refresh(self):
+        self.service.responses = {}
+        ranked_projections = self.service.ranked_projections
+
+        def refreshed_meanwhile(*args):
+            with self.service.lock:
+                self.service.responses = {}
+                self.service.version += 1
+            return ranked_projections(*args)
+
+        self.service.ranked_projections = refreshed_meanwhile
+        try:
+            self.get('/projections?limit=2')
+        finally:
+            del self.service.ranked_projections
+        self.assertEqual(self.service.responses, {})
+
+    def test_unknown_draft_position_is_a_bad_request(self):
+        with self.assertRaises(HTTPError) as raised:
+            self.get('/draft?pos=K')
+        self.assertEqual(raised.exception.code, 400)
+        self.assertEqual(len(self.get('/draft?pos=rb&limit=4')['board']), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
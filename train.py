@@ -0,0 +1,293 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+import os
+import time
+import numpy as np
+import pandas as pd
+from features import FEATURE_SPECS, feature_block
+from model_artifact import artifact_path, export_package
+from player_ids import PFR_ID_COLUMN, add_player_keys, merge_players
+from projections import MODELS, model_path, load_model
+from scoring import STATS
+
+# What each model is trained to predict, as in its train_*_model notebook:
+#   next_season           next season's FantasyPtsPPR, for players in both seasons
+#   next_season_per_game  the same, per game played
+#   rookie_season         FantasyPtsPPR in the draft season, 0 if they did not play
+# train_qb_model.ipynb now targets points per game, but the saved QB model
+# (like every other model projections ranks together) predicts season totals.
+TARGETS = {
+    'qb': 'next_season',
+    'rb_fb': 'next_season',
+    'wr': 'next_season',
+    'te': 'next_season',
+    'rookie_qb': 'rookie_season',
+    'rookie_rb_fb': 'rookie_season',
+    'rookie_wr': 'rookie_season',
+    'rookie_te': 'rookie_season',
+}
+
+DEFAULT_ESTIMATORS = ['linear', 'ridge:0.1', 'ridge:1', 'ridge:10', 'lasso:0.1', 'lasso:1', 'gbr']
+METRICS = ['rmse', 'mae', 'rank']
+
+
+def make_estimator(spec: str):
+    """
+    Build an estimator from a spec like 'linear', 'ridge:1' or 'gbr'.
+    """
+    kind, _, param = spec.partition(':')
+    if kind == 'linear':
+        from sklearn.linear_model import LinearRegression
+        return LinearRegression()
+    if kind == 'ridge':
+        from sklearn.linear_model import Ridge
+        return Ridge(alpha=float(param or 1.0))
+    if kind == 'lasso':
+        from sklearn.linear_model import Lasso
+        return Lasso(alpha=float(param or 1.0), max_iter=10000)
+    if kind == 'gbr':
+        from sklearn.ensemble import GradientBoostingRegressor
+        return GradientBoostingRegressor(max_depth=int(param or 2), random_state=0)
+    raise ValueError(f"Unknown estimator '{spec}'")
+
+
+# --- Training data ---
+
+def read_stats(kind: str, year: int, pos: str) -> pd.DataFrame:
+    stats = 'playerstats' if kind == 'players' else 'rookiestats'
+    return pd.read_csv(os.path.join('data', f"{year}{stats}_{pos}.csv"))
+
+
+def with_target(df: pd.DataFrame, target) -> pd.DataFrame:
+    # The merged frames have a block per column, so concat rather than insert
+    return pd.concat([df, pd.DataFrame({'Target': target}, index=df.index)], axis=1)
+
+
+def sample_frame(name: str, year: int, frames: dict) -> pd.DataFrame:
+    """
+    One season of training rows for a model: the player's stats in `year`
+    next to the season they are projected for. `frames` caches the CSVs.
+    """
+    kind, pos, _ = MODELS[name]
+
+    def stats(kind, year):
+        # Cached with their player keys, so each file is resolved only once
+        if (kind, year, pos) not in frames:
+            frames[(kind, year, pos)] = add_player_keys(read_stats(kind, year, pos))
+        return frames[(kind, year, pos)]
+
+    if TARGETS[name] == 'rookie_season':
+        season = stats('players', year)
+        season = season[[c for c in ['Player', PFR_ID_COLUMN, 'FantasyPtsPPR', *STATS] if c in season]]
+        df = merge_players(stats('rookies', year), season, how='left')
+        return with_target(df, df['FantasyPtsPPR'].fillna(0).to_numpy(dtype=np.float64))
+
+    df = merge_players(stats('players', year), stats('players', year + 1), how='inner', suffixes=('', '_next'))
+    target = df['FantasyPtsPPR_next'].to_numpy(dtype=np.float64)
+    if TARGETS[name] == 'next_season_per_game':
+        games = df['GamesPlayed_next'].to_numpy(dtype=np.float64)
+        target = np.divide(target, games, out=np.zeros_like(target), where=games > 0)
+    return with_target(df, target)
+
+
+def sample_years(name: str, years) -> list:
+    # Veteran samples need the following season too
+    if TARGETS[name] == 'rookie_season':
+        return list(years)
+    return [year for year in years if year + 1 in years]
+
+
+def load_training_data(names, years) -> dict:
+    """
+    Build every (model, season) sample once: {name: {year: (X, y, players)}},
+    with X holding every feature in the model's FEATURE_SPECS entry.
+    """
+    frames = {}
+    data = {}
+    for name in names:
+        data[name] = {}
+        for year in sample_years(name, years):
+            df = sample_frame(name, year, frames)
+            _, X = feature_block(df, name)
+            y = df['Target'].to_numpy(dtype=np.float64)
+            keep = np.isfinite(y)
+            data[name][year] = (X[keep], y[keep], df['Player'].to_numpy()[keep])
+    return data
+
+
+# --- Grid ---
+
+def feature_sets(name: str, all_subsets=False, models_dir='models') -> list:
+    """
+    Candidate feature subsets for a model: the current model's features,
+    every spec feature, and every spec feature but one. all_subsets tries
+    every non-empty subset instead.
+    """
+    spec = [output for output, _, _ in FEATURE_SPECS[name]]
+    candidates = []
+    try:
+        candidates.append(tuple(load_model(model_path(name, models_dir)).features))
+    except FileNotFoundError:
+        pass
+    if all_subsets:
+        candidates += [c for size in range(len(spec), 0, -1) for c in combinations(spec, size)]
+    else:
+        candidates.append(tuple(spec))
+        candidates += list(combinations(spec, len(spec) - 1))
+    return list(dict.fromkeys(candidates))
+
+
+def training_windows(years: list) -> list:
+    """
+    Train on the seasons before the last, which is held out for testing.
+    Windows are the most recent 1, 2, ... of those seasons.
+    """
+    train = years[:-1]
+    return [tuple(train[-size:]) for size in range(1, len(train) + 1)]
+
+
+def build_grid(names, years, estimators=DEFAULT_ESTIMATORS, all_subsets=False, models_dir='models') -> list:
+    grid = []
+    for name in names:
+        available = sample_years(name, years)
+        if len(available) < 2:
+            print(f"Skipping {name}, it needs at least two seasons of samples")
+            continue
+        for features in feature_sets(name, all_subsets, models_dir):
+            for window in training_windows(available):
+                for estimator in estimators:
+                    grid.append((name, window, available[-1], features, estimator))
+    return grid
+
+
+# --- Evaluation (runs in worker processes) ---
+
+_training_data = None
+
+
+def init_worker(data):
+    global _training_data
+    _training_data = data
+
+
+def stack(name: str, years, features) -> tuple:
+    columns = [output for output, _, _ in FEATURE_SPECS[name]]
+    index = [columns.index(f) for f in features]
+    samples = [_training_data[name][year] for year in years]
+    X = np.vstack([X for X, _, _ in samples])[:, index]
+    y = np.concatenate([y for _, y, _ in samples])
+    return X, y
+
+
+def fit(estimator: str, X, y):
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler().fit(X)
+    model = make_estimator(estimator).fit(scaler.transform(X), y)
+    return scaler, model
+
+
+def rank_squared_error(actual, predicted) -> float:
+    # Same as helpers.compute_rank_squared_error
+    actual_rank = pd.Series(actual).rank(ascending=False, method='min')
+    predicted_rank = pd.Series(predicted).rank(ascending=False, method='min')
+    return float(((predicted_rank - actual_rank) ** 2).sum())
+
+
+def score(actual, predicted) -> dict:
+    error = predicted - actual
+    return {
+        'rmse': float(np.sqrt(np.mean(error ** 2))),
+        'mae': float(np.mean(np.abs(error))),
+        'r2': float(1 - np.sum(error ** 2) / np.sum((actual - actual.mean()) ** 2)),
+        'rank': rank_squared_error(actual, predicted),
+    }
+
+
+def evaluate(config) -> dict:
+    name, window, test_year, features, estimator = config
+    X_train, y_train = stack(name, window, features)
+    X_test, y_test = stack(name, [test_year], features)
+    scaler, model = fit(estimator, X_train, y_train)
+    return score(y_test, model.predict(scaler.transform(X_test)))
+
+
+# --- Sweep ---
+
+def sweep(grid, data, workers=None) -> pd.DataFrame:
+    """
+    Score every configuration in the grid on a process pool. The training
+    samples are sent to each worker once, when it starts.
+    """
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(grid) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(data,)) as pool:
+        scores = list(pool.map(evaluate, grid, chunksize=chunksize))
+
+    results = pd.DataFrame(grid, columns=['Model', 'TrainYears', 'TestYear', 'Features', 'Estimator'])
+    return pd.concat([results, pd.DataFrame(scores)], axis=1)
+
+
+def best_configs(results: pd.DataFrame, metric='rmse') -> pd.DataFrame:
+    # Stable sort, so ties go to the earliest config (the current features)
+    ranked = results.sort_values(by=[metric], kind='stable')
+    return ranked.drop_duplicates('Model').set_index('Model').loc[results['Model'].unique()]
+
+
+def save_winner(name: str, best, data, models_dir='models') -> str:
+    """
+    Refit the winning config and save it to models_dir.
+    """
+    init_worker(data)
+    features = list(best['Features'])
+    X, y = stack(name, best['TrainYears'], features)
+    scaler, model = fit(best['Estimator'], pd.DataFrame(X, columns=features), y)
+    return save_package(name, {'model': model, 'scaler': scaler, 'features': features}, models_dir)
+
+
+def save_package(name: str, model_package: dict, models_dir='models', artifact='model') -> str:
+    """
+    Write a model package as models/{name}_{artifact}.joblib, plus a .fbm
+    artifact when its estimator is linear.
+    """
+    import joblib
+
+    os.makedirs(models_dir, exist_ok=True)
+    filepath = os.path.join(models_dir, f'{name}_{artifact}.joblib')
+    joblib.dump(model_package, filepath)
+
+    if hasattr(model_package['model'], 'coef_'):
+        export_package(filepath)
+    elif os.path.exists(artifact_path(filepath)):
+        # A stale artifact would shadow the new package
+        os.remove(artifact_path(filepath))
+    return filepath
+
+
+def run(names=MODELS, years=range(2020, 2025), estimators=None, metric='rmse',
+        all_subsets=False, workers=None, save=True, results_file=None, models_dir='models'):
+    """
+    Sweep every model's grid, print the winners and, if save is set, write
+    them to models_dir. Returns every configuration's scores.
+    """
+    estimators = estimators or DEFAULT_ESTIMATORS
+    start = time.perf_counter()
+    years = sorted(years)
+    data = load_training_data(names, years)
+    grid = build_grid(names, years, estimators, all_subsets, models_dir)
+    print(f"Built training data and {len(grid)} configurations in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    results = sweep(grid, data, workers)
+    print(f"Evaluated {len(grid)} configurations in {time.perf_counter() - start:.1f} s")
+    if results_file:
+        results.to_csv(results_file, index=False)
+
+    best = best_configs(results, metric)
+    for name, row in best.iterrows():
+        print(f"{name}: {row['Estimator']} on {list(row['TrainYears'])}, test {row['TestYear']}, "
+              f"RMSE {row['rmse']:.2f}, MAE {row['mae']:.2f}, R^2 {row['r2']:.3f}, rank error {row['rank']:.0f}")
+        print(f"    features: {list(row['Features'])}")
+        if save:
+            print(f"    saved to '{save_winner(name, row, data, models_dir)}'")
+    return results